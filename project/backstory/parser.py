@@ -2,12 +2,13 @@
 Parses hypothetical backstory into constraints.
 """
 
-from constraints.schema import Constraint, CharacterState
-from typing import Dict
+from constraints.schema import Claim, Constraint, CharacterState
+from typing import Dict, List
 import re
 import hashlib
 
 
+from narrative.keyword_matcher import KeywordMatcher
 from narrative.sentiment import SentimentAnalyzer
 
 class BackstoryParser:
@@ -21,14 +22,15 @@ class BackstoryParser:
             "loyalty": ["loyal", "betray", "abandon", "protect", "defend", "sacrifice"],
             "morality": ["right", "wrong", "evil", "good", "dark", "innocent", "guilt"]
         }
+        self.matcher = KeywordMatcher.compile(self.dimension_keywords)
         self.sentiment = SentimentAnalyzer()
 
-    def parse_backstory(self, backstory_text: str) -> CharacterState:
+    def parse_claims(self, backstory_text: str) -> List[Claim]:
         """
-        Parses backstory text into a CharacterState with constraints.
+        Splits backstory text into claims: sentences with a constraint
+        dimension and their polarity.
         """
-        constraints = {}
-        history = []
+        claims = []
         
         # Split into sentences
         sentences = re.split(r'(?<=[.!?])\s+', backstory_text.strip())
@@ -37,34 +39,54 @@ class BackstoryParser:
             sentence = sentence.strip()
             if not sentence:
                 continue
-            lower_sent = sentence.lower()
             
-            # Detect dimensions and polarities
-            for dim, keywords in self.dimension_keywords.items():
-                if any(kw in lower_sent for kw in keywords):
-                    # Determine polarity using VADER
-                    polarity = self.sentiment.get_polarity(sentence)
-                    
-                    # Generate ID
-                    claim_id = hashlib.md5(sentence.encode()).hexdigest()[:8]
-                    
-                    # Create or update constraint
-                    if dim in constraints:
-                        constraints[dim] = Constraint(
-                            dimension=dim,
-                            polarity=polarity,
-                            strength=min(1.0, constraints[dim].strength + 0.1),
-                            evidence_ids=constraints[dim].evidence_ids + [claim_id]
-                        )
-                    else:
-                        constraints[dim] = Constraint(
-                            dimension=dim,
-                            polarity=polarity,
-                            strength=0.5,
-                            evidence_ids=[claim_id]
-                        )
-                    
-                    history.append(claim_id)
-                    break  # One per sentence
+            # Detect dimensions; the first matching dimension wins (one per sentence)
+            dims = self.matcher.match(sentence)
+            if not dims:
+                continue
+            
+            # Determine polarity using VADER
+            polarity = self.sentiment.get_polarity(sentence)
+            
+            # Generate ID
+            claim_id = hashlib.md5(sentence.encode()).hexdigest()[:8]
+            claims.append(Claim(id=claim_id, sentence=sentence, dimension=dims[0], polarity=polarity))
+        
+        return claims
+
+    def parse_backstory(self, backstory_text: str) -> CharacterState:
+        """
+        Parses backstory text into a CharacterState with constraints.
+        """
+        return self.fold_claims(self.parse_claims(backstory_text))
+
+    def fold_claims(self, claims: List[Claim]) -> CharacterState:
+        """
+        Combines claims into constraints: the latest polarity of a dimension
+        wins and every further claim adds 0.1 strength.
+        """
+        constraints = {}
+        history = []
+        
+        for claim in claims:
+            dim, polarity, claim_id = claim.dimension, claim.polarity, claim.id
+            
+            # Create or update constraint
+            if dim in constraints:
+                constraints[dim] = Constraint(
+                    dimension=dim,
+                    polarity=polarity,
+                    strength=min(1.0, constraints[dim].strength + 0.1),
+                    evidence_ids=constraints[dim].evidence_ids + [claim_id]
+                )
+            else:
+                constraints[dim] = Constraint(
+                    dimension=dim,
+                    polarity=polarity,
+                    strength=0.5,
+                    evidence_ids=[claim_id]
+                )
+            
+            history.append(claim_id)
         
         return CharacterState(constraints=constraints, history=history)
\ No newline at end of file
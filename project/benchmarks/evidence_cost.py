@@ -0,0 +1,77 @@
+"""
+Per-row cost and accuracy of evidence retrieval against the full-novel fold.
+
+Both paths start from the same annotated novels (feature store) and the same
+warm shared state: the VADER scorer is built, every backstory has been parsed
+once (filling the sentiment cache), and every character name has been looked
+up in the mention index. The numbers then compare only the per-row work:
+
+    fold      character_state() folds all experiences of the character's
+              paragraphs (no precomputed character_states), plus the backstory
+              parse and comparison
+    evidence  claim parsing, retrieval over the candidate paragraphs and
+              evidence scoring, with an empty claim -> passage cache
+    evidence_cached  the same rows again, claims now cached
+
+Building the per-book paragraph index is reported separately.
+
+    python -m benchmarks.evidence_cost
+"""
+
+import time
+from typing import Dict
+
+import pandas as pd
+
+import run_kdsh
+from benchmarks.harness import quality_metrics
+from backstory.parser import BackstoryParser
+from evidence.engine import EvidenceEngine
+from narrative.sentiment import SentimentAnalyzer
+
+
+def benchmark_evidence(train_path: str = run_kdsh.TRAIN_PATH, top_k: int = 3,
+                       candidate_budget: int = 200) -> Dict[str, Dict[str, float]]:
+    rows = pd.read_csv(train_path).to_dict("records")
+    labels = [run_kdsh.LABEL_PREDICTIONS[row["label"]] for row in rows]
+    # Not preloaded: character_state() must fold the novel for every row
+    corpora = {book: run_kdsh.load_annotated_novel(book)
+               for book in sorted({row["book_name"] for row in rows})}
+
+    # 1. Shared warm-up, so no variant pays for state the others reuse
+    SentimentAnalyzer().warm_up()
+    parser = BackstoryParser()
+    for row in rows:
+        parser.parse_claims(row["content"])
+        corpora[row["book_name"]].select_paragraphs(
+            row["char"], run_kdsh.CHARACTER_ALIASES.get(row["char"], ()))
+
+    # 2. Paragraph indexes, timed on their own
+    start = time.perf_counter()
+    engines = {book: EvidenceEngine(corpus, top_k=top_k, candidate_budget=candidate_budget)
+               for book, corpus in corpora.items()}
+    index_seconds = time.perf_counter() - start
+
+    # 3. Per-row work of each variant
+    report = {}
+    for name in ("fold", "evidence", "evidence_cached"):
+        predictions = []
+        start = time.perf_counter()
+        for row in rows:
+            if name == "fold":
+                result = run_kdsh.analyze_single(None, row["content"], row["char"],
+                                                 corpus=corpora[row["book_name"]])
+            else:
+                result = run_kdsh.analyze_with_evidence(row["content"], row["char"],
+                                                        engines[row["book_name"]])
+            predictions.append(result["prediction"])
+        elapsed = time.perf_counter() - start
+        report[name] = {"ms_per_row": 1000 * elapsed / len(rows),
+                        **quality_metrics(labels, predictions)}
+    report["index"] = {"seconds": index_seconds}
+    return report
+
+
+if __name__ == "__main__":
+    for name, metrics in benchmark_evidence().items():
+        print(f"{name:>16}: " + "  ".join(f"{k} {v:.3f}" for k, v in metrics.items()))
@@ -0,0 +1,206 @@
+"""
+Speed and accuracy benchmark over the labelled rows of train.csv.
+
+Every run is cold: novels are read from data/ and re-annotated (the feature
+store is bypassed and the sentiment cache cleared), so stage timings cover
+the full pipeline. Interpreter start-up and imports are measured separately
+by benchmarks.import_time. The JSON report is compared against a stored baseline and
+the run fails when throughput or accuracy drop by more than the baseline's
+tolerance.
+
+Raw rows/s depends on the host, so the gate uses relative throughput instead:
+rows/s divided by the speed of a fixed pure-Python reference workload timed
+in the same process. A baseline recorded on one machine then still holds on
+a faster or slower one.
+
+    python -m benchmarks.harness                    # run, report, gate
+    python -m benchmarks.harness --update-baseline  # accept the current numbers
+"""
+
+import argparse
+import json
+import os
+import re
+import resource
+import sys
+import time
+from typing import Dict, List
+
+import pandas as pd
+
+import run_kdsh
+from instrumentation import recording
+from narrative.corpus import AnnotatedNovel
+from narrative.sentiment import SentimentAnalyzer
+
+
+STAGES = ["load", "chunk", "detect", "sentiment", "update", "parse", "compare"]
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+REPORT_PATH = os.path.join(run_kdsh.PROJECT_DIR, "results", "benchmark.json")
+
+# Allowed drop before a run counts as a regression: a fraction of the baseline
+# for relative_throughput, absolute for the accuracy-type metrics
+DEFAULT_TOLERANCE = {"relative_throughput": 0.30, "accuracy": 0.0, "f1_contradict": 0.0}
+RELATIVE_METRICS = {"relative_throughput"}
+
+_REFERENCE_TEXT = ("Faria trusted his friend, but the guards were cruel and evil. "
+                   "Dantes was brave, and he loved Mercedes. ") * 50
+_REFERENCE_WORD_RE = re.compile(r"\b[a-z]+\b")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / (1 << 10)
+
+
+def reference_speed(rounds: int = 200, repeats: int = 5) -> float:
+    """
+    Rounds per second of a fixed tokenize-and-count workload (the best of
+    `repeats` timings), a measure of this host's single-core Python speed.
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            counts = {}
+            for word in _REFERENCE_WORD_RE.findall(_REFERENCE_TEXT.lower()):
+                counts[word] = counts.get(word, 0) + 1
+        best = min(best, time.perf_counter() - start)
+    return rounds / best
+
+
+def f1_score(labels: List[int], predictions: List[int], positive: int) -> float:
+    tp = sum(1 for y, p in zip(labels, predictions) if y == positive and p == positive)
+    fp = sum(1 for y, p in zip(labels, predictions) if y != positive and p == positive)
+    fn = sum(1 for y, p in zip(labels, predictions) if y == positive and p != positive)
+    return 2 * tp / (2 * tp + fp + fn) if tp else 0.0
+
+
+def quality_metrics(labels: List[int], predictions: List[int]) -> Dict[str, float]:
+    """Accuracy plus F1 of the contradict (0) class and macro F1."""
+    correct = sum(1 for y, p in zip(labels, predictions) if y == p)
+    f1_contradict = f1_score(labels, predictions, positive=0)
+    f1_consistent = f1_score(labels, predictions, positive=1)
+    return {
+        "accuracy": correct / len(labels) if labels else 0.0,
+        "f1_contradict": f1_contradict,
+        "f1_macro": (f1_contradict + f1_consistent) / 2,
+    }
+
+
+def run_benchmark(train_path: str = run_kdsh.TRAIN_PATH) -> Dict:
+    """Runs the pipeline over train.csv from a cold start and returns the report."""
+    train_df = pd.read_csv(train_path)
+    SentimentAnalyzer().clear_cache()
+    SentimentAnalyzer().warm_up()
+    run_kdsh.get_annotated_novel.cache_clear()
+
+    # Reference speed before and after the run, averaged over any drift in host load
+    reference = reference_speed()
+    corpora = {}
+    labels, predictions = [], []
+    with recording() as recorder:
+        start = time.perf_counter()
+        for _, row in train_df.iterrows():
+            book_name, char = row["book_name"], row["char"]
+            if book_name not in corpora:
+                # 1. Annotate each novel once, as the batch runner does
+                corpus = AnnotatedNovel.build(run_kdsh.load_novel(book_name))
+                corpora[book_name] = run_kdsh.preload_character_states(book_name, corpus)
+            # 2. Per-row state lookup, backstory parsing and comparison
+            result = run_kdsh.analyze_single(None, row["content"], char, corpus=corpora[book_name])
+            predictions.append(result["prediction"])
+            labels.append(run_kdsh.LABEL_PREDICTIONS[row["label"]])
+        elapsed = time.perf_counter() - start
+
+    timings = recorder.report()
+    rows_per_second = len(labels) / elapsed if elapsed else 0.0
+    reference = (reference + reference_speed()) / 2
+    return {
+        "rows": len(labels),
+        "seconds": elapsed,
+        "rows_per_second": rows_per_second,
+        "reference_speed": reference,
+        "relative_throughput": rows_per_second / reference,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {name: timings.get(name, {"seconds": 0.0, "calls": 0}) for name in STAGES},
+        "counters": recorder.counters,
+        **quality_metrics(labels, predictions),
+    }
+
+
+def check_regressions(report: Dict, baseline: Dict) -> List[str]:
+    """
+    Descriptions of every gated metric that fell below baseline * (1 - tolerance);
+    accuracy-type metrics use an absolute tolerance instead. Metrics the
+    baseline lacks (e.g. raw rows/s in an old baseline) are not gated.
+    """
+    stored = baseline.get("tolerance", {})
+    tolerance = {metric: stored.get(metric, allowed) for metric, allowed in DEFAULT_TOLERANCE.items()}
+    failures = []
+    for metric, allowed in tolerance.items():
+        if metric not in baseline:
+            continue
+        expected = baseline[metric]
+        floor = expected * (1 - allowed) if metric in RELATIVE_METRICS else expected - allowed
+        if report[metric] < floor - 1e-9:
+            failures.append(f"{metric}: {report[metric]:.4f} < {floor:.4f} (baseline {expected:.4f})")
+    return failures
+
+
+def write_json(path: str, data: Dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def print_report(report: Dict):
+    print(f"rows: {report['rows']}  ({report['rows_per_second']:.1f} rows/s, "
+          f"{report['seconds']:.2f}s, peak RSS {report['peak_rss_mb']:.0f} MB)")
+    print(f"relative throughput: {report['relative_throughput']:.4f}  "
+          f"(reference workload {report['reference_speed']:.0f} rounds/s)")
+    print(f"accuracy: {report['accuracy']:.3f}  F1 contradict: {report['f1_contradict']:.3f}  "
+          f"F1 macro: {report['f1_macro']:.3f}")
+    for name, stage in report["stages"].items():
+        print(f"  {name:>9}: {stage['seconds']:8.3f}s  ({stage['calls']} calls)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="train.csv speed/accuracy benchmark")
+    parser.add_argument("--train", default=run_kdsh.TRAIN_PATH)
+    parser.add_argument("--report", default=REPORT_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store this run as the new baseline instead of gating on it")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.train)
+    print_report(report)
+    write_json(args.report, report)
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        previous = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                previous = json.load(f)
+        baseline = {metric: report[metric] for metric in DEFAULT_TOLERANCE}
+        baseline["tolerance"] = {**DEFAULT_TOLERANCE, **{
+            metric: allowed for metric, allowed in previous.get("tolerance", {}).items()
+            if metric in DEFAULT_TOLERANCE
+        }}
+        write_json(args.baseline, baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as f:
+        failures = check_regressions(report, json.load(f))
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
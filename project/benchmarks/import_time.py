@@ -0,0 +1,87 @@
+"""
+Cold-start latency: how long a fresh interpreter takes to import each entry
+point. Every sample is a new process, so nothing is cached in sys.modules;
+the figure is the cumulative import time reported by ``python -X importtime``.
+
+    python -m benchmarks.import_time                 # report and gate on budgets
+    python -m benchmarks.import_time --repeat 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+from benchmarks.harness import write_json
+
+
+# Entry point -> import budget in milliseconds
+BUDGETS_MS = {
+    "run_kdsh": 500.0,
+    "service": 500.0,
+    "narrative.corpus": 300.0,
+}
+
+# Modules that must not be imported by the entry points above
+HEAVY_MODULES = ["pathway", "pandas", "nltk"]
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT_PATH = os.path.join(PROJECT_DIR, "results", "import_time.json")
+
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of a module in a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True,
+    )
+    # The module's own line is the last "import time: self | cumulative | name" entry for it
+    for line in reversed(proc.stderr.splitlines()):
+        fields = [f.strip() for f in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def heavy_imports(module: str) -> List[str]:
+    """Which of HEAVY_MODULES importing a module pulls in."""
+    probe = (f"import sys, {module}; "
+             f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    proc = subprocess.run([sys.executable, "-c", probe], cwd=PROJECT_DIR,
+                          capture_output=True, text=True, check=True)
+    return [m for m in proc.stdout.strip().split(",") if m]
+
+
+def benchmark_imports(repeat: int = 5) -> Dict[str, Dict]:
+    return {
+        module: {
+            "median_ms": statistics.median(import_time_ms(module) for _ in range(repeat)),
+            "budget_ms": budget,
+            "heavy_imports": heavy_imports(module),
+        }
+        for module, budget in BUDGETS_MS.items()
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time (cold start) benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--report", default=REPORT_PATH)
+    args = parser.parse_args(argv)
+
+    report = benchmark_imports(args.repeat)
+    write_json(args.report, report)
+    failures = 0
+    for module, stats in report.items():
+        over = stats["median_ms"] > stats["budget_ms"] or stats["heavy_imports"]
+        failures += bool(over)
+        heavy = ", ".join(stats["heavy_imports"]) or "none"
+        print(f"{'REGRESSION ' if over else ''}{module}: {stats['median_ms']:.1f} ms "
+              f"(budget {stats['budget_ms']:.0f} ms, heavy imports: {heavy})")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
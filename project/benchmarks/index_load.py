@@ -0,0 +1,114 @@
+"""
+Load time and per-process memory of a saved paragraph index.
+
+The index of one novel is built once and saved, then N fresh processes open
+it at the same time and run a query mix that touches every posting list:
+
+    build  each process rebuilds the index from the annotated novel
+    read   each process reads the index file into private memory
+    mmap   each process maps the file read-only (pages shared via page cache)
+
+Per process we report the load time, RSS, and PSS (shared pages divided among
+the processes mapping them, from /proc/self/smaps_rollup on Linux).
+
+    python -m benchmarks.index_load
+    python -m benchmarks.index_load --processes 8 --book "In Search of the Castaways"
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import run_kdsh
+from evidence.engine import paragraph_index, paragraph_index_path
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("build", "read", "mmap")
+
+
+def memory_mb() -> Dict[str, float]:
+    """RSS and PSS of this process in MB (empty where /proc is unavailable)."""
+    usage = {}
+    for path, fields in (("/proc/self/status", {"VmRSS": "rss_mb"}),
+                         ("/proc/self/smaps_rollup", {"Pss": "pss_mb"})):
+        try:
+            with open(path) as f:
+                for line in f:
+                    name, _, value = line.partition(":")
+                    if name in fields:
+                        usage[fields[name]] = int(value.split()[0]) / 1024
+        except OSError:
+            pass
+    return usage
+
+
+def _touch_all(index) -> None:
+    """Scores every vocabulary term so all postings are paged in."""
+    terms = sorted(getattr(index, "term_ids", None) or index.postings)
+    for i in range(0, len(terms), 200):
+        index.search(" ".join(terms[i:i + 200]), top_k=10, scoring="bm25")
+
+
+def _child(mode: str, book: str, path: str) -> Dict[str, float]:
+    """One measured process: load the index its way, use it, report."""
+    import numpy  # noqa: F401  (imported up front so it is not counted as load time)
+    from pathway_pipeline.vector_store import PathwayVectorStore
+
+    corpus = run_kdsh.load_annotated_novel(book) if mode == "build" else None
+    before = memory_mb()
+    start = time.perf_counter()
+    if mode == "build":
+        index = paragraph_index(corpus)
+    else:
+        index = PathwayVectorStore.load(path, mmap=(mode == "mmap"))
+    load_seconds = time.perf_counter() - start
+    _touch_all(index)
+    after = memory_mb()
+    return {"load_ms": load_seconds * 1000,
+            **{f"{k}_delta": after[k] - before[k] for k in after}}
+
+
+def benchmark_index_load(book: str, processes: int = 4,
+                         cache_dir: str = run_kdsh.INDEX_DIR) -> Dict[str, Dict[str, float]]:
+    # 1. Save the index once (or reuse the saved one)
+    corpus = run_kdsh.load_annotated_novel(book)
+    paragraph_index(corpus, cache_dir)
+    path = paragraph_index_path(corpus, cache_dir)
+    report = {"file": {"size_mb": os.path.getsize(path) / 2 ** 20}}
+
+    # 2. Start all processes of a mode together, so mapped pages are shared while measured
+    for mode in MODES:
+        procs = [subprocess.Popen([sys.executable, "-m", "benchmarks.index_load",
+                                   "--child", mode, "--book", book, "--path", path],
+                                  cwd=PROJECT_DIR, stdout=subprocess.PIPE, text=True)
+                 for _ in range(processes)]
+        results: List[Dict[str, float]] = [json.loads(p.communicate()[0]) for p in procs]
+        report[mode] = {key: statistics.median(r[key] for r in results) for key in results[0]}
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Saved index load time and memory")
+    parser.add_argument("--book", default=run_kdsh.corpus_registry().titles()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(_child(args.child, args.book, args.path)))
+        return
+    report = benchmark_index_load(args.book, args.processes)
+    print(f"{args.book}: index file {report.pop('file')['size_mb']:.1f} MB, "
+          f"{args.processes} processes (medians)")
+    for mode, stats in report.items():
+        print(f"{mode:>6}: " + "  ".join(f"{k} {v:.1f}" for k, v in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
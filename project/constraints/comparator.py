@@ -2,10 +2,31 @@
 Compares constraints from story and backstory for compatibility.
 """
 
-from typing import Dict
+from typing import Dict, List, Sequence
 from constraints.schema import Constraint, CharacterState
 
 
+# Polarity codes of the batch API; 0 marks an absent constraint
+POLARITY_CODES = {"positive": 1, "negative": -1, "neutral": 2}
+
+
+def encode_states(states: Sequence[CharacterState], dimensions: Sequence[str]):
+    """
+    (rows x dimensions) polarity-code and strength arrays for a list of states.
+    """
+    import numpy as np
+
+    polarity = np.zeros((len(states), len(dimensions)), dtype=np.int8)
+    strength = np.zeros((len(states), len(dimensions)), dtype=np.float64)
+    columns = {dim: j for j, dim in enumerate(dimensions)}
+    for i, state in enumerate(states):
+        for dim, con in state.constraints.items():
+            if dim in columns:
+                polarity[i, columns[dim]] = POLARITY_CODES[con.polarity]
+                strength[i, columns[dim]] = con.strength
+    return polarity, strength
+
+
 class ConstraintComparator:
     def __init__(self):
         pass
@@ -76,4 +97,47 @@ class ConstraintComparator:
                 "explanation": "Backstory constraints are incompatible with accumulated story constraints, even though exact polarity matches were sparse."
             })
         
-        return {"prediction": prediction, "conflicts": conflicts, "decision_explanation": decision_explanation}
\ No newline at end of file
+        return {"prediction": prediction, "conflicts": conflicts, "decision_explanation": decision_explanation}
+
+    def compare_batch(self, story_polarity, story_strength, backstory_polarity, backstory_strength,
+                      thresholds: Sequence[float], require_high: bool = False):
+        """
+        Vectorized compare() over many rows and thresholds at once.
+
+        Takes (rows x dimensions) arrays from encode_states() and returns a
+        (thresholds x rows) array of predictions. With require_high=False this
+        is exactly compare(): any polarity mismatch on a shared dimension is a
+        contradiction, whatever the threshold. With require_high=True only
+        "high" severity conflicts (max strength >= threshold) count.
+        """
+        import numpy as np
+
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        mismatch = (story_polarity != 0) & (backstory_polarity != 0) & (story_polarity != backstory_polarity)
+        if require_high:
+            max_strength = np.maximum(story_strength, backstory_strength)
+            conflicts = mismatch[None] & (max_strength[None] >= thresholds[:, None, None])
+            contradict = conflicts.any(axis=2)
+        else:
+            contradict = np.broadcast_to(mismatch.any(axis=1), (len(thresholds), mismatch.shape[0]))
+        return np.where(contradict, 0, 1)
+
+    def threshold_sweep(self, story_states: Sequence[CharacterState],
+                        backstory_states: Sequence[CharacterState], labels: Sequence[int],
+                        thresholds: Sequence[float], dimensions: Sequence[str],
+                        require_high: bool = False) -> List[Dict]:
+        """
+        Accuracy against 0/1 labels for every threshold, from one batch call.
+        """
+        import numpy as np
+
+        story = encode_states(story_states, dimensions)
+        backstory = encode_states(backstory_states, dimensions)
+        predictions = self.compare_batch(*story, *backstory, thresholds, require_high=require_high)
+        labels = np.asarray(labels)
+        accuracy = (predictions == labels[None]).mean(axis=1)
+        return [
+            {"threshold": float(t), "accuracy": float(acc),
+             "contradictions": int((row == 0).sum())}
+            for t, acc, row in zip(thresholds, accuracy, predictions)
+        ]
@@ -3,7 +3,8 @@ Defines the core data structures for experiences,
 constraints, and character states.
 """
 
-from typing import Dict, List
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
 from dataclasses import dataclass
 
 
@@ -29,3 +30,73 @@ class Constraint:
 class CharacterState:
     constraints: Dict[str, Constraint]
     history: List[str]  # experience IDs
+
+
+@dataclass
+class Claim:
+    id: str
+    sentence: str
+    dimension: str
+    polarity: str
+
+
+class ExperienceTable:
+    """
+    Columnar store of experience sentences over one shared text buffer.
+
+    Row ``i`` is the experience with integer id ``i``. Its sentence is
+    ``text[starts[i]:ends[i]]``, its dimensions a bitmask over
+    ``dimension_names`` and its polarity the sentiment compound score (NaN when
+    the sentence was not scored). Experience objects are only built on demand
+    by experience().
+    """
+
+    def __init__(self, text: str, dimension_names: Sequence[str], negative_threshold: float,
+                 starts: array = None, ends: array = None,
+                 masks: array = None, compounds: array = None):
+        self.text = text
+        self.dimension_names = tuple(dimension_names)
+        self.negative_threshold = negative_threshold
+        self.starts = starts if starts is not None else array("Q")
+        self.ends = ends if ends is not None else array("Q")
+        self.masks = masks if masks is not None else array("H")
+        self.compounds = compounds if compounds is not None else array("d")
+        self._dimension_sets: Dict[int, Tuple[str, ...]] = {}
+
+    def __len__(self):
+        return len(self.starts)
+
+    def append(self, start: int, end: int, mask: int, compound: float = float("nan")):
+        self.starts.append(start)
+        self.ends.append(end)
+        self.masks.append(mask)
+        self.compounds.append(compound)
+
+    def sentence(self, row: int) -> str:
+        return self.text[self.starts[row]:self.ends[row]]
+
+    def decode(self, mask: int) -> Tuple[str, ...]:
+        """Dimension names set in a bitmask, in table order."""
+        dims = self._dimension_sets.get(mask)
+        if dims is None:
+            dims = tuple(d for i, d in enumerate(self.dimension_names) if mask & (1 << i))
+            self._dimension_sets[mask] = dims
+        return dims
+
+    def label(self, compound: float) -> Optional[str]:
+        """Polarity label of a compound score; None for unscored rows."""
+        if compound != compound:
+            return None
+        return 'negative' if compound <= self.negative_threshold else 'positive'
+
+    def dimensions(self, row: int) -> Tuple[str, ...]:
+        return self.decode(self.masks[row])
+
+    def polarity(self, row: int) -> Optional[str]:
+        return self.label(self.compounds[row])
+
+    def experience(self, row: int, chapter_id: int) -> Experience:
+        """Materializes one row as an Experience."""
+        sentence = self.sentence(row)
+        return Experience(id=str(row), chapter_id=chapter_id, event_type='general',
+                          involved_entities=[], outcome=sentence, raw_text_reference=sentence)
@@ -0,0 +1,118 @@
+"""
+Prefix index over a character's experiences for chunk-bounded state queries.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from constraints.schema import CharacterState, Constraint
+
+
+def _strength_steps() -> List[float]:
+    """Strength after 1, 2, ... experiences, folded exactly as StateAccumulator does."""
+    steps = [0.0, 0.1]
+    while steps[-1] < 1.0:
+        steps.append(min(1.0, steps[-1] + 0.1))
+    return steps
+
+
+_STRENGTHS = _strength_steps()
+
+
+def strength_after(count: int) -> float:
+    return _STRENGTHS[count] if count < len(_STRENGTHS) else 1.0
+
+
+class CharacterTimeline:
+    """
+    A character's experiences in novel order, indexed so that the state over
+    any range of chunks is answered without refolding.
+
+    Each experience is stored once with the chunk it came from. Per dimension,
+    the sorted experience positions and their polarities act as a prefix index:
+    two bisections give the count (hence strength) and last polarity of that
+    dimension in a range, so a summary costs O(dimensions * log n) and a full
+    CharacterState only adds the cost of copying its evidence ids.
+    """
+
+    def __init__(self, dimension_names: Sequence[str]):
+        self.dimension_names = tuple(dimension_names)
+        self.ids: List[str] = []
+        self.chunks = array("Q")
+        # dimension -> experience positions / polarity at each position
+        self._positions: Dict[str, array] = {d: array("Q") for d in self.dimension_names}
+        self._polarities: Dict[str, List[str]] = {d: [] for d in self.dimension_names}
+
+    @classmethod
+    def from_experiences(cls, dimension_names: Sequence[str],
+                         experiences: Iterable[Tuple[int, str, Iterable[str], Optional[str]]]) -> "CharacterTimeline":
+        """Builds a timeline from (chunk, experience_id, dimensions, polarity) in novel order."""
+        timeline = cls(dimension_names)
+        for chunk, experience_id, dimensions, polarity in experiences:
+            timeline.add(chunk, experience_id, dimensions, polarity)
+        return timeline
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, chunk: int, experience_id: str, dimensions: Iterable[str], polarity: Optional[str]):
+        """Appends one experience; chunks must be non-decreasing."""
+        if self.chunks and chunk < self.chunks[-1]:
+            raise ValueError("Experiences must be added in chunk order")
+        position = len(self.ids)
+        self.ids.append(experience_id)
+        self.chunks.append(chunk)
+        for dim in dimensions:
+            self._positions[dim].append(position)
+            self._polarities[dim].append(polarity)
+
+    def _bounds(self, start_chunk: int, end_chunk: Optional[int]) -> Tuple[int, int]:
+        lo = bisect_left(self.chunks, start_chunk)
+        hi = len(self.ids) if end_chunk is None else bisect_left(self.chunks, end_chunk)
+        return lo, max(lo, hi)
+
+    def _dimension_ranges(self, lo: int, hi: int) -> List[Tuple[int, str, int, int]]:
+        """(first position, dimension, i, j) for dimensions present in [lo, hi), in fold order."""
+        ranges = []
+        for order, dim in enumerate(self.dimension_names):
+            positions = self._positions[dim]
+            i = bisect_left(positions, lo)
+            j = bisect_left(positions, hi)
+            if i < j:
+                ranges.append(((positions[i], order), dim, i, j))
+        # A fold inserts dimensions by first occurrence, ties in table order
+        ranges.sort()
+        return [(first, dim, i, j) for (first, _), dim, i, j in ranges]
+
+    def summary(self, start_chunk: int = 0, end_chunk: Optional[int] = None) -> Dict[str, Tuple[str, float, int]]:
+        """
+        {dimension: (polarity, strength, evidence count)} over chunks in
+        [start_chunk, end_chunk), without materializing evidence ids.
+        """
+        lo, hi = self._bounds(start_chunk, end_chunk)
+        return {
+            dim: (self._polarities[dim][j - 1], strength_after(j - i), j - i)
+            for _, dim, i, j in self._dimension_ranges(lo, hi)
+        }
+
+    def state(self, start_chunk: int = 0, end_chunk: Optional[int] = None) -> CharacterState:
+        """
+        The CharacterState a fold over the experiences in chunks
+        [start_chunk, end_chunk) would produce.
+        """
+        lo, hi = self._bounds(start_chunk, end_chunk)
+        constraints = {}
+        for _, dim, i, j in self._dimension_ranges(lo, hi):
+            positions = self._positions[dim]
+            constraints[dim] = Constraint(
+                dimension=dim,
+                polarity=self._polarities[dim][j - 1],
+                strength=strength_after(j - i),
+                evidence_ids=[self.ids[p] for p in positions[i:j]],
+            )
+        return CharacterState(constraints=constraints, history=self.ids[lo:hi])
+
+    def state_until(self, chunk: int) -> CharacterState:
+        """State from the start of the novel up to (excluding) a chunk."""
+        return self.state(0, chunk)
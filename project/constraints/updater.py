@@ -3,11 +3,55 @@ Handles incremental updates to character constraints based on new experiences.
 """
 
 from constraints.schema import CharacterState, Experience, Constraint
-from typing import List
+from itertools import groupby
+from operator import attrgetter
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 
+from narrative.keyword_matcher import KeywordMatcher
 from narrative.sentiment import SentimentAnalyzer
 
+class StateAccumulator:
+    """
+    Mutable running CharacterState. Each experience is appended in place in
+    O(1), and the immutable CharacterState is only materialized on demand by
+    to_state(). Produces exactly the state that repeated
+    ConstraintUpdater.apply_dimensions calls would.
+    """
+
+    def __init__(self, state: Optional[CharacterState] = None):
+        self.history: List[str] = []
+        # dimension -> [polarity, strength, evidence_ids]
+        self._constraints = {}
+        if state is not None:
+            self.history.extend(state.history)
+            for dim, con in state.constraints.items():
+                self._constraints[dim] = [con.polarity, con.strength, list(con.evidence_ids)]
+
+    def add(self, experience_id: str, dimensions: Iterable[str], polarity: str):
+        """Folds one experience with pre-computed dimensions and polarity."""
+        self.history.append(experience_id)
+        constraints = self._constraints
+        for dim in dimensions:
+            entry = constraints.get(dim)
+            if entry is None:
+                constraints[dim] = [polarity, 0.1, [experience_id]]
+            else:
+                # Last polarity wins; strength grows by 0.1 up to 1.0
+                entry[0] = polarity
+                entry[1] = min(1.0, entry[1] + 0.1)
+                entry[2].append(experience_id)
+
+    def to_state(self) -> CharacterState:
+        """Materializes an independent CharacterState snapshot."""
+        constraints = {
+            dim: Constraint(dimension=dim, polarity=polarity, strength=strength,
+                            evidence_ids=list(evidence_ids))
+            for dim, (polarity, strength, evidence_ids) in self._constraints.items()
+        }
+        return CharacterState(constraints=constraints, history=list(self.history))
+
+
 class ConstraintUpdater:
     def __init__(self):
         # Dimension keywords
@@ -19,40 +63,84 @@ class ConstraintUpdater:
             "loyalty": ["loyal", "betray", "abandon", "protect", "defend", "sacrifice"],
             "morality": ["right", "wrong", "evil", "good", "dark", "innocent", "guilt"]
         }
+        self.matcher = KeywordMatcher.compile(self.dimension_keywords)
         self.sentiment = SentimentAnalyzer()
 
-    def update_state(self, experience: Experience, state: CharacterState) -> CharacterState:
+    def detect_dimensions(self, text: str) -> List[str]:
         """
-        Updates the character state by detecting dimensions and polarities from text.
+        Returns the dimensions whose keywords appear in the text, in table order.
+        """
+        return list(self.matcher.match(text))
+
+    def apply_dimensions(self, experience_id: str, dimensions: List[str], polarity: str,
+                         state: CharacterState) -> CharacterState:
+        """
+        Folds one experience with pre-computed dimensions and polarity into the state.
         """
         # Append experience ID to history
-        new_history = state.history + [experience.id]
+        new_history = state.history + [experience_id]
         
         # Update constraints
         new_constraints = state.constraints.copy()
-        text_lower = experience.raw_text_reference.lower()
-        
-        # Detect dimensions
-        for dim, keywords in self.dimension_keywords.items():
-            if any(kw in text_lower for kw in keywords):
-                # Detect polarity using VADER
-                polarity = self.sentiment.get_polarity(experience.raw_text_reference)
-                
-                if dim in new_constraints:
-                    # Increase strength
-                    new_constraints[dim] = Constraint(
-                        dimension=dim,
-                        polarity=polarity,
-                        strength=min(1.0, new_constraints[dim].strength + 0.1),
-                        evidence_ids=new_constraints[dim].evidence_ids + [experience.id]
-                    )
-                else:
-                    # Create new
-                    new_constraints[dim] = Constraint(
-                        dimension=dim,
-                        polarity=polarity,
-                        strength=0.1,
-                        evidence_ids=[experience.id]
-                    )
+        for dim in dimensions:
+            if dim in new_constraints:
+                # Increase strength
+                new_constraints[dim] = Constraint(
+                    dimension=dim,
+                    polarity=polarity,
+                    strength=min(1.0, new_constraints[dim].strength + 0.1),
+                    evidence_ids=new_constraints[dim].evidence_ids + [experience_id]
+                )
+            else:
+                # Create new
+                new_constraints[dim] = Constraint(
+                    dimension=dim,
+                    polarity=polarity,
+                    strength=0.1,
+                    evidence_ids=[experience_id]
+                )
         
-        return CharacterState(constraints=new_constraints, history=new_history)
\ No newline at end of file
+        return CharacterState(constraints=new_constraints, history=new_history)
+
+    def update_state(self, experience: Experience, state: CharacterState) -> CharacterState:
+        """
+        Updates the character state by detecting dimensions and polarities from text.
+        """
+        dimensions = self.detect_dimensions(experience.raw_text_reference)
+        # Detect polarity using VADER
+        polarity = self.sentiment.get_polarity(experience.raw_text_reference) if dimensions else None
+        return self.apply_dimensions(experience.id, dimensions, polarity, state)
+    
+    def update_many(self, experiences: Iterable[Experience],
+                    state: Optional[CharacterState] = None) -> CharacterState:
+        """
+        Folds many experiences at once. Equivalent to chaining update_state, but
+        appends in place and scores all polarities in one batch.
+        """
+        accumulator = StateAccumulator(state)
+        self.fold(accumulator, experiences)
+        return accumulator.to_state()
+
+    def fold(self, accumulator: StateAccumulator, experiences: Iterable[Experience]):
+        """
+        Folds experiences into a running accumulator, scoring all their
+        polarities in one batch.
+        """
+        experiences = list(experiences)
+        dimensions = [self.detect_dimensions(e.raw_text_reference) for e in experiences]
+        scored = [e.raw_text_reference for e, dims in zip(experiences, dimensions) if dims]
+        polarities = iter(self.sentiment.get_polarities(scored))
+        for experience, dims in zip(experiences, dimensions):
+            accumulator.add(experience.id, dims, next(polarities) if dims else None)
+
+    def iter_states(self, experiences: Iterable[Experience],
+                    state: Optional[CharacterState] = None) -> Iterator[Tuple[int, StateAccumulator]]:
+        """
+        Lazily folds a stream of experiences chapter by chapter, yielding
+        (chapter_id, accumulator) after each chapter. The accumulator is the live
+        running state; call to_state() on it for a snapshot.
+        """
+        accumulator = StateAccumulator(state)
+        for chapter_id, chapter in groupby(experiences, key=attrgetter('chapter_id')):
+            self.fold(accumulator, chapter)
+            yield chapter_id, accumulator
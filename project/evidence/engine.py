@@ -0,0 +1,186 @@
+"""
+Claim-level evidence retrieval over an annotated novel.
+
+Instead of judging a backstory against the character's whole-novel state,
+each backstory claim retrieves the few paragraphs that best support or refute
+it, and only the experiences of those paragraphs are scored:
+
+    1. Candidates: paragraphs mentioning the character that hold at least one
+       experience of the claim's dimension, capped at ``candidate_budget``
+       (those with the most such experiences are kept).
+    2. Retrieval: BM25 of the claim sentence over the candidates only, via
+       PathwayVectorStore.search_within; the top ``top_k`` are the evidence.
+    3. Scoring: the claim-dimension experiences of the evidence paragraphs are
+       folded into a CharacterState and compared with the claims as usual.
+
+The paragraph index is built once per novel (or memory-mapped from an index
+file saved by an earlier run, see paragraph_index) and claim -> passage results
+are cached per (claim, character), so rows sharing claims retrieve them once.
+"""
+
+import hashlib
+import heapq
+import os
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+from backstory.parser import BackstoryParser
+from constraints.comparator import ConstraintComparator
+from constraints.schema import CharacterState, Claim
+from constraints.updater import StateAccumulator
+from narrative.corpus import AnnotatedNovel
+from pathway_pipeline.index_file import INDEX_VERSION
+from pathway_pipeline.vector_store import PathwayVectorStore
+
+
+def paragraph_index_path(corpus: AnnotatedNovel, cache_dir: str,
+                         index: PathwayVectorStore = None) -> str:
+    """
+    Index file of the corpus paragraphs, keyed by text, paragraph spans and
+    the index settings (BM25 parameters, tokenizer) of `index`.
+    """
+    index = index or PathwayVectorStore()
+    digest = hashlib.sha256(corpus.text.encode("utf-8"))
+    digest.update(array("Q", corpus.paragraph_starts).tobytes())
+    digest.update(array("Q", corpus.paragraph_ends).tobytes())
+    name = f"{digest.hexdigest()[:24]}-{index.config_fingerprint()}-v{INDEX_VERSION}.kdvi"
+    return os.path.join(cache_dir, name)
+
+
+def paragraph_index(corpus: AnnotatedNovel, cache_dir: str = None,
+                    k1: float = 1.5, b: float = 0.75):
+    """
+    A search index over the corpus paragraphs (doc ids "0", "1", ...).
+    With cache_dir it is saved there on first use and memory-mapped read-only
+    afterwards, so every process shares one copy. An unreadable file
+    (truncated, corrupt, older version) is rebuilt and rewritten.
+    """
+    index = PathwayVectorStore(k1=k1, b=b)
+    path = paragraph_index_path(corpus, cache_dir, index) if cache_dir else None
+    if path and os.path.exists(path):
+        try:
+            return PathwayVectorStore.load(path)
+        except (ValueError, OSError, KeyError, struct.error):
+            pass
+
+    index.index_documents(corpus.paragraphs, [str(p) for p in range(len(corpus))])
+    index.prepare()
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        index.save(path)
+    return index
+
+
+@dataclass
+class ClaimEvidence:
+    claim: Claim
+    passages: List[int]  # paragraph indices, best match first
+    rows: List[int]  # claim-dimension experience rows of those paragraphs, novel order
+
+    @property
+    def passage_ids(self) -> List[str]:
+        return [f"p{p}" for p in self.passages]
+
+
+class EvidenceEngine:
+    """Retrieves and scores per-claim evidence from one annotated novel."""
+
+    def __init__(self, corpus: AnnotatedNovel, top_k: int = 3, candidate_budget: int = 200,
+                 scoring: str = "bm25", index=None):
+        self.corpus = corpus
+        self.top_k = top_k
+        self.candidate_budget = candidate_budget
+        self.scoring = scoring
+        self.index = index if index is not None else paragraph_index(corpus)
+        self._cache: Dict[Tuple[str, str, str, Tuple[str, ...]], ClaimEvidence] = {}
+
+    def nbytes(self) -> int:
+        """Approximate memory of the paragraph index and the claim cache."""
+        return self.index.nbytes() + sys.getsizeof(self._cache)
+
+    def _dimension_bit(self, dimension: str) -> int:
+        names = self.corpus.table.dimension_names
+        return 1 << names.index(dimension) if dimension in names else 0
+
+    def candidates(self, dimension: str, character_name: str = "",
+                   aliases: Iterable[str] = ()) -> List[int]:
+        """
+        Paragraphs mentioning the character with experiences of the dimension,
+        at most candidate_budget of them, in novel order.
+        """
+        bit = self._dimension_bit(dimension)
+        masks, offsets = self.corpus.table.masks, self.corpus.paragraph_offsets
+        counts = {}
+        for p in self.corpus.select_paragraphs(character_name, aliases):
+            n = sum(1 for row in range(offsets[p], offsets[p + 1]) if masks[row] & bit)
+            if n:
+                counts[p] = n
+        if len(counts) <= self.candidate_budget:
+            return list(counts)
+        best = heapq.nlargest(self.candidate_budget, counts.items(), key=lambda x: (x[1], -x[0]))
+        return sorted(p for p, _ in best)
+
+    def retrieve(self, claim: Claim, character_name: str = "",
+                 aliases: Iterable[str] = ()) -> ClaimEvidence:
+        """The top-k evidence paragraphs of one claim (cached)."""
+        aliases = tuple(aliases)
+        key = (claim.sentence, claim.dimension, character_name, aliases)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return ClaimEvidence(claim, cached.passages, cached.rows)
+
+        candidates = self.candidates(claim.dimension, character_name, aliases)
+        hits = self.index.search_within(claim.sentence, candidates, self.top_k, self.scoring)
+        passages = [int(doc_id) for doc_id, _, _ in hits]
+
+        bit = self._dimension_bit(claim.dimension)
+        masks, offsets = self.corpus.table.masks, self.corpus.paragraph_offsets
+        rows = [
+            row
+            for p in sorted(passages)
+            for row in range(offsets[p], offsets[p + 1])
+            if masks[row] & bit
+        ]
+        evidence = self._cache[key] = ClaimEvidence(claim, passages, rows)
+        return evidence
+
+    def evidence_state(self, evidence: List[ClaimEvidence]) -> CharacterState:
+        """
+        Folds the retrieved experiences into a CharacterState, each row
+        contributing only the dimensions of the claims that retrieved it.
+        """
+        row_dimensions: Dict[int, set] = {}
+        for item in evidence:
+            for row in item.rows:
+                row_dimensions.setdefault(row, set()).add(item.claim.dimension)
+
+        table = self.corpus.table
+        accumulator = StateAccumulator()
+        for row in sorted(row_dimensions):
+            dims = [d for d in table.dimension_names if d in row_dimensions[row]]
+            accumulator.add(str(row), dims, table.polarity(row))
+        return accumulator.to_state()
+
+    def analyze(self, backstory_text: str, character_name: str = "", aliases: Iterable[str] = (),
+                parser: BackstoryParser = None, threshold: float = 0.5) -> Dict:
+        """
+        Compares the backstory claims with their retrieved evidence.
+        Returns the comparator result plus the per-claim evidence.
+        """
+        parser = parser or BackstoryParser()
+        claims = parser.parse_claims(backstory_text)
+        evidence = [self.retrieve(claim, character_name, aliases) for claim in claims]
+        result = ConstraintComparator().compare(
+            self.evidence_state(evidence), parser.fold_claims(claims), threshold=threshold)
+        result["evidence"] = evidence
+        return result
+
+
+def format_evidence(evidence: List[ClaimEvidence]) -> str:
+    """'claim_id -> p12, p40; ...' for the rationale."""
+    return "; ".join(
+        f"{item.claim.id} -> {', '.join(item.passage_ids) or 'none'}" for item in evidence
+    )
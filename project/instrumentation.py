@@ -0,0 +1,151 @@
+"""
+Stage timing, counters and tracing for the pipeline.
+
+Code wraps each stage in ``with stage("name"):`` and reports work done with
+``count("name", n)``. Nothing is recorded unless a Recorder is active, and the
+disabled path is a single global lookup (returning a shared no-op context
+manager for stages), so hooks can stay in hot code. Counters are bumped once
+per batch, not once per item.
+
+A Recorder created with ``trace=True`` also keeps every stage occurrence, and
+write_trace() exports them as JSON or CSV. profiling() wraps a block in
+cProfile and dumps the stats for pstats/snakeviz.
+"""
+
+import cProfile
+import csv
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, recorder: "Recorder", name: str):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add_time(self.name, time.perf_counter() - self.start, self.start)
+        return False
+
+
+class Recorder:
+    """Accumulated wall time and call count per stage, plus named counters."""
+
+    def __init__(self, trace: bool = False):
+        self.timings: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        self.trace = trace
+        self.origin = time.perf_counter()
+        # (stage, start offset in seconds, duration in seconds) when tracing
+        self.events: List[Tuple[str, float, float]] = []
+
+    def add_time(self, name: str, seconds: float, start: float = None):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.trace:
+            start = time.perf_counter() - seconds if start is None else start
+            self.events.append((name, start - self.origin, seconds))
+
+    def add_count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {"seconds": self.timings[name], "calls": self.calls[name]}
+            for name in self.timings
+        }
+
+    def write_trace(self, path: str):
+        """
+        Writes stages, counters and (when tracing) events. A ``.csv`` path gets
+        one row per event followed by one row per stage total and counter;
+        anything else is written as JSON.
+        """
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["kind", "name", "start", "seconds", "value"])
+                for name, start, seconds in self.events:
+                    writer.writerow(["event", name, f"{start:.6f}", f"{seconds:.6f}", ""])
+                for name, stats in self.report().items():
+                    writer.writerow(["stage", name, "", f"{stats['seconds']:.6f}", stats["calls"]])
+                for name, value in self.counters.items():
+                    writer.writerow(["counter", name, "", "", value])
+        else:
+            with open(path, "w") as f:
+                json.dump({
+                    "stages": self.report(),
+                    "counters": self.counters,
+                    "events": [
+                        {"name": name, "start": start, "seconds": seconds}
+                        for name, start, seconds in self.events
+                    ],
+                }, f, indent=2)
+                f.write("\n")
+
+    def print_summary(self):
+        for name, stats in self.report().items():
+            print(f"  {name:>20}: {stats['seconds']:8.3f}s  ({stats['calls']} calls)")
+        for name, value in self.counters.items():
+            print(f"  {name:>20}: {value}")
+
+
+_active: Optional[Recorder] = None
+
+
+def stage(name: str):
+    """Context manager timing one stage into the active recorder, if any."""
+    if _active is None:
+        return _NULL_STAGE
+    return _Stage(_active, name)
+
+
+def count(name: str, n: int = 1):
+    """Adds n to a counter of the active recorder, if any."""
+    if _active is not None:
+        _active.add_count(name, n)
+
+
+@contextmanager
+def recording(recorder: Recorder = None):
+    """Activates a recorder for the duration of the block."""
+    global _active
+    recorder = recorder or Recorder()
+    previous, _active = _active, recorder
+    try:
+        yield recorder
+    finally:
+        _active = previous
+
+
+@contextmanager
+def profiling(path: Optional[str]):
+    """Runs the block under cProfile and dumps the stats to path (no-op if None)."""
+    if path is None:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
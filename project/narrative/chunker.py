@@ -2,9 +2,10 @@
 Handles chronological chunking of the novel.
 """
 
-from typing import List
-import pathway as pw
-import pandas as pd
+from array import array
+from typing import Iterator, List, TextIO, Tuple, Union
+
+from narrative.segmenter import paragraph_spans
 
 
 class NarrativeChunker:
@@ -18,4 +19,37 @@ class NarrativeChunker:
         """
         # Simple chunking by paragraphs
         chunks = [chunk.strip() for chunk in novel_text.split('\n\n') if chunk.strip()]
-        return chunks
\ No newline at end of file
+        return chunks
+
+    def chunk_spans(self, novel_text: str) -> Tuple[array, array]:
+        """
+        (start, end) offset arrays into novel_text of the chunks chunk_novel
+        returns.
+        """
+        return paragraph_spans(novel_text)
+
+    def iter_chunks(self, source: Union[str, TextIO], block_size: int = 1 << 16) -> Iterator[str]:
+        """
+        Lazily yields the chunks chunk_novel returns, from a string or from a
+        text file handle read one block at a time.
+        """
+        if isinstance(source, str):
+            for start, end in zip(*paragraph_spans(source)):
+                yield source[start:end]
+            return
+
+        pending = ""
+        while True:
+            block = source.read(block_size)
+            if not block:
+                break
+            pieces = (pending + block).split('\n\n')
+            # The last piece may continue in the next block
+            pending = pieces.pop()
+            for chunk in pieces:
+                chunk = chunk.strip()
+                if chunk:
+                    yield chunk
+        pending = pending.strip()
+        if pending:
+            yield pending
@@ -0,0 +1,224 @@
+"""
+Per-novel annotated corpus shared across backstory rows.
+
+A novel is chunked, sentence-split, keyword-matched and scored with VADER
+exactly once. Each test row then only selects the paragraphs mentioning its
+character and folds the pre-computed annotations into a CharacterState.
+"""
+
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from constraints.schema import CharacterState, Experience, ExperienceTable
+from constraints.timeline import CharacterTimeline
+from constraints.updater import ConstraintUpdater, StateAccumulator
+from instrumentation import count, stage
+from narrative.chunker import NarrativeChunker
+from narrative.experience_detector import ExperienceDetector
+from narrative.keyword_matcher import KeywordMatcher
+from narrative.mentions import MentionIndex
+from narrative.segmenter import Segments
+
+
+class AnnotatedNovel:
+    """
+    Paragraphs of one novel with their experience sentences pre-annotated.
+
+    Paragraphs and experience sentences are (start, end) offsets into the novel
+    text; the experiences live in one ExperienceTable, and those of paragraph
+    ``p`` are rows ``range(paragraph_offsets[p], paragraph_offsets[p + 1])``.
+    """
+
+    def __init__(self, text: str, paragraph_starts: array, paragraph_ends: array,
+                 paragraph_offsets: array, table: ExperienceTable):
+        self.text = text
+        self.paragraph_starts = paragraph_starts
+        self.paragraph_ends = paragraph_ends
+        self.paragraph_offsets = paragraph_offsets
+        self.table = table
+        self.mentions = MentionIndex.from_spans(text, paragraph_starts, paragraph_ends)
+        # (name, aliases) -> CharacterState built by character_states()
+        self._states: Dict[Tuple[str, Tuple[str, ...]], CharacterState] = {}
+        # EvidenceEngine attached by the batch runner, kept (and sized) with the novel
+        self.evidence_engine = None
+
+    @classmethod
+    def build(cls, novel_text: str, chunker: NarrativeChunker = None,
+              detector: ExperienceDetector = None,
+              updater: ConstraintUpdater = None) -> "AnnotatedNovel":
+        """
+        Runs the chunk -> detect -> dimension/polarity annotation pass once.
+        """
+        chunker = chunker or NarrativeChunker()
+        detector = detector or ExperienceDetector()
+        updater = updater or ConstraintUpdater()
+
+        # One keyword scan per sentence serves both the detector and the updater
+        matcher = KeywordMatcher.compile(detector.dimension_keywords, updater.dimension_keywords)
+        detector_bits = (1 << len(detector.dimension_keywords)) - 1
+        updater_shift = len(detector.dimension_keywords)
+
+        table = ExperienceTable(novel_text, updater.dimension_keywords,
+                                updater.sentiment.NEGATIVE_THRESHOLD)
+        with stage("chunk"):
+            paragraph_starts, paragraph_ends = chunker.chunk_spans(novel_text)
+        paragraph_offsets = array("Q", [0])
+
+        with stage("detect"):
+            sentences = 0
+            for p_start, p_end in zip(paragraph_starts, paragraph_ends):
+                spans = detector.sentence_spans(novel_text, p_start, p_end)
+                sentences += len(spans)
+                for start, end in spans:
+                    mask = matcher.scan(novel_text[start:end])
+                    if mask & detector_bits:
+                        table.append(start, end, mask >> updater_shift)
+                paragraph_offsets.append(len(table))
+        count("paragraphs", len(paragraph_starts))
+        count("sentences_scanned", sentences)
+        count("experiences", len(table))
+
+        # Polarity is only consulted when a constraint dimension matched
+        with stage("sentiment"):
+            scored = [row for row, mask in enumerate(table.masks) if mask]
+            compounds = updater.sentiment.get_compounds([table.sentence(row) for row in scored])
+            for row, compound in zip(scored, compounds):
+                table.compounds[row] = compound
+
+        return cls(novel_text, paragraph_starts, paragraph_ends, paragraph_offsets, table)
+
+    def __len__(self):
+        return len(self.paragraph_starts)
+
+    def nbytes(self) -> int:
+        """
+        Approximate memory held by the novel: the text, its lowercased copy in
+        the mention index, the paragraph and experience columns, the cached
+        character states and the attached evidence engine with its index.
+        """
+        columns = [self.paragraph_starts, self.paragraph_ends, self.paragraph_offsets,
+                   self.table.starts, self.table.ends, self.table.masks, self.table.compounds]
+        size = 2 * sys.getsizeof(self.text) + sum(len(c) * c.itemsize for c in columns)
+        for state in self._states.values():
+            size += sys.getsizeof(state.history) + sum(map(sys.getsizeof, state.history))
+            size += sum(sys.getsizeof(c.evidence_ids) for c in state.constraints.values())
+        if self.evidence_engine is not None:
+            size += self.evidence_engine.nbytes()
+        return size
+
+    def paragraph(self, p: int) -> str:
+        return self.text[self.paragraph_starts[p]:self.paragraph_ends[p]]
+
+    @property
+    def paragraphs(self) -> Segments:
+        return Segments(self.text, self.paragraph_starts, self.paragraph_ends)
+
+    def select_paragraphs(self, character_name: str = "", aliases: Iterable[str] = ()) -> List[int]:
+        """
+        Indices of paragraphs mentioning the character or one of its aliases
+        (all paragraphs if no name).
+        """
+        return self.mentions.units(character_name, aliases)
+
+    def select_sentences(self, character_name: str, aliases: Iterable[str] = ()) -> List[int]:
+        """
+        Rows of ``table`` whose experience sentences themselves mention the
+        character or one of its aliases.
+        """
+        needles = [n.lower() for n in [character_name, *aliases]]
+        return [
+            row
+            for row, _ in self.iter_rows(self.select_paragraphs(character_name, aliases))
+            if any(n in self.table.sentence(row).lower() for n in needles)
+        ]
+
+    def iter_rows(self, paragraph_indices: List[int]) -> Iterator[Tuple[int, int]]:
+        """
+        Yields (row, chapter_id) for the experiences of the selected paragraphs,
+        numbering chapters as the per-row pipeline does.
+        """
+        offsets = self.paragraph_offsets
+        for i, p in enumerate(paragraph_indices):
+            chapter_id = i + 1  # Assume chunks are chapters
+            for row in range(offsets[p], offsets[p + 1]):
+                yield row, chapter_id
+
+    def experiences(self, paragraph_indices: List[int]) -> List[Experience]:
+        """
+        Materializes Experience objects for the selected paragraphs.
+        """
+        return [self.table.experience(row, chapter_id)
+                for row, chapter_id in self.iter_rows(paragraph_indices)]
+
+    def character_state(self, character_name: str = "",
+                        aliases: Iterable[str] = ()) -> CharacterState:
+        """
+        Folds the pre-annotated experiences of a character into a CharacterState.
+        Experience ids are the table rows. States precomputed by
+        character_states() are returned as is.
+        """
+        aliases = tuple(aliases)
+        cached = self._states.get((character_name, aliases))
+        if cached is not None:
+            return cached
+        with stage("select"):
+            selected = self.select_paragraphs(character_name, aliases)
+        count("paragraphs_selected", len(selected))
+        accumulator = StateAccumulator()
+        table = self.table
+        masks, compounds = table.masks, table.compounds
+        offsets = self.paragraph_offsets
+        for p in selected:
+            for row in range(offsets[p], offsets[p + 1]):
+                accumulator.add(str(row), table.decode(masks[row]), table.label(compounds[row]))
+        return accumulator.to_state()
+
+    def character_states(self, characters: Dict[str, Iterable[str]]) -> Dict[str, CharacterState]:
+        """
+        States of many characters ({name: aliases}) from a single walk over the
+        novel: each experience is decoded once and folded into the state of
+        every character its paragraph mentions. The states are kept, so later
+        character_state() calls for these characters are dictionary lookups.
+        """
+        characters = {name: tuple(aliases) for name, aliases in characters.items()}
+        accumulators = {name: StateAccumulator() for name in characters}
+
+        # 1. Which characters each paragraph mentions
+        mentioned: Dict[int, List[StateAccumulator]] = {}
+        with stage("select"):
+            for name, aliases in characters.items():
+                for p in self.select_paragraphs(name, aliases):
+                    mentioned.setdefault(p, []).append(accumulators[name])
+        count("paragraphs_selected", sum(len(targets) for targets in mentioned.values()))
+
+        # 2. One pass over the paragraphs in novel order
+        table = self.table
+        masks, compounds = table.masks, table.compounds
+        offsets = self.paragraph_offsets
+        for p in sorted(mentioned):
+            targets = mentioned[p]
+            for row in range(offsets[p], offsets[p + 1]):
+                exp_id, dims, polarity = str(row), table.decode(masks[row]), table.label(compounds[row])
+                for accumulator in targets:
+                    accumulator.add(exp_id, dims, polarity)
+
+        states = {name: accumulators[name].to_state() for name in characters}
+        for name, aliases in characters.items():
+            self._states[(name, aliases)] = states[name]
+        return states
+
+    def character_timeline(self, character_name: str = "",
+                           aliases: Iterable[str] = ()) -> CharacterTimeline:
+        """
+        Prefix index over the character's experiences, answering "state up to
+        chunk N" or "state between chunks A and B" without refolding. Chunks are
+        paragraph indices of the novel.
+        """
+        table = self.table
+        offsets = self.paragraph_offsets
+        timeline = CharacterTimeline(table.dimension_names)
+        for p in self.select_paragraphs(character_name, aliases):
+            for row in range(offsets[p], offsets[p + 1]):
+                timeline.add(p, str(row), table.dimensions(row), table.polarity(row))
+        return timeline
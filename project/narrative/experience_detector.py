@@ -3,7 +3,10 @@ Detects meaningful experiences from narrative chunks.
 """
 
 from constraints.schema import Experience
-from typing import List
+from instrumentation import count
+from narrative.keyword_matcher import KeywordMatcher
+from narrative.segmenter import sentence_spans
+from typing import Iterable, Iterator, List, Tuple
 import re
 import hashlib
 
@@ -19,6 +22,33 @@ class ExperienceDetector:
             "loyalty": ["loyal", "betray", "abandon", "protect", "defend", "sacrifice", "devoted", "faithful"],
             "morality": ["right", "wrong", "evil", "good", "dark", "light", "innocent", "guilt", "justice", "fair"]
         }
+        self.matcher = KeywordMatcher.compile(self.dimension_keywords)
+
+    def split_sentences(self, text_chunk: str) -> List[str]:
+        """
+        Splits a chunk into stripped, non-empty sentences.
+        """
+        # Simple sentence splitting by periods
+        sentences = re.split(r'(?<=[.!?])\s+', text_chunk.strip())
+        return [s.strip() for s in sentences if s.strip()]
+
+    def sentence_spans(self, text: str, start: int = 0, end: int = None) -> List[Tuple[int, int]]:
+        """
+        (start, end) offsets into text of the sentences split_sentences returns
+        for text[start:end], without slicing the chunk.
+        """
+        return sentence_spans(text, start, end)
+
+    def is_experience(self, sentence: str) -> bool:
+        """
+        Returns True if the sentence mentions any dimension keyword.
+        """
+        return self.matcher.scan(sentence) != 0
+
+    @staticmethod
+    def experience_id(chapter_id: int, sentence: str) -> str:
+        """Stable experience ID derived from chapter and sentence."""
+        return hashlib.md5(f"{chapter_id}_{sentence}".encode()).hexdigest()[:8]
 
     def extract_experiences(self, text_chunk: str, chapter_id: int) -> List[Experience]:
         """
@@ -26,38 +56,34 @@ class ExperienceDetector:
         Splits into sentences, matches keywords, creates Experience objects.
         """
         experiences = []
-        # Simple sentence splitting by periods
-        sentences = re.split(r'(?<=[.!?])\s+', text_chunk.strip())
-        
+        sentences = self.split_sentences(text_chunk)
         for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-            lower_sent = sentence.lower()
-            # Check for any dimension keywords
-            for dim, keywords in self.dimension_keywords.items():
-                if any(kw in lower_sent for kw in keywords):
-                    # Generate stable ID
-                    id_str = hashlib.md5(f"{chapter_id}_{sentence}".encode()).hexdigest()[:8]
-                    experience = Experience(
-                        id=id_str,
-                        chapter_id=chapter_id,
-                        event_type='general',  # Generic
-                        involved_entities=[],  # TODO: Extract entities later
-                        outcome=sentence,  # Simplified
-                        raw_text_reference=sentence
-                    )
-                    experiences.append(experience)
-                    break  # One per sentence
+            # Check for any dimension keywords (one experience per sentence)
+            if self.is_experience(sentence):
+                experience = Experience(
+                    id=self.experience_id(chapter_id, sentence),
+                    chapter_id=chapter_id,
+                    event_type='general',  # Generic
+                    involved_entities=[],  # TODO: Extract entities later
+                    outcome=sentence,  # Simplified
+                    raw_text_reference=sentence
+                )
+                experiences.append(experience)
         
+        count("sentences_scanned", len(sentences))
+        count("experiences", len(experiences))
         return experiences
 
     def detect_experiences(self, chunks: List[str]) -> List[Experience]:
         """
         Processes multiple chunks to extract experiences.
         """
-        all_experiences = []
+        return list(self.iter_experiences(chunks))
+
+    def iter_experiences(self, chunks: Iterable[str]) -> Iterator[Experience]:
+        """
+        Lazily extracts experiences from a stream of chunks, one chunk at a time.
+        """
         for i, chunk in enumerate(chunks):
             chapter_id = i + 1  # Assume chunks are chapters
-            all_experiences.extend(self.extract_experiences(chunk, chapter_id))
-        return all_experiences
\ No newline at end of file
+            yield from self.extract_experiences(chunk, chapter_id)
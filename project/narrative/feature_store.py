@@ -0,0 +1,148 @@
+"""
+Persistent on-disk store for annotated novels.
+
+Entries are keyed by the SHA-256 of the novel file and a fingerprint of the
+keyword tables, sentiment threshold and sentiment backend, so changing any of
+them invalidates the cached annotations automatically. Each entry is one flat binary file:
+
+    MAGIC | header length (uint32) | JSON header | array blocks...
+
+where the array blocks hold the UTF-8 novel text, the paragraph spans, the
+per-paragraph experience offsets and the ExperienceTable columns (sentence
+spans, dimension bitmask, compound score).
+"""
+
+import hashlib
+import json
+import os
+import struct
+from array import array
+from typing import Optional
+
+from constraints.schema import ExperienceTable
+from constraints.updater import ConstraintUpdater
+from narrative.corpus import AnnotatedNovel
+from narrative.experience_detector import ExperienceDetector
+from narrative.segmenter import decode_text, map_file
+
+
+MAGIC = b"KDSF"
+# Bump when the chunking/annotation logic or the file layout changes
+STORE_VERSION = 2
+
+_BLOCK_TYPES = ("Q", "Q", "Q", "Q", "Q", "H", "d")
+
+
+class FeatureStore:
+    """
+    Versioned cache of AnnotatedNovel objects under a directory.
+    """
+
+    def __init__(self, cache_dir: str = "cache/features",
+                 detector: ExperienceDetector = None,
+                 updater: ConstraintUpdater = None):
+        self.cache_dir = cache_dir
+        self.detector = detector or ExperienceDetector()
+        self.updater = updater or ConstraintUpdater()
+
+    def config_fingerprint(self) -> str:
+        """Hash of everything besides the novel text that shapes the annotations."""
+        config = {
+            "version": STORE_VERSION,
+            "detector_keywords": self.detector.dimension_keywords,
+            "updater_keywords": self.updater.dimension_keywords,
+            "negative_threshold": self.updater.sentiment.NEGATIVE_THRESHOLD,
+            "sentiment_backend": self.updater.sentiment.backend,
+        }
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+    def key_for(self, novel_bytes) -> str:
+        return self.key_for_digest(hashlib.sha256(novel_bytes).hexdigest())
+
+    def key_for_digest(self, sha256_hex: str) -> str:
+        """Key of a novel whose SHA-256 is already known (e.g. from a manifest)."""
+        return f"{sha256_hex[:24]}-{self.config_fingerprint()}"
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.kdsf")
+
+    def load_or_build(self, novel_path: str) -> AnnotatedNovel:
+        """
+        Returns the annotated novel for a file, building and saving it on a miss.
+        """
+        with map_file(novel_path) as mapped:
+            key = self.key_for(mapped)
+            corpus = self.load(key)
+            if corpus is None:
+                corpus = AnnotatedNovel.build(decode_text(mapped), detector=self.detector,
+                                              updater=self.updater)
+                self.save(key, corpus)
+        return corpus
+
+    def load(self, key: str) -> Optional[AnnotatedNovel]:
+        """Reads a stored entry; returns None if it is missing or unreadable."""
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            return self._decode(data)
+        except (ValueError, KeyError, struct.error, UnicodeDecodeError):
+            return None
+
+    def save(self, key: str, corpus: AnnotatedNovel) -> str:
+        """Writes an entry atomically and returns its path."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path_for(key)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.write(self._encode(corpus))
+        os.replace(tmp_path, path)
+        return path
+
+    def _encode(self, corpus: AnnotatedNovel) -> bytes:
+        table = corpus.table
+        columns = [corpus.paragraph_starts, corpus.paragraph_ends, corpus.paragraph_offsets,
+                   table.starts, table.ends, table.masks, table.compounds]
+        payload = [corpus.text.encode("utf-8")]
+        payload += [array(typecode, column).tobytes()
+                    for typecode, column in zip(_BLOCK_TYPES, columns)]
+        header = json.dumps({
+            "version": STORE_VERSION,
+            "dimensions": list(table.dimension_names),
+            "negative_threshold": table.negative_threshold,
+            "num_paragraphs": len(corpus),
+            "num_sentences": len(table),
+            "block_sizes": [len(p) for p in payload],
+        }).encode()
+        return MAGIC + struct.pack("<I", len(header)) + header + b"".join(payload)
+
+    def _decode(self, data: bytes) -> AnnotatedNovel:
+        if data[:4] != MAGIC:
+            raise ValueError("Not a feature store file")
+        (header_len,) = struct.unpack_from("<I", data, 4)
+        header = json.loads(data[8:8 + header_len])
+        if header["version"] != STORE_VERSION:
+            raise ValueError("Feature store version mismatch")
+
+        view = memoryview(data)
+        pos = 8 + header_len
+        payload = []
+        for size in header["block_sizes"]:
+            payload.append(view[pos:pos + size])
+            pos += size
+
+        text = str(payload[0], "utf-8")
+        columns = []
+        for typecode, buf in zip(_BLOCK_TYPES, payload[1:]):
+            column = array(typecode)
+            column.frombytes(buf)
+            columns.append(column)
+        p_starts, p_ends, offsets, starts, ends, masks, compounds = columns
+
+        if len(p_starts) != header["num_paragraphs"] or len(starts) != header["num_sentences"]:
+            raise ValueError("Truncated feature store file")
+        table = ExperienceTable(text, header["dimensions"], header["negative_threshold"],
+                                starts, ends, masks, compounds)
+        return AnnotatedNovel(text, p_starts, p_ends, offsets, table)
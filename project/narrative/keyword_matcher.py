@@ -0,0 +1,107 @@
+"""
+Single-pass keyword matcher for dimension detection.
+
+Replaces per-dimension ``any(kw in text for kw in keywords)`` loops with one
+compiled regex. The keywords of all tables are merged into a trie-shaped
+pattern wrapped in a lookahead, so one ``findall`` reports the longest keyword
+starting at every position. Keywords contained in a longer match (``faith``
+inside ``faithful``) are folded in through a precomputed containment closure,
+giving exactly the substring semantics of the original loops.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """Regex source matching any of the words, sharing common prefixes."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional tail: prefer the longest keyword at this position
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Matches text against one or more {dimension: [keywords]} tables at once.
+    """
+
+    _compiled: Dict[tuple, "KeywordMatcher"] = {}
+
+    def __init__(self, *tables: Dict[str, List[str]]):
+        self.tables = tables
+        keys = [(t, dim) for t, table in enumerate(tables) for dim in table]
+        self._table_bits = [
+            [(dim, 1 << keys.index((t, dim))) for dim in table]
+            for t, table in enumerate(tables)
+        ]
+
+        # Bitmask of (table, dimension) keys per keyword
+        keyword_masks: Dict[str, int] = {}
+        for bit, (t, dim) in enumerate(keys):
+            for kw in tables[t][dim]:
+                keyword_masks[kw] = keyword_masks.get(kw, 0) | (1 << bit)
+
+        # The empty keyword matches every text
+        self._always = keyword_masks.pop("", 0)
+
+        # A match of `kw` also implies every keyword occurring inside it
+        self._masks = {
+            kw: self._always | _or_all(m for other, m in keyword_masks.items() if other in kw)
+            for kw in keyword_masks
+        }
+        self._pattern = re.compile("(?=(" + _trie_pattern(list(keyword_masks)) + "))") if keyword_masks else None
+        self._decoded: Dict[int, Tuple[Tuple[str, ...], ...]] = {}
+
+    @classmethod
+    def compile(cls, *tables: Dict[str, List[str]]) -> "KeywordMatcher":
+        """Returns a shared matcher for the given tables, compiling it once."""
+        key = tuple(tuple((dim, tuple(kws)) for dim, kws in table.items()) for table in tables)
+        if key not in cls._compiled:
+            cls._compiled[key] = cls(*tables)
+        return cls._compiled[key]
+
+    def scan(self, text: str) -> int:
+        """Bitmask of all (table, dimension) keys whose keywords occur in the text."""
+        if self._pattern is None:
+            return self._always
+        mask = self._always
+        masks = self._masks
+        for kw in set(self._pattern.findall(text.lower())):
+            mask |= masks[kw]
+        return mask
+
+    def decode(self, mask: int) -> Tuple[Tuple[str, ...], ...]:
+        """Matched dimensions per table, each in table order."""
+        if mask not in self._decoded:
+            self._decoded[mask] = tuple(
+                tuple(dim for dim, bit in bits if mask & bit) for bits in self._table_bits
+            )
+        return self._decoded[mask]
+
+    def match_all(self, text: str) -> Tuple[Tuple[str, ...], ...]:
+        """Matched dimensions for every table, from a single scan of the text."""
+        return self.decode(self.scan(text))
+
+    def match(self, text: str) -> Tuple[str, ...]:
+        """Matched dimensions of the first table, in table order."""
+        return self.decode(self.scan(text))[0]
+
+
+def _or_all(masks) -> int:
+    result = 0
+    for m in masks:
+        result |= m
+    return result
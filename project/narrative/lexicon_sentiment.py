@@ -0,0 +1,322 @@
+"""
+Vectorized VADER-compatible polarity engine.
+
+NLTK's VADER walks every token in Python and rebuilds a punctuation lookup
+table for each sentence. This engine loads the VADER lexicon once into NumPy
+lookup arrays, tokenizes a batch of sentences in one light Python pass, and
+then applies the VADER rules (ALL-CAPS emphasis, boosters/dampeners with
+distance decay, negation, "never so/this", "least", idioms, the "but" shift
+and punctuation emphasis) as array operations over every token of the batch.
+
+Compound scores follow NLTK's ``SentimentIntensityAnalyzer`` rule for rule,
+including its quirk of scoring a repeated token in the context of its first
+occurrence. Documented tolerance: compound scores agree with NLTK to within
+1e-4 (the 4-decimal rounding both apply); on the bundled novels every
+experience sentence produces the same positive/negative label.
+"""
+
+import re
+import string
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from narrative.vader_data import read_vader_lexicon
+
+
+# VADER constants (Hutto & Gilbert, 2014), as shipped with NLTK
+B_INCR = 0.293
+B_DECR = -0.293
+C_INCR = 0.733
+N_SCALAR = -0.74
+NORMALIZE_ALPHA = 15
+
+NEGATE = {
+    "aint", "arent", "cannot", "cant", "couldnt", "darent", "didnt", "doesnt",
+    "ain't", "aren't", "can't", "couldn't", "daren't", "didn't", "doesn't",
+    "dont", "hadnt", "hasnt", "havent", "isnt", "mightnt", "mustnt", "neither",
+    "don't", "hadn't", "hasn't", "haven't", "isn't", "mightn't", "mustn't",
+    "neednt", "needn't", "never", "none", "nope", "nor", "not", "nothing",
+    "nowhere", "oughtnt", "shant", "shouldnt", "uhuh", "wasnt", "werent",
+    "oughtn't", "shan't", "shouldn't", "uh-uh", "wasn't", "weren't", "without",
+    "wont", "wouldnt", "won't", "wouldn't", "rarely", "seldom", "despite",
+}
+
+BOOSTER_DICT = {
+    **{w: B_INCR for w in [
+        "absolutely", "amazingly", "awfully", "completely", "considerably",
+        "decidedly", "deeply", "effing", "enormously", "entirely", "especially",
+        "exceptionally", "extremely", "fabulously", "flipping", "flippin",
+        "fricking", "frickin", "frigging", "friggin", "fully", "fucking",
+        "greatly", "hella", "highly", "hugely", "incredibly", "intensely",
+        "majorly", "more", "most", "particularly", "purely", "quite", "really",
+        "remarkably", "so", "substantially", "thoroughly", "totally",
+        "tremendously", "uber", "unbelievably", "unusually", "utterly", "very",
+    ]},
+    **{w: B_DECR for w in [
+        "almost", "barely", "hardly", "just enough", "kind of", "kinda", "kindof",
+        "kind-of", "less", "little", "marginally", "occasionally", "partly",
+        "scarcely", "slightly", "somewhat", "sort of", "sorta", "sortof", "sort-of",
+    ]},
+}
+
+SPECIAL_CASE_IDIOMS = {
+    "the shit": 3, "the bomb": 3, "bad ass": 1.5, "yeah right": -2,
+    "cut the mustard": 2, "kiss of death": -1.5, "hand to mouth": -2,
+}
+
+PUNC_LIST = [".", "!", "?", ",", ";", ":", "-", "'", '"',
+             "!!", "!!!", "??", "???", "?!?", "!?!", "?!?!", "!?!?"]
+
+_REMOVE_PUNCTUATION = re.compile(f"[{re.escape(string.punctuation)}]")
+_EDGE_PUNCT = set("".join(PUNC_LIST))
+# Sentences containing one of these need the per-position idiom check
+_IDIOM_PHRASES = list(SPECIAL_CASE_IDIOMS) + [w for w in BOOSTER_DICT if " " in w]
+
+# Raw-token codes for the case-sensitive "never so/this" rule
+_RAW_NEVER = 1
+_RAW_SO_THIS = 2
+_RAW_CODES = {"never": _RAW_NEVER, "so": _RAW_SO_THIS, "this": _RAW_SO_THIS}
+
+
+def load_vader_lexicon(path: Optional[str] = None) -> Dict[str, float]:
+    """
+    Reads the VADER lexicon (a .txt file or NLTK's .zip). Without a path, the
+    file narrative.vader_data finds is used.
+    """
+    return parse_vader_lexicon(read_vader_lexicon(path))
+
+
+def parse_vader_lexicon(content: str) -> Dict[str, float]:
+    """{word: mean valence} from lexicon text (tab-separated word, valence, ...)."""
+    lexicon = {}
+    for line in content.split("\n"):
+        if not line.strip():
+            continue
+        word, measure = line.strip().split("\t")[0:2]
+        lexicon[word] = float(measure)
+    return lexicon
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    VADER's words_and_emoticons: whitespace tokens longer than one character,
+    with leading or trailing punctuation removed when a plain word remains.
+    """
+    tokens = [t for t in text.split() if len(t) > 1]
+    words = None
+    for k, token in enumerate(tokens):
+        if token[0] in _EDGE_PUNCT or token[-1] in _EDGE_PUNCT:
+            if words is None:
+                words = {w for w in _REMOVE_PUNCTUATION.sub("", text).split() if len(w) > 1}
+            for p in PUNC_LIST:
+                if token.startswith(p) and token[len(p):] in words:
+                    tokens[k] = token[len(p):]
+                    break
+                if token.endswith(p) and token[:-len(p)] in words:
+                    tokens[k] = token[:-len(p)]
+                    break
+    return tokens
+
+
+def _idiom_adjustments(tokens: List[str]):
+    """
+    Per position i > 2: the idiom valence override (or None) and whether a
+    booster bigram ("kind of", ...) precedes the word, as in NLTK's _idioms_check.
+    """
+    n = len(tokens)
+    for i in range(3, n):
+        w = tokens
+        onezero = f"{w[i - 1]} {w[i]}"
+        twoonezero = f"{w[i - 2]} {w[i - 1]} {w[i]}"
+        twoone = f"{w[i - 2]} {w[i - 1]}"
+        threetwoone = f"{w[i - 3]} {w[i - 2]} {w[i - 1]}"
+        threetwo = f"{w[i - 3]} {w[i - 2]}"
+        override = None
+        for seq in (onezero, twoonezero, twoone, threetwoone, threetwo):
+            if seq in SPECIAL_CASE_IDIOMS:
+                override = SPECIAL_CASE_IDIOMS[seq]
+                break
+        if n - 1 > i:
+            zeroone = f"{w[i]} {w[i + 1]}"
+            if zeroone in SPECIAL_CASE_IDIOMS:
+                override = SPECIAL_CASE_IDIOMS[zeroone]
+        if n - 1 > i + 1:
+            zeroonetwo = f"{w[i]} {w[i + 1]} {w[i + 2]}"
+            if zeroonetwo in SPECIAL_CASE_IDIOMS:
+                override = SPECIAL_CASE_IDIOMS[zeroonetwo]
+        decrement = threetwo in BOOSTER_DICT or twoone in BOOSTER_DICT
+        yield i, override, decrement
+
+
+class LexiconSentimentEngine:
+    """
+    Batch VADER compound scoring over NumPy lookup arrays.
+
+    Every lexicon, booster, negation and rule word gets a row id; any other
+    token maps to row 0 (or row 1 if it contains "n't"). Per-word properties
+    live in parallel arrays indexed by row id.
+    """
+
+    def __init__(self, lexicon: Dict[str, float] = None):
+        lexicon = lexicon if lexicon is not None else load_vader_lexicon()
+        special = {"least", "at", "very", "but", "kind", "of"}
+        words = ["", "n't"] + sorted(set(lexicon) | set(BOOSTER_DICT) | NEGATE | special)
+        self.word_ids = {w: i for i, w in enumerate(words) if i >= 2}
+
+        self.in_lexicon = np.array([w in lexicon for w in words])
+        self.valence = np.array([lexicon.get(w, 0.0) for w in words])
+        self.booster = np.array([BOOSTER_DICT.get(w, 0.0) for w in words])
+        self.negate = np.array([w in NEGATE or "n't" in w for w in words])
+        self.is_least = np.array([w == "least" for w in words])
+        self.is_at_very = np.array([w in ("at", "very") for w in words])
+        self.is_kind = np.array([w == "kind" for w in words])
+        self.is_of = np.array([w == "of" for w in words])
+        self._but_id = self.word_ids["but"]
+
+    def compound_scores(self, texts: List[str]) -> List[float]:
+        """VADER compound score for each text, rounded to 4 decimals like NLTK."""
+        if not texts:
+            return []
+        word_ids = self.word_ids
+
+        ids, upper, raw, sent, pos, ctx = [], [], [], [], [], []
+        starts, lengths, cap_diff, first_but, amplifier = [], [], [], [], []
+        idiom_override, idiom_decrement = {}, set()
+
+        for s, text in enumerate(texts):
+            tokens = tokenize(text)
+            start = len(ids)
+            first_index = {}
+            n_upper = 0
+            but_at = -1
+            for k, token in enumerate(tokens):
+                lower = token.lower()
+                tid = word_ids.get(lower)
+                if tid is None:
+                    tid = 1 if "n't" in lower else 0
+                elif tid == self._but_id and but_at < 0:
+                    but_at = k
+                is_upper = token.isupper()
+                n_upper += is_upper
+                ids.append(tid)
+                upper.append(is_upper)
+                raw.append(_RAW_CODES.get(token, 0))
+                sent.append(s)
+                pos.append(k)
+                ctx.append(start + first_index.setdefault(token, k))
+
+            n = len(tokens)
+            if n > 3 and any(p in " ".join(tokens) for p in _IDIOM_PHRASES):
+                for i, override, decrement in _idiom_adjustments(tokens):
+                    if override is not None:
+                        idiom_override[start + i] = override
+                    if decrement:
+                        idiom_decrement.add(start + i)
+
+            starts.append(start)
+            lengths.append(n)
+            cap_diff.append(0 < n - n_upper < n)
+            first_but.append(but_at)
+            amplifier.append(self._punctuation_emphasis(text))
+
+        if not ids:
+            return [0.0] * len(texts)
+
+        ids = np.array(ids, dtype=np.int64)
+        upper = np.array(upper, dtype=bool)
+        raw = np.array(raw, dtype=np.int8)
+        sent = np.array(sent, dtype=np.int64)
+        pos = np.array(pos, dtype=np.int64)
+        ctx = np.array(ctx, dtype=np.int64)
+        lengths = np.array(lengths, dtype=np.int64)
+        sent_cap = np.array(cap_diff, dtype=bool)[sent]
+
+        # Every token is scored in the context of its first occurrence
+        i = pos[ctx]
+        item = ids[ctx]
+
+        def at(offset):
+            """Row ids, upper flags and raw codes of the word `offset` before the item."""
+            idx = np.maximum(ctx - offset, 0)
+            return ids[idx], upper[idx], raw[idx]
+
+        # Boosters and "kind of" carry no valence of their own
+        next_is_of = np.zeros(len(ids), dtype=bool)
+        has_next = i < lengths[sent] - 1
+        next_is_of[has_next] = self.is_of[ids[ctx[has_next] + 1]]
+        active = self.in_lexicon[item] & (self.booster[item] == 0) & ~(self.is_kind[item] & next_is_of)
+
+        v = np.where(active, self.valence[item], 0.0)
+        caps = active & upper[ctx] & sent_cap
+        v = np.where(caps, np.where(v > 0, v + C_INCR, v - C_INCR), v)
+
+        prev_ids = [at(1), at(2), at(3)]
+        for start_i in range(3):
+            pid, pupper, _ = prev_ids[start_i]
+            cond = active & (i > start_i) & ~self.in_lexicon[pid]
+
+            # Booster/dampener scalar, flipped for negative valence, with ALL-CAPS emphasis
+            b = self.booster[pid]
+            scalar = np.where(v < 0, -b, b)
+            cap_boost = (b != 0) & pupper & sent_cap
+            scalar = np.where(cap_boost, np.where(v > 0, scalar + C_INCR, scalar - C_INCR), scalar)
+            if start_i == 1:
+                scalar = scalar * 0.95
+            elif start_i == 2:
+                scalar = scalar * 0.9
+            v = np.where(cond, v + scalar, v)
+
+            # Negation and "never so/this"
+            if start_i == 0:
+                v = np.where(cond & self.negate[pid], v * N_SCALAR, v)
+            elif start_i == 1:
+                never_so = (prev_ids[1][2] == _RAW_NEVER) & (prev_ids[0][2] == _RAW_SO_THIS)
+                v = np.where(cond & never_so, v * 1.5,
+                             np.where(cond & self.negate[pid], v * N_SCALAR, v))
+            else:
+                never_so = (((prev_ids[2][2] == _RAW_NEVER) & (prev_ids[1][2] == _RAW_SO_THIS))
+                            | (prev_ids[0][2] == _RAW_SO_THIS))
+                v = np.where(cond & never_so, v * 1.25,
+                             np.where(cond & self.negate[pid], v * N_SCALAR, v))
+
+                # Idioms and booster bigrams (rare; positions pre-computed in Python)
+                if idiom_override or idiom_decrement:
+                    override = np.full(len(ids), np.nan)
+                    decrement = np.zeros(len(ids), dtype=bool)
+                    for g, value in idiom_override.items():
+                        override[g] = value
+                    for g in idiom_decrement:
+                        decrement[g] = True
+                    override, decrement = override[ctx], decrement[ctx]
+                    v = np.where(cond & ~np.isnan(override), override, v)
+                    v = np.where(cond & decrement, v + B_DECR, v)
+
+        # "least" negation
+        pid1, _, _ = prev_ids[0]
+        pid2, _, _ = prev_ids[1]
+        least = (active & (i > 0) & self.is_least[pid1] & ~self.in_lexicon[pid1]
+                 & ~((i > 1) & self.is_at_very[pid2]))
+        v = np.where(least, v * N_SCALAR, v)
+
+        # "but" shifts emphasis to the clause after it
+        but_at = np.array(first_but, dtype=np.int64)[sent]
+        has_but = but_at >= 0
+        v = np.where(has_but & (pos < but_at), v * 0.5, v)
+        v = np.where(has_but & (pos > but_at), v * 1.5, v)
+
+        sums = np.bincount(sent, weights=v, minlength=len(texts))
+        amp = np.array(amplifier)
+        sums = np.where(sums > 0, sums + amp, np.where(sums < 0, sums - amp, sums))
+        compound = sums / np.sqrt(sums * sums + NORMALIZE_ALPHA)
+        return [round(c, 4) if n else 0.0 for c, n in zip(compound.tolist(), lengths.tolist())]
+
+    @staticmethod
+    def _punctuation_emphasis(text: str) -> float:
+        """Amplifier from exclamation points (up to 4) and repeated question marks."""
+        ep_amplifier = min(text.count("!"), 4) * 0.292
+        qm_count = text.count("?")
+        qm_amplifier = 0
+        if qm_count > 1:
+            qm_amplifier = qm_count * 0.18 if qm_count <= 3 else 0.96
+        return ep_amplifier + qm_amplifier
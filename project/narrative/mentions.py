@@ -0,0 +1,129 @@
+"""
+Character mention index over a list of text units (paragraphs or passages).
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Sequence
+
+
+# Units are joined with a character that never occurs in names, so a match
+# can never straddle two units.
+_SEPARATOR = "\x00"
+
+
+class MentionIndex:
+    """
+    Maps character names and aliases to the sorted indices of the units that
+    mention them. Units may overlap (sliding windows) but must be ordered by
+    both start and end offset.
+
+    All units are lowercased once into a single buffer. Looking up a name scans
+    that buffer with str.find and maps hit offsets back to units, and the result
+    is memoized, so each name costs one scan per novel instead of one
+    lower()+substring test per unit per query. Matching is case-insensitive
+    substring matching, like ``name.lower() in unit.lower()``.
+    """
+
+    def __init__(self, units: List[str], names: Iterable[str] = ()):
+        lowered = [u.lower() for u in units]
+        self._buffer = _SEPARATOR.join(lowered)
+        self._starts = []
+        self._ends = []
+        pos = 0
+        for text in lowered:
+            self._starts.append(pos)
+            self._ends.append(pos + len(text))
+            pos += len(text) + 1
+        self._cache: Dict[str, List[int]] = {}
+        for name in names:
+            self.units(name)
+
+    @classmethod
+    def from_spans(cls, text: str, starts: Sequence[int], ends: Sequence[int],
+                   names: Iterable[str] = ()) -> "MentionIndex":
+        """
+        Index over the units ``text[starts[i]:ends[i]]`` of one shared buffer,
+        lowercasing the buffer once instead of copying every unit.
+        """
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Some characters change length when lowercased; offsets would drift
+            return cls([text[s:e] for s, e in zip(starts, ends)], names)
+        index = cls.__new__(cls)
+        index._buffer = lowered
+        index._starts = list(starts)
+        index._ends = list(ends)
+        index._cache = {}
+        for name in names:
+            index.units(name)
+        return index
+
+    def __len__(self):
+        return len(self._starts)
+
+    def extend(self, units: Iterable[str]):
+        """
+        Appends units after the indexed ones. Only the new units are
+        lowercased and scanned for the names looked up so far.
+        """
+        first = len(self._starts)
+        end = self._ends[-1] if self._ends else 0
+        parts = [self._buffer[:end]]
+        pos = end + 1 if first else 0
+        for text in units:
+            text = text.lower()
+            parts.append(text)
+            self._starts.append(pos)
+            self._ends.append(pos + len(text))
+            pos += len(text) + 1
+        self._buffer = _SEPARATOR.join(parts) if first else _SEPARATOR.join(parts[1:])
+        if first < len(self._starts):
+            for key, hits in self._cache.items():
+                hits.extend(self._scan(key, self._starts[first]) if key
+                            else range(first, len(self._starts)))
+
+    def truncate(self, num_units: int):
+        """Drops every unit from index `num_units` on."""
+        del self._starts[num_units:]
+        del self._ends[num_units:]
+        self._buffer = self._buffer[:self._ends[-1]] if self._ends else ""
+        for hits in self._cache.values():
+            del hits[bisect_left(hits, num_units):]
+
+    def _scan(self, needle: str, start: int = 0) -> List[int]:
+        hits = []
+        buffer, starts, ends = self._buffer, self._starts, self._ends
+        pos = buffer.find(needle, start)
+        while pos != -1:
+            # Units are sorted by start and end (they may overlap), so the units
+            # containing this hit form the contiguous range lo..hi
+            hi = bisect_right(starts, pos) - 1
+            lo = bisect_left(ends, pos + len(needle))
+            if hits:
+                lo = max(lo, hits[-1] + 1)
+            if lo > hi:
+                # Hit lies between units, runs past a unit's end, or adds nothing
+                pos = buffer.find(needle, pos + 1)
+                continue
+            hits.extend(range(lo, hi + 1))
+            # Skip to the next unit: one hit per unit is enough
+            next_start = starts[hi + 1] if hi + 1 < len(starts) else len(buffer)
+            pos = buffer.find(needle, next_start)
+        return hits
+
+    def units(self, name: str, aliases: Iterable[str] = ()) -> List[int]:
+        """
+        Sorted indices of units mentioning the name or any of its aliases.
+        An empty name matches every unit.
+        """
+        result = None
+        for needle in [name, *aliases]:
+            key = needle.lower()
+            if key not in self._cache:
+                self._cache[key] = self._scan(key) if key else list(range(len(self)))
+            hits = self._cache[key]
+            result = hits if result is None else sorted(set(result).union(hits))
+        return list(result)
+
+    def count(self, name: str, aliases: Iterable[str] = ()) -> int:
+        return len(self.units(name, aliases))
@@ -0,0 +1,323 @@
+"""
+Registry of the novels in a data directory.
+
+Every ``*.txt`` file under the directory is one book, titled by its file name
+and looked up by normalized title, so "In search of the castaways.txt"
+answers to "In Search of the Castaways" and "the_count_of_monte_cristo.txt"
+to "The Count of Monte Cristo". A JSON manifest records each file's size,
+mtime and SHA-256, so rescanning a library of hundreds of novels only hashes
+the files that changed (and only rewrites the manifest when something did).
+Files whose titles normalize to the same key are set aside as conflicts: the
+rest of the library works, and only looking up that title raises.
+
+ingest() annotates the books missing from the feature store (and optionally
+saves their paragraph indexes) on a process pool. corpus() loads books lazily
+and keeps them in LRU order, dropping the least recently used ones once their
+estimated size exceeds the memory budget.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from narrative.corpus import AnnotatedNovel
+from narrative.feature_store import FeatureStore
+from narrative.segmenter import decode_text, map_file
+
+
+MANIFEST_VERSION = 1
+NOVEL_EXTENSIONS = (".txt",)
+
+_TRAILING_ARTICLE_RE = re.compile(r"^(.*\S)\s*,\s*(the|a|an)\s*$", re.IGNORECASE)
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def normalize_title(title: str) -> str:
+    """
+    Lookup key of a title: accents, case, punctuation and spacing are ignored,
+    and a trailing article ("Count of Monte Cristo, The") is moved to the front.
+    """
+    # 1. "X, The" -> "The X"
+    match = _TRAILING_ARTICLE_RE.match(title)
+    if match:
+        title = f"{match.group(2)} {match.group(1)}"
+
+    # 2. Fold accents and case
+    title = unicodedata.normalize("NFKD", title)
+    title = "".join(c for c in title if not unicodedata.combining(c)).casefold()
+
+    # 3. Words only, single-spaced
+    return " ".join(_WORD_RE.findall(title.replace("&", " and ")))
+
+
+@dataclass
+class BookEntry:
+    title: str
+    path: str  # relative to the data directory
+    size: int
+    mtime_ns: int
+    sha256: Optional[str] = None  # filled in once the file has been hashed
+
+
+def _ingest_book(path: str, cache_dir: str, index_dir: Optional[str] = None,
+                 store: FeatureStore = None) -> Tuple[str, bool]:
+    """
+    Pool task: annotates one novel into the feature store unless it is already
+    there (and saves its paragraph index). Returns (sha256, built).
+    """
+    store = store or FeatureStore(cache_dir)
+    corpus = None
+    with map_file(path) as mapped:
+        digest = hashlib.sha256(mapped).hexdigest()
+        key = store.key_for_digest(digest)
+        built = not os.path.exists(store.path_for(key))
+        if built:
+            corpus = AnnotatedNovel.build(decode_text(mapped), detector=store.detector,
+                                          updater=store.updater)
+            store.save(key, corpus)
+    if index_dir:
+        from evidence.engine import paragraph_index
+
+        paragraph_index(corpus or store.load(key), index_dir)
+    return digest, built
+
+
+class CorpusRegistry:
+    """
+    Title -> novel file lookup over a data directory, with parallel ingest and
+    lazy, memory-bounded loading of annotated novels.
+
+    ``prepare(title, corpus)`` runs on every freshly loaded novel, e.g. to
+    precompute character states, and its result is what corpus() caches.
+    """
+
+    def __init__(self, data_dir: str, store: FeatureStore = None, manifest_path: str = None,
+                 memory_budget_mb: float = 2048.0,
+                 prepare: Callable[[str, AnnotatedNovel], AnnotatedNovel] = None):
+        self.data_dir = os.path.abspath(data_dir)
+        self.store = store or FeatureStore()
+        self.manifest_path = manifest_path or os.path.join(self.store.cache_dir, "manifest.json")
+        self.memory_budget = memory_budget_mb * 2 ** 20
+        self.prepare = prepare
+        self._books: Optional[Dict[str, BookEntry]] = None
+        # Normalized title -> paths of the files claiming it, for ambiguous titles
+        self.conflicts: Dict[str, List[str]] = {}
+        self._loaded: "OrderedDict[str, Tuple[AnnotatedNovel, int]]" = OrderedDict()
+        self.memory_used = 0
+        self.evictions = 0
+
+    # Scanning and lookup
+
+    def _read_manifest(self) -> Dict[str, BookEntry]:
+        """Entries of the previous scan by relative path (empty if unusable)."""
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest["version"] != MANIFEST_VERSION or manifest["data_dir"] != self.data_dir:
+                return {}
+            return {book["path"]: BookEntry(**book) for book in manifest["books"]}
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+
+    def write_manifest(self):
+        """Saves the current scan atomically."""
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "data_dir": self.data_dir,
+            "books": [asdict(entry) for entry in self.books.values()],
+        }
+        tmp_path = f"{self.manifest_path}.tmp{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def scan(self) -> List[BookEntry]:
+        """
+        Rescans the data directory. Hashes from the manifest are kept for files
+        whose size and mtime are unchanged, and the manifest is only rewritten
+        if an entry was added, removed or changed. Files with the same
+        normalized title are left out and recorded in ``conflicts``.
+        """
+        previous = self._read_manifest()
+        found: Dict[str, List[BookEntry]] = {}
+        for root, dirs, files in os.walk(self.data_dir):
+            dirs.sort()
+            for name in sorted(files):
+                if not name.lower().endswith(NOVEL_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                rel_path = os.path.relpath(path, self.data_dir)
+                st = os.stat(path)
+                entry = BookEntry(os.path.splitext(name)[0], rel_path, st.st_size, st.st_mtime_ns)
+                old = previous.get(rel_path)
+                if old is not None and (old.size, old.mtime_ns) == (entry.size, entry.mtime_ns):
+                    entry.sha256 = old.sha256
+
+                found.setdefault(normalize_title(entry.title), []).append(entry)
+
+        self._books = {key: entries[0] for key, entries in found.items() if len(entries) == 1}
+        self.conflicts = {key: [e.path for e in entries]
+                          for key, entries in found.items() if len(entries) > 1}
+        current = {entry.path: entry for entry in self._books.values()}
+        if current != previous or not os.path.exists(self.manifest_path):
+            self.write_manifest()
+        return list(self._books.values())
+
+    @property
+    def books(self) -> Dict[str, BookEntry]:
+        """Normalized title -> entry (scanned on first use)."""
+        if self._books is None:
+            self.scan()
+        return self._books
+
+    def titles(self) -> List[str]:
+        return [entry.title for entry in self.books.values()]
+
+    def __len__(self):
+        return len(self.books)
+
+    def __contains__(self, title: str) -> bool:
+        return normalize_title(title) in self.books
+
+    def _lookup(self, title: str) -> Optional[BookEntry]:
+        key = normalize_title(title)
+        entry = self.books.get(key)
+        if entry is None and key in self.conflicts:
+            raise ValueError(f"Ambiguous title {title!r}: " + ", ".join(self.conflicts[key]))
+        return entry
+
+    def entry(self, title: str) -> BookEntry:
+        entry = self._lookup(title)
+        if entry is None:
+            raise FileNotFoundError(f"Novel not found for: {title}")
+        return entry
+
+    def path_for(self, title: str) -> Optional[str]:
+        """
+        Absolute path of a book's file, or None if it is not in the library.
+        A title claimed by several files raises ValueError.
+        """
+        entry = self._lookup(title)
+        return os.path.join(self.data_dir, entry.path) if entry is not None else None
+
+    # Ingest
+
+    def ingest(self, titles: Iterable[str] = None, workers: int = 1,
+               index_dir: str = None) -> Dict[str, float]:
+        """
+        Builds the feature-store entries (and, with index_dir, the paragraph
+        indexes) of the given books, all books by default, on `workers`
+        processes. Unknown titles are skipped. Returns throughput statistics.
+        """
+        entries = list(self.books.values()) if titles is None else [
+            self.books[key] for key in dict.fromkeys(map(normalize_title, titles))
+            if key in self.books
+        ]
+        # 1. Books already annotated per the manifest need no work
+        pending = [
+            entry for entry in entries
+            if index_dir or entry.sha256 is None
+            or not os.path.exists(self.store.path_for(self.store.key_for_digest(entry.sha256)))
+        ]
+
+        # 2. Annotate the rest, largest first so the pool drains evenly
+        pending.sort(key=lambda e: e.size, reverse=True)
+        paths = [os.path.join(self.data_dir, entry.path) for entry in pending]
+        start = time.perf_counter()
+        if workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+                results = list(pool.map(_ingest_book, paths, [self.store.cache_dir] * len(paths),
+                                        [index_dir] * len(paths)))
+        else:
+            results = [_ingest_book(path, self.store.cache_dir, index_dir, self.store)
+                       for path in paths]
+        seconds = time.perf_counter() - start
+
+        # 3. Remember the hashes so the next scan and ingest skip these files
+        for entry, (digest, _) in zip(pending, results):
+            entry.sha256 = digest
+        if pending:
+            self.write_manifest()
+
+        built = [entry for entry, (_, was_built) in zip(pending, results) if was_built]
+        megabytes = sum(entry.size for entry in built) / 2 ** 20
+        return {
+            "books": len(entries),
+            "built": len(built),
+            "megabytes": megabytes,
+            "seconds": seconds,
+            "mb_per_s": megabytes / seconds if built and seconds > 0 else 0.0,
+        }
+
+    # Lazy loading
+
+    def is_loaded(self, title: str) -> bool:
+        return normalize_title(title) in self._loaded
+
+    def corpus(self, title: str) -> AnnotatedNovel:
+        """
+        The annotated novel of a book, loaded (or built) on first use. Loading
+        evicts the least recently used novels beyond the memory budget; the
+        novel just loaded is always kept. The feature-store entry is found by
+        the SHA-256 in the manifest, so a known book is not hashed again.
+        """
+        key = normalize_title(title)
+        loaded = self._loaded.get(key)
+        if loaded is not None:
+            self._loaded.move_to_end(key)
+            return loaded[0]
+
+        # 1. Stored entry by manifest hash; books not hashed or stored yet are ingested first
+        entry = self.entry(title)
+        if entry.sha256 is None or not os.path.exists(
+                self.store.path_for(self.store.key_for_digest(entry.sha256))):
+            self.ingest([title])
+        corpus = self.store.load(self.store.key_for_digest(entry.sha256))
+        if corpus is None:
+            # Unreadable entry: rebuild it
+            corpus = self.store.load_or_build(os.path.join(self.data_dir, entry.path))
+
+        # 2. Prepare, size and keep it
+        if self.prepare is not None:
+            corpus = self.prepare(title, corpus)
+        size = corpus.nbytes()
+        self._loaded[key] = (corpus, size)
+        self.memory_used += size
+        self._evict()
+        return corpus
+
+    def refresh(self, title: str):
+        """
+        Re-measures a loaded novel after something was attached to it (an
+        evidence engine, more cached states) and evicts others beyond the budget.
+        """
+        key = normalize_title(title)
+        loaded = self._loaded.get(key)
+        if loaded is None:
+            return
+        corpus, old_size = loaded
+        size = corpus.nbytes()
+        self._loaded[key] = (corpus, size)
+        self._loaded.move_to_end(key)
+        self.memory_used += size - old_size
+        self._evict()
+
+    def _evict(self):
+        """Drops least recently used novels until within budget, keeping the latest."""
+        while self.memory_used > self.memory_budget and len(self._loaded) > 1:
+            _, (_, evicted_size) = self._loaded.popitem(last=False)
+            self.memory_used -= evicted_size
+            self.evictions += 1
+
+    def unload(self):
+        """Drops every loaded novel."""
+        self._loaded.clear()
+        self.memory_used = 0
@@ -0,0 +1,164 @@
+"""
+Offset-based segmentation of one shared text buffer.
+
+Novels are memory-mapped and decoded once. Paragraphs, sentences and
+overlapping word windows are then described by (start, end) offset arrays
+into that buffer, and text is only sliced out when it is actually needed.
+"""
+
+import mmap
+import os
+import re
+from array import array
+from contextlib import contextmanager
+from typing import Iterator, List, Sequence, Tuple
+
+
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_newlines(text: str) -> str:
+    """Translates CRLF and CR line endings to LF, like text-mode open()."""
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def decode_text(buffer, encoding: str = "utf-8") -> str:
+    """Decodes a bytes-like buffer with universal newlines."""
+    return normalize_newlines(str(buffer, encoding))
+
+
+@contextmanager
+def map_file(path: str):
+    """Read-only memory map of a file (an empty bytes object for empty files)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def load_text(path: str, encoding: str = "utf-8") -> str:
+    """
+    Reads a text file through a memory map, decoding it straight from the
+    mapped pages instead of an intermediate bytes copy.
+    """
+    with map_file(path) as mapped:
+        return decode_text(mapped, encoding)
+
+
+def strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Narrows text[start:end] to its str.strip() result."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def paragraph_spans(text: str) -> Tuple[array, array]:
+    """
+    Offsets of the stripped, non-empty chunks of ``text.split('\\n\\n')``.
+    """
+    starts, ends = array("Q"), array("Q")
+    pos = 0
+    length = len(text)
+    while pos <= length:
+        split = text.find("\n\n", pos)
+        if split == -1:
+            split = length
+        start, end = strip_span(text, pos, split)
+        if start < end:
+            starts.append(start)
+            ends.append(end)
+        pos = split + 2
+    return starts, ends
+
+
+def sentence_spans(text: str, start: int = 0, end: int = None) -> List[Tuple[int, int]]:
+    """
+    Offsets of the stripped, non-empty sentences of text[start:end], split after
+    sentence-ending punctuation, without slicing the chunk.
+    """
+    start, end = strip_span(text, start, len(text) if end is None else end)
+    spans = []
+    pos = start
+    for match in _SENTENCE_BREAK.finditer(text, start, end):
+        spans.append(strip_span(text, pos, match.start()))
+        pos = match.end()
+    spans.append(strip_span(text, pos, end))
+    return [(s, e) for s, e in spans if s < e]
+
+
+def normalize_whitespace(text: str, block_size: int = 1 << 16) -> str:
+    """
+    Equivalent to ``' '.join(text.split())``, but splits one block at a time so
+    the full word list is never built.
+    """
+    pieces = []
+    start = 0
+    while start < len(text):
+        # Cut blocks at whitespace so no word straddles two blocks
+        match = _WHITESPACE.search(text, start + block_size)
+        end = match.start() if match else len(text)
+        piece = " ".join(text[start:end].split())
+        if piece:
+            pieces.append(piece)
+        start = end
+    return " ".join(pieces)
+
+
+def word_window_spans(text: str, window: int, stride: int) -> Tuple[array, array]:
+    """
+    Offsets of overlapping windows of ``window`` words, starting every
+    ``stride`` words, over whitespace-normalized text (single spaces).
+    """
+    word_starts = array("Q", [0] if text else [])
+    pos = text.find(" ")
+    while pos != -1:
+        word_starts.append(pos + 1)
+        pos = text.find(" ", pos + 1)
+
+    starts, ends = array("Q"), array("Q")
+    num_words = len(word_starts)
+    for i in range(0, num_words, stride):
+        last = i + window
+        starts.append(word_starts[i])
+        ends.append(word_starts[last] - 1 if last < num_words else len(text))
+    return starts, ends
+
+
+class Segments(Sequence[str]):
+    """
+    Read-only sequence of ``text[starts[i]:ends[i]]`` slices, made on access.
+    """
+
+    def __init__(self, text: str, starts: array, ends: array):
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return self.text[self.starts[i]:self.ends[i]]
+
+    def __iter__(self) -> Iterator[str]:
+        text = self.text
+        for start, end in zip(self.starts, self.ends):
+            yield text[start:end]
+
+    def span_length(self, i: int) -> int:
+        return self.ends[i] - self.starts[i]
+
+    def select(self, positions: Sequence[int]) -> "Segments":
+        """The sub-sequence at the given positions, sharing the buffer."""
+        return Segments(self.text,
+                        array("Q", (self.starts[p] for p in positions)),
+                        array("Q", (self.ends[p] for p in positions)))
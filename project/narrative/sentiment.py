@@ -1,13 +1,44 @@
 """
 Sentiment analysis module using NLTK VADER.
 Provides robust polarity detection for narrative text.
+
+Two interchangeable backends compute the VADER compound score:
+    "vader"    NLTK's SentimentIntensityAnalyzer (default)
+    "lexicon"  narrative.lexicon_sentiment's NumPy engine, which matches
+               NLTK's compound score and scores batches much faster
+The backend is picked with SentimentAnalyzer.set_backend (this process only;
+the batch runner passes it on to its pool workers), else from the
+KDSH_SENTIMENT_BACKEND environment variable.
+
+Neither NLTK nor NumPy is imported until the first sentence has to be scored,
+and the lexicon is read from disk (see narrative.vader_data), never downloaded.
 """
 
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from instrumentation import count
+from narrative.vader_data import nltk_resource, read_vader_lexicon, require_vader_lexicon
+
+BACKENDS = ("vader", "lexicon")
+BACKEND_ENV_VAR = "KDSH_SENTIMENT_BACKEND"
+
+# Set by SentimentAnalyzer.set_backend; takes precedence over the environment
+_selected_backend: Optional[str] = None
+
+
+def selected_backend() -> str:
+    """The backend the next SentimentAnalyzer() uses."""
+    return _selected_backend or os.environ.get(BACKEND_ENV_VAR, "vader")
+
 
 class SentimentAnalyzer:
     _instance = None
+    # Standard VADER threshold: compound scores at or below this are negative
+    NEGATIVE_THRESHOLD = -0.05
+    # Maximum number of memoized compound scores
+    CACHE_SIZE = 65536
     
     def __new__(cls):
         if cls._instance is None:
@@ -15,22 +46,140 @@ class SentimentAnalyzer:
             cls._instance._initialize()
         return cls._instance
     
+    @classmethod
+    def set_backend(cls, backend: str):
+        """Selects the scoring backend; takes effect for the next SentimentAnalyzer()."""
+        global _selected_backend
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown sentiment backend: {backend}")
+        _selected_backend = backend
+        cls._instance = None
+    
     def _initialize(self):
-        """Initialize NLTK resources"""
-        try:
-            nltk.data.find('sentiment/vader_lexicon.zip')
-        except LookupError:
-            nltk.download('vader_lexicon', quiet=True)
-            
-        self.sia = SentimentIntensityAnalyzer()
+        """Checks the backend and lexicon; the scorer itself is built on first use."""
+        self.backend = selected_backend()
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown sentiment backend: {self.backend}")
+        
+        # Fail at startup, not mid-batch, when the lexicon is not installed
+        self.lexicon_path = require_vader_lexicon()
+        self.engine = None
+        self.sia = None
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get_compound(self, text: str) -> float:
+        """
+        Returns the VADER compound score, memoized in a bounded LRU cache.
+        """
+        cache = self._cache
+        if text in cache:
+            self.hits += 1
+            count("sentiment_cache_hits")
+            cache.move_to_end(text)
+            return cache[text]
+        self.misses += 1
+        count("sentiment_scored")
+        compound = self._score([text])[0]
+        self._store(text, compound)
+        return compound
+    
+    def warm_up(self):
+        """Builds the scorer now instead of at the first cache miss."""
+        if self.engine is None and self.sia is None:
+            self._load_backend()
+    
+    def _load_backend(self):
+        if self.backend == "lexicon":
+            from narrative.lexicon_sentiment import LexiconSentimentEngine, parse_vader_lexicon
+            lexicon_text = read_vader_lexicon(self.lexicon_path)
+            self.engine = LexiconSentimentEngine(parse_vader_lexicon(lexicon_text))
+        else:
+            import nltk.data
+            from nltk.sentiment.vader import SentimentIntensityAnalyzer
+            # NLTK only loads resources from its search path, so the directory of
+            # the file found is searched first while the analyzer reads it
+            root, resource = nltk_resource(self.lexicon_path)
+            nltk.data.path.insert(0, root)
+            try:
+                self.sia = SentimentIntensityAnalyzer(lexicon_file=f"nltk:{resource}")
+            finally:
+                nltk.data.path.remove(root)
+    
+    def _score(self, texts: List[str]) -> List[float]:
+        """Uncached compound scores from the active backend."""
+        if not texts:
+            return []
+        self.warm_up()
+        if self.backend == "lexicon":
+            return self.engine.compound_scores(texts)
+        return [self.sia.polarity_scores(text)['compound'] for text in texts]
+    
+    def _store(self, text: str, compound: float):
+        cache = self._cache
+        cache[text] = compound
+        if len(cache) > self.CACHE_SIZE:
+            cache.popitem(last=False)
+    
+    def label(self, compound: float) -> str:
+        """Maps a compound score to 'positive' or 'negative'."""
+        if compound <= self.NEGATIVE_THRESHOLD:
+            return 'negative'
+        return 'positive'  # Default for neutral/positive
         
     def get_polarity(self, text: str) -> str:
         """
         Returns 'positive' or 'negative' based on VADER compound score.
         Threshold is -0.05 for negative.
         """
-        scores = self.sia.polarity_scores(text)
-        # Standard VADER threshold
-        if scores['compound'] <= -0.05:
-            return 'negative'
-        return 'positive'  # Default for neutral/positive
+        return self.label(self.get_compound(text))
+    
+    def get_compounds(self, texts: List[str]) -> List[float]:
+        """
+        Batch version of get_compound. Duplicate texts are scored once and all
+        cache misses go to the backend in a single call.
+        """
+        cache = self._cache
+        scores = {}
+        missing = []
+        hits = self.hits
+        for text in texts:
+            if text in scores:
+                self.hits += 1
+            elif text in cache:
+                self.hits += 1
+                cache.move_to_end(text)
+                scores[text] = cache[text]
+            else:
+                self.misses += 1
+                scores[text] = None
+                missing.append(text)
+        count("sentiment_cache_hits", self.hits - hits)
+        count("sentiment_scored", len(missing))
+        for text, compound in zip(missing, self._score(missing)):
+            scores[text] = compound
+            self._store(text, compound)
+        return [scores[text] for text in texts]
+    
+    def get_polarities(self, texts: List[str]) -> List[str]:
+        """
+        Batch version of get_polarity. Duplicate texts are scored once.
+        """
+        return [self.label(c) for c in self.get_compounds(texts)]
+    
+    def cache_info(self) -> Dict[str, float]:
+        """Hit/miss counters of the polarity cache."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._cache),
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+    
+    def clear_cache(self):
+        """Drops memoized scores and resets the counters."""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
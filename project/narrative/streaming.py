@@ -0,0 +1,48 @@
+"""
+Streaming chunk -> experience -> state pipeline.
+
+Unlike AnnotatedNovel, nothing is materialized up front: chunks are read
+lazily (optionally from a file handle), experiences are extracted one chunk at
+a time and folded into a running state. Memory stays bounded by one chunk plus
+the running CharacterState, and callers can observe the state as chapters
+stream past.
+"""
+
+from typing import Iterable, Iterator, TextIO, Tuple, Union
+
+from constraints.schema import CharacterState
+from constraints.updater import ConstraintUpdater, StateAccumulator
+from narrative.chunker import NarrativeChunker
+from narrative.experience_detector import ExperienceDetector
+
+
+def stream_states(source: Union[str, TextIO], character_name: str = "",
+                  aliases: Iterable[str] = (), chunker: NarrativeChunker = None,
+                  detector: ExperienceDetector = None,
+                  updater: ConstraintUpdater = None) -> Iterator[Tuple[int, StateAccumulator]]:
+    """
+    Yields (chapter_id, running state) after each chapter that mentions the
+    character (or one of its aliases) and contains experiences. Chapters are
+    numbered among the mentioning chunks, as in the per-row pipeline.
+    """
+    chunker = chunker or NarrativeChunker()
+    detector = detector or ExperienceDetector()
+    updater = updater or ConstraintUpdater()
+
+    needles = [n.lower() for n in [character_name, *aliases]]
+    chunks = (
+        chunk for chunk in chunker.iter_chunks(source)
+        if any(n in chunk.lower() for n in needles)
+    )
+    return updater.iter_states(detector.iter_experiences(chunks))
+
+
+def stream_character_state(source: Union[str, TextIO], character_name: str = "",
+                           aliases: Iterable[str] = (), **components) -> CharacterState:
+    """
+    Runs the streaming pipeline to the end and returns the final state.
+    """
+    accumulator = StateAccumulator()
+    for _, accumulator in stream_states(source, character_name, aliases, **components):
+        pass
+    return accumulator.to_state()
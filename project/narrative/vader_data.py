@@ -0,0 +1,86 @@
+"""
+Offline lookup of the VADER lexicon without importing NLTK.
+
+Importing ``nltk`` costs over a second, and a missing resource used to trigger
+``nltk.download`` in the middle of a batch. The lexicon is instead located
+directly: an explicit file from KDSH_VADER_LEXICON (a vendored
+vader_lexicon.txt or NLTK's vader_lexicon.zip), else the copy pre-installed in
+one of NLTK's standard data directories. When none exists, lookup fails at
+once with instructions rather than going to the network.
+"""
+
+import os
+import sys
+import zipfile
+from typing import List, Optional, Tuple
+
+LEXICON_ENV_VAR = "KDSH_VADER_LEXICON"
+LEXICON_RESOURCE = os.path.join("sentiment", "vader_lexicon.zip")
+_ZIP_MEMBER = "vader_lexicon/vader_lexicon.txt"
+
+
+def nltk_data_dirs() -> List[str]:
+    """The directories nltk.data.path searches by default, in the same order."""
+    dirs = [d for d in os.environ.get("NLTK_DATA", "").split(os.pathsep) if d]
+    home = os.path.expanduser("~/")
+    if home != "~/":
+        dirs.append(os.path.join(home, "nltk_data"))
+    dirs += [
+        os.path.join(sys.prefix, "nltk_data"),
+        os.path.join(sys.prefix, "share", "nltk_data"),
+        os.path.join(sys.prefix, "lib", "nltk_data"),
+    ]
+    if sys.platform.startswith("win"):
+        dirs += [os.path.join(os.environ.get("APPDATA", "C:\\"), "nltk_data"),
+                 "C:\\nltk_data", "D:\\nltk_data", "E:\\nltk_data"]
+    else:
+        dirs += ["/usr/share/nltk_data", "/usr/local/share/nltk_data",
+                 "/usr/lib/nltk_data", "/usr/local/lib/nltk_data"]
+    return dirs
+
+
+def find_vader_lexicon() -> Optional[str]:
+    """Path of the lexicon file (.txt or .zip) to use, or None if there is none."""
+    override = os.environ.get(LEXICON_ENV_VAR)
+    if override:
+        return override if os.path.exists(override) else None
+    for data_dir in nltk_data_dirs():
+        path = os.path.join(data_dir, LEXICON_RESOURCE)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def require_vader_lexicon() -> str:
+    """Like find_vader_lexicon, but raises LookupError with setup instructions."""
+    path = find_vader_lexicon()
+    if path is None:
+        where = os.environ.get(LEXICON_ENV_VAR) or "any NLTK data directory"
+        raise LookupError(
+            f"VADER lexicon not found in {where}. Install it once with "
+            f"`python -m nltk.downloader vader_lexicon`, or point {LEXICON_ENV_VAR} "
+            f"at a vader_lexicon.txt / vader_lexicon.zip file."
+        )
+    return path
+
+
+def nltk_resource(path: str) -> Tuple[str, str]:
+    """
+    (directory, resource name) under which nltk.data.load finds the lexicon
+    file at `path`, e.g. ("/x/sentiment", "vader_lexicon.zip/vader_lexicon/vader_lexicon.txt").
+    """
+    root, name = os.path.split(os.path.abspath(path))
+    if zipfile.is_zipfile(path):
+        name = f"{name}/{_ZIP_MEMBER}"
+    return root, name
+
+
+def read_vader_lexicon(path: str = None) -> str:
+    """Raw lexicon text, as nltk.data.load returns it."""
+    path = path or require_vader_lexicon()
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            return archive.read(_ZIP_MEMBER).decode("utf-8")
+    # Keep line endings as they are, like nltk.data.load does
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.read().rstrip("\r\n")
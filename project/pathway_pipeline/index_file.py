@@ -0,0 +1,332 @@
+"""
+Flat-array file format for PathwayVectorStore indexes.
+
+An index file is
+
+    MAGIC | header length (uint32) | JSON header | 8-byte aligned array blocks...
+
+with blocks for the document text (one UTF-8 buffer plus byte and character
+offsets per chunk), document ids, vocabulary, CSR postings (per-term offsets,
+document positions, TF weights, BM25 impacts), per-term IDF and BM25 upper
+bounds, and per-document norms and lengths.
+
+load_index() maps the file read-only and wraps the blocks in NumPy views, so
+any number of processes loading the same file share one copy of the pages.
+The loaded MappedVectorIndex answers search(), search_within() and
+documents_mentioning() with the same results as the store it was saved from;
+it cannot be extended.
+"""
+
+import json
+import mmap as _mmap
+import os
+import struct
+import sys
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from narrative.mentions import MentionIndex
+from narrative.segmenter import Segments
+from pathway_pipeline.vector_store import PathwayVectorStore
+
+
+MAGIC = b"KDVI"
+INDEX_VERSION = 1
+_ALIGN = 8
+
+# name -> numpy dtype of each array block
+_BLOCK_DTYPES = {
+    "text": "u1",
+    "doc_ids": "u1",
+    "vocabulary": "u1",
+    "byte_starts": "<u8",
+    "byte_ends": "<u8",
+    "char_starts": "<u8",
+    "char_ends": "<u8",
+    "term_offsets": "<u8",
+    "posting_docs": "<u4",
+    "posting_tf": "<f8",
+    "posting_bm25": "<f8",
+    "idf": "<f8",
+    "bm25_max_impact": "<f8",
+    "doc_norms": "<f8",
+    "tfidf_norms": "<f8",
+    "doc_lengths": "<u4",
+}
+
+
+def _byte_offsets(text: str, char_offsets: Sequence[int]) -> List[int]:
+    """UTF-8 byte offset of each character offset into text."""
+    order = sorted(range(len(char_offsets)), key=lambda i: char_offsets[i])
+    result = [0] * len(char_offsets)
+    prev_char = prev_byte = 0
+    for i in order:
+        offset = char_offsets[i]
+        prev_byte += len(text[prev_char:offset].encode("utf-8"))
+        prev_char = offset
+        result[i] = prev_byte
+    return result
+
+
+def _joined(values: Iterable[str], what: str) -> bytes:
+    values = list(values)
+    if any("\n" in v for v in values):
+        raise ValueError(f"{what} must not contain newlines")
+    return "\n".join(values).encode("utf-8")
+
+
+def save_index(store, path: str) -> str:
+    """Writes a PathwayVectorStore to path (atomically) and returns the path."""
+    import numpy as np
+
+    store.prepare()
+    texts = store.documents.texts
+    if isinstance(texts, Segments):
+        buffer, char_starts, char_ends = texts.text, list(texts.starts), list(texts.ends)
+    else:
+        buffer = "".join(texts)
+        char_starts, char_ends, pos = [], [], 0
+        for text in texts:
+            char_starts.append(pos)
+            pos += len(text)
+            char_ends.append(pos)
+
+    terms = list(store.postings)
+    term_offsets = [0]
+    posting_docs, posting_tf, posting_bm25 = [], [], []
+    for term in terms:
+        impacts = store._bm25_impacts[term]
+        for pos, weight in store.postings[term]:
+            posting_docs.append(pos)
+            posting_tf.append(weight)
+            posting_bm25.append(impacts[pos])
+        term_offsets.append(len(posting_docs))
+
+    columns = {
+        "text": buffer.encode("utf-8"),
+        "doc_ids": _joined(store.documents.doc_ids, "Document ids"),
+        "vocabulary": _joined(terms, "Terms"),
+        "byte_starts": _byte_offsets(buffer, char_starts),
+        "byte_ends": _byte_offsets(buffer, char_ends),
+        "char_starts": char_starts,
+        "char_ends": char_ends,
+        "term_offsets": term_offsets,
+        "posting_docs": posting_docs,
+        "posting_tf": posting_tf,
+        "posting_bm25": posting_bm25,
+        "idf": [store.idf[t] for t in terms],
+        "bm25_max_impact": [store._bm25_max_impact[t] for t in terms],
+        "doc_norms": store.doc_norms,
+        "tfidf_norms": store.tfidf_norms,
+        "doc_lengths": store.doc_lengths,
+    }
+
+    payload, blocks, offset = [], [], 0
+    for name, dtype in _BLOCK_DTYPES.items():
+        column = columns[name]
+        data = column if isinstance(column, bytes) else np.asarray(column, dtype=dtype).tobytes()
+        padding = -len(data) % _ALIGN
+        payload.append(data + b"\0" * padding)
+        blocks.append([name, len(data), offset])
+        offset += len(data) + padding
+
+    header = json.dumps({
+        "version": INDEX_VERSION,
+        "num_docs": len(store.documents),
+        "num_terms": len(terms),
+        "k1": store.k1,
+        "b": store.b,
+        "blocks": blocks,
+    }).encode()
+    # Pad the header so the first block starts aligned
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % _ALIGN)
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for data in payload:
+            f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_index(path: str, mmap: bool = True) -> "MappedVectorIndex":
+    """
+    Opens an index file. With mmap the arrays are views of a shared read-only
+    mapping; otherwise the file is read into private memory.
+    """
+    import numpy as np
+
+    with open(path, "rb") as f:
+        if mmap:
+            buffer = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+        else:
+            buffer = f.read()
+    if buffer[:4] != MAGIC:
+        raise ValueError("Not a vector index file")
+    (header_len,) = struct.unpack_from("<I", buffer, 4)
+    header = json.loads(bytes(buffer[8:8 + header_len]))
+    if header["version"] != INDEX_VERSION:
+        raise ValueError("Vector index version mismatch")
+
+    base = 8 + header_len
+    arrays = {}
+    for name, size, offset in header["blocks"]:
+        dtype = np.dtype(_BLOCK_DTYPES[name])
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=size // dtype.itemsize,
+                                     offset=base + offset)
+    if len(arrays["doc_norms"]) != header["num_docs"]:
+        raise ValueError("Truncated vector index file")
+    return MappedVectorIndex(buffer, header, arrays)
+
+
+class _MappedDocuments(Sequence[Tuple[str, str]]):
+    """(doc_id, text) pairs decoded from the mapped text buffer on access."""
+
+    def __init__(self, doc_ids: List[str], text, starts, ends):
+        self.doc_ids = doc_ids
+        self._text = text
+        self._starts = starts
+        self._ends = ends
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self[i] for i in range(*pos.indices(len(self)))]
+        start, end = int(self._starts[pos]), int(self._ends[pos])
+        return self.doc_ids[pos], self._text[start:end].tobytes().decode("utf-8")
+
+
+class MappedVectorIndex:
+    """Read-only PathwayVectorStore over the arrays of an index file."""
+
+    SCORING_MODES = PathwayVectorStore.SCORING_MODES
+    # Query processing is shared with the store so query weights match exactly
+    _tokenize = PathwayVectorStore._tokenize
+    _count_terms = PathwayVectorStore._count_terms
+    _compute_tf = PathwayVectorStore._compute_tf
+    _norm = staticmethod(PathwayVectorStore._norm)
+
+    def __init__(self, buffer, header: Dict, arrays: Dict):
+        self._buffer = buffer
+        self.k1, self.b = header["k1"], header["b"]
+        self.num_docs = header["num_docs"]
+        for name, values in arrays.items():
+            setattr(self, name, values)
+        vocabulary = self.vocabulary.tobytes().decode("utf-8")
+        self.term_ids = {t: i for i, t in enumerate(vocabulary.split("\n"))} if vocabulary else {}
+        doc_ids = self.doc_ids.tobytes().decode("utf-8")
+        self.documents = _MappedDocuments(doc_ids.split("\n") if self.num_docs else [],
+                                          self.text, self.byte_starts, self.byte_ends)
+        self._mentions = None
+
+    def __len__(self):
+        return self.num_docs
+
+    def nbytes(self) -> int:
+        """
+        Approximate memory of the index: the whole file (mapped pages count
+        once resident, though the page cache shares them between processes)
+        plus the term and document id tables.
+        """
+        return (len(self._buffer) + sys.getsizeof(self.term_ids)
+                + sys.getsizeof(self.documents.doc_ids))
+
+    def _query(self, query: str, scoring: str) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """(query TF, per-term weights) exactly as PathwayVectorStore computes them."""
+        if scoring not in self.SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode: {scoring}")
+        query_tf = self._compute_tf(self._tokenize(query))
+        if scoring == "tf":
+            weights = query_tf
+        elif scoring == "tfidf":
+            weights = {t: w * float(self.idf[self.term_ids[t]]) ** 2
+                       for t, w in query_tf.items() if t in self.term_ids}
+        else:
+            weights = {t: 1.0 for t in query_tf if t in self.term_ids}
+        return query_tf, weights
+
+    def _query_norm(self, query_tf: Dict[str, float], scoring: str) -> float:
+        if scoring == "tf":
+            return self._norm(query_tf)
+        return sum((w * float(self.idf[self.term_ids[t]])) ** 2
+                   for t, w in query_tf.items() if t in self.term_ids) ** 0.5
+
+    def _postings(self, term: str, scoring: str):
+        t = self.term_ids[term]
+        start, end = int(self.term_offsets[t]), int(self.term_offsets[t + 1])
+        values = self.posting_bm25 if scoring == "bm25" else self.posting_tf
+        return self.posting_docs[start:end], values[start:end]
+
+    def _top_k(self, positions, scores, top_k: int) -> List[Tuple[str, str, float]]:
+        """Highest scores first, ties in document order."""
+        import numpy as np
+
+        order = np.lexsort((positions, -scores))[:top_k]
+        return [(*self.documents[int(positions[i])], float(scores[i])) for i in order]
+
+    def search(self, query: str, top_k: int = 5, scoring: str = "tf") -> List[Tuple[str, str, float]]:
+        """Same results as PathwayVectorStore.search on the saved store."""
+        import numpy as np
+
+        query_tf, weights = self._query(query, scoring)
+        dots = np.zeros(self.num_docs)
+        matched = np.zeros(self.num_docs, dtype=bool)
+        terms = [t for t in weights if t in self.term_ids]
+        if scoring == "bm25":
+            # Same summation order as the store's max-score traversal
+            terms.sort(key=lambda t: self.bm25_max_impact[self.term_ids[t]], reverse=True)
+        for term in terms:
+            docs, values = self._postings(term, scoring)
+            dots[docs] += values if scoring == "bm25" else weights[term] * values
+            matched[docs] = True
+
+        positions = np.flatnonzero(matched)
+        scores = dots[positions]
+        if scoring != "bm25":
+            doc_norms = self.doc_norms if scoring == "tf" else self.tfidf_norms
+            denom = self._query_norm(query_tf, scoring) * doc_norms[positions]
+            scores = np.divide(scores, denom, out=np.zeros_like(scores), where=denom > 0)
+        results = self._top_k(positions, scores, top_k)
+
+        # Pad with non-matching documents (score 0) in document order
+        if len(results) < top_k:
+            for pos in np.flatnonzero(~matched)[:top_k - len(results)]:
+                results.append((*self.documents[int(pos)], 0.0))
+        return results
+
+    def search_within(self, query: str, positions: Iterable[int], top_k: int = 5,
+                      scoring: str = "bm25") -> List[Tuple[str, str, float]]:
+        """Same results as PathwayVectorStore.search_within on the saved store."""
+        import numpy as np
+
+        query_tf, weights = self._query(query, scoring)
+        candidates = np.fromiter(positions, dtype=np.int64)
+        dots = np.zeros(len(candidates))
+        for term, weight in weights.items():
+            if term not in self.term_ids:
+                continue
+            docs, values = self._postings(term, scoring)
+            idx = np.searchsorted(docs, candidates)
+            hit = idx < len(docs)
+            hit[hit] = docs[idx[hit]] == candidates[hit]
+            dots[hit] += values[idx[hit]] if scoring == "bm25" else weight * values[idx[hit]]
+
+        if scoring == "bm25":
+            keep = dots > 0
+            scores = dots
+        else:
+            doc_norms = self.doc_norms if scoring == "tf" else self.tfidf_norms
+            denom = self._query_norm(query_tf, scoring) * doc_norms[candidates]
+            keep = (dots > 0) & (denom > 0)
+            scores = np.divide(dots, denom, out=np.zeros_like(dots), where=keep)
+        return self._top_k(candidates[keep], scores[keep], top_k)
+
+    def documents_mentioning(self, name: str, aliases: List[str] = ()) -> List[int]:
+        """Positions of documents mentioning a name or any alias (index built on first use)."""
+        if self._mentions is None:
+            text = self.text.tobytes().decode("utf-8")
+            self._mentions = MentionIndex.from_spans(text, self.char_starts.tolist(),
+                                                     self.char_ends.tolist())
+        return self._mentions.units(name, aliases)
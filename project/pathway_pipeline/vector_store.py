@@ -3,98 +3,490 @@ Pathway-based vector store for semantic retrieval.
 Uses Pathway's streaming data framework for document indexing and similarity search.
 """
 
-import pathway as pw
-from typing import List, Dict, Tuple
+from collections.abc import Mapping
+from typing import Iterable, List, Dict, Sequence, Tuple
 import hashlib
+import heapq
+import json
+import math
+import re
+
+from narrative.mentions import MentionIndex
+from narrative.segmenter import Segments, normalize_whitespace, word_window_spans
+
+
+_TOKEN_RE = re.compile(r'\b[a-z]+\b')
+
+# Measured CPython memory per posting (postings, TF and count dicts, documents)
+# and per cached BM25 impact, for nbytes()
+_BYTES_PER_POSTING = 232
+_BYTES_PER_IMPACT = 80
+
+
+class _Documents(Sequence[Tuple[str, str]]):
+    """(doc_id, text) pairs over parallel id and text sequences."""
+
+    def __init__(self, doc_ids: List[str], texts: Sequence[str]):
+        self.doc_ids = list(doc_ids)
+        self.texts = texts
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self[i] for i in range(*pos.indices(len(self)))]
+        return self.doc_ids[pos], self.texts[pos]
+
+    def extend(self, doc_ids: List[str], texts: Sequence[str]):
+        if not self.doc_ids and isinstance(texts, Segments):
+            # Keep segments lazy until something is appended to them
+            self.texts = texts
+        else:
+            if not isinstance(self.texts, list):
+                self.texts = list(self.texts)
+            self.texts.extend(texts)
+        self.doc_ids.extend(doc_ids)
+
+    def truncate(self, num_docs: int):
+        del self.doc_ids[num_docs:]
+        self.texts = list(self.texts[:num_docs])
+
+
+class _SmoothedIdf(Mapping):
+    """Smoothed IDF of every indexed term, computed from the document frequencies on access."""
+
+    def __init__(self, store: "PathwayVectorStore"):
+        self.store = store
+
+    def __getitem__(self, term: str) -> float:
+        return math.log((1 + len(self.store.documents)) / (1 + self.store.doc_freq[term])) + 1
+
+    def __iter__(self):
+        return iter(self.store.doc_freq)
+
+    def __len__(self):
+        return len(self.store.doc_freq)
 
 
 class PathwayVectorStore:
     """
     Vector store using Pathway framework for semantic document retrieval.
     Implements TF-IDF based similarity for keyword matching.
+
+    Documents are kept in an inverted index (term -> postings of document
+    positions and term frequencies) with pre-computed document norms, so a
+    query only touches documents sharing at least one term with it. An
+    optional SciPy sparse-matrix backend scores all postings in one product.
+
+    Scoring modes:
+        "tf"     cosine similarity of length-normalized term frequencies (default)
+        "tfidf"  cosine similarity of TF weighted by smoothed IDF
+        "bm25"   Okapi BM25; top-k retrieval skips documents that cannot
+                 reach the current k-th score (max-score pruning)
     """
     
-    def __init__(self):
-        self.documents = []
+    SCORING_MODES = ("tf", "tfidf", "bm25")
+    
+    def __init__(self, backend: str = "python", k1: float = 1.5, b: float = 0.75):
+        if backend not in ("python", "sparse"):
+            raise ValueError(f"Unknown backend: {backend}")
+        self.backend = backend
+        self.k1 = k1
+        self.b = b
+        self.documents = _Documents([], [])
         self.doc_vectors = {}
         self.vocabulary = set()
+        self._doc_tfs: List[Dict[str, float]] = []
+        self._term_counts: List[Dict[str, int]] = []
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        self.doc_freq: Dict[str, int] = {}
+        self.idf = _SmoothedIdf(self)
+        self.doc_lengths: List[int] = []
+        self._total_length = 0
+        self.doc_norms: List[float] = []
+        self._tfidf_norms: Dict[int, float] = {}
+        self._bm25_impacts: Dict[str, Dict[int, float]] = {}
+        self._bm25_max_impact: Dict[str, float] = {}
+        self._matrices = {}
+        self._term_ids: Dict[str, int] = {}
+        self._matrices_stale = False
+        self.mentions = MentionIndex([])
+    
+    def config_fingerprint(self) -> str:
+        """Hash of the settings besides the documents that shape the index (BM25 k1/b, tokenizer)."""
+        config = {"k1": self.k1, "b": self.b, "token_pattern": _TOKEN_RE.pattern}
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+    
+    def nbytes(self) -> int:
+        """Approximate memory of the index, from its number of postings and cached impacts."""
+        postings = sum(len(plist) for plist in self.postings.values())
+        impacts = sum(len(impacts) for impacts in self._bm25_impacts.values())
+        return postings * _BYTES_PER_POSTING + impacts * _BYTES_PER_IMPACT
     
     def _tokenize(self, text: str) -> List[str]:
         """Simple tokenization: lowercase and split by whitespace/punctuation."""
-        import re
-        tokens = re.findall(r'\b[a-z]+\b', text.lower())
+        tokens = _TOKEN_RE.findall(text.lower())
         return tokens
     
+    def _count_terms(self, tokens: List[str]) -> Dict[str, int]:
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        return counts
+    
     def _compute_tf(self, tokens: List[str]) -> Dict[str, float]:
         """Compute term frequency."""
-        tf = {}
-        for token in tokens:
-            tf[token] = tf.get(token, 0) + 1
+        tf = self._count_terms(tokens)
         # Normalize by document length
         total = len(tokens) if tokens else 1
         return {k: v / total for k, v in tf.items()}
     
-    def index_documents(self, documents: List[str], doc_ids: List[str] = None):
+    @staticmethod
+    def _norm(vector: Dict[str, float]) -> float:
+        return sum(v**2 for v in vector.values()) ** 0.5
+    
+    def index_documents(self, documents: Sequence[str], doc_ids: List[str] = None):
         """
         Index documents into the vector store.
         Uses Pathway's table abstraction for streaming data.
+        Segments are kept as offsets and only sliced when a result is returned.
+        """
+        self.documents = _Documents([], [])
+        self.doc_vectors = {}
+        self.vocabulary = set()
+        self.postings = {}
+        self.doc_freq = {}
+        self.doc_lengths = []
+        self._total_length = 0
+        self.doc_norms = []
+        self._doc_tfs = []
+        self._term_counts = []
+        return self.add_documents(documents, doc_ids)
+    
+    def add_documents(self, documents: Sequence[str], doc_ids: List[str] = None) -> int:
+        """
+        Appends documents to the index. Only the new documents are tokenized
+        and scanned for mentions; the document frequencies and postings of
+        their terms are updated in place.
         """
         if doc_ids is None:
             doc_ids = [hashlib.md5(doc.encode()).hexdigest()[:8] for doc in documents]
         
-        self.documents = list(zip(doc_ids, documents))
+        start = len(self.documents)
+        self.documents.extend(doc_ids, documents)
         
-        # Build vocabulary and compute TF vectors
-        for doc_id, doc in self.documents:
+        # Build vocabulary, TF vectors and postings of the new documents
+        for pos, (doc_id, doc) in enumerate(zip(doc_ids, documents), start):
             tokens = self._tokenize(doc)
             self.vocabulary.update(tokens)
-            self.doc_vectors[doc_id] = self._compute_tf(tokens)
+            tf = self._compute_tf(tokens)
+            self.doc_vectors[doc_id] = tf
+            self._doc_tfs.append(tf)
+            self.doc_lengths.append(len(tokens))
+            self._total_length += len(tokens)
+            self._term_counts.append(self._count_terms(tokens))
+            self.doc_norms.append(self._norm(tf))
+            for term, weight in tf.items():
+                self.postings.setdefault(term, []).append((pos, weight))
+                self.doc_freq[term] = self.doc_freq.get(term, 0) + 1
         
+        if start:
+            self.mentions.extend(self.documents.texts[start:])
+        else:
+            self._index_mentions()
+        self._invalidate_weights()
+        return len(self.documents)
+    
+    def truncate(self, num_docs: int) -> int:
+        """
+        Drops every document from position `num_docs` on, e.g. before
+        re-adding the changed tail of a growing novel.
+        """
+        if num_docs >= len(self.documents):
+            return len(self.documents)
+        # Postings are in document order, so dropped entries are at the ends
+        for term in list(self.postings):
+            plist = self.postings[term]
+            while plist and plist[-1][0] >= num_docs:
+                plist.pop()
+            if not plist:
+                del self.postings[term]
+        self.documents.truncate(num_docs)
+        del self._doc_tfs[num_docs:]
+        del self.doc_norms[num_docs:]
+        self._total_length -= sum(self.doc_lengths[num_docs:])
+        del self.doc_lengths[num_docs:]
+        del self._term_counts[num_docs:]
+        self.vocabulary = set(self.postings)
+        self.doc_freq = {term: len(plist) for term, plist in self.postings.items()}
+        self.doc_vectors = dict(zip(self.documents.doc_ids, self._doc_tfs))
+        self.mentions.truncate(num_docs)
+        self._invalidate_weights()
         return len(self.documents)
     
-    def search(self, query: str, top_k: int = 5) -> List[Tuple[str, str, float]]:
+    def _index_mentions(self):
+        texts = self.documents.texts
+        if isinstance(texts, Segments):
+            self.mentions = MentionIndex.from_spans(texts.text, texts.starts, texts.ends)
+        else:
+            self.mentions = MentionIndex(texts)
+    
+    def _invalidate_weights(self):
+        """
+        Drops the cached IDF-dependent weights. TF-IDF norms and BM25 impacts
+        depend on the document count (and BM25 on the average length), so
+        every cached one is stale after the corpus changes; they are
+        recomputed on demand for the documents and terms a query touches,
+        which keeps an append proportional to the new documents.
+        """
+        self._tfidf_norms = {}
+        self._bm25_impacts = {}
+        self._bm25_max_impact = {}
+        self._matrices_stale = self.backend == "sparse"
+    
+    def prepare(self):
+        """Computes every IDF-dependent weight now rather than on demand."""
+        for term in self.postings:
+            self._term_impacts(term)
+        for pos in range(len(self.documents)):
+            self._tfidf_norm(pos)
+        if self._matrices_stale:
+            self._matrices = self._build_matrices()
+            self._matrices_stale = False
+    
+    @property
+    def tfidf_norms(self) -> List[float]:
+        return [self._tfidf_norm(pos) for pos in range(len(self.documents))]
+    
+    def _tfidf_norm(self, pos: int) -> float:
+        norm = self._tfidf_norms.get(pos)
+        if norm is None:
+            idf = self.idf
+            norm = sum((w * idf[t]) ** 2 for t, w in self._doc_tfs[pos].items()) ** 0.5
+            self._tfidf_norms[pos] = norm
+        return norm
+    
+    def _term_impacts(self, term: str) -> Dict[int, float]:
+        """Per-posting BM25 contributions of a term (and its upper bound), cached."""
+        impacts = self._bm25_impacts.get(term)
+        if impacts is None:
+            n_docs = len(self.documents)
+            avg_len = self._total_length / n_docs
+            df = self.doc_freq[term]
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            impacts = {}
+            for pos, _ in self.postings[term]:
+                freq = self._term_counts[pos][term]
+                length_norm = 1 - self.b + self.b * self.doc_lengths[pos] / avg_len
+                impacts[pos] = idf * freq * (self.k1 + 1) / (freq + self.k1 * length_norm)
+            self._bm25_impacts[term] = impacts
+            self._bm25_max_impact[term] = max(impacts.values())
+        return impacts
+    
+    def _build_matrices(self):
+        """CSC matrices (documents x terms) of TF weights and BM25 impacts for the sparse backend."""
+        try:
+            import numpy as np
+            from scipy import sparse
+        except ImportError as e:
+            raise ImportError("The sparse backend requires numpy and scipy") from e
+        
+        self._term_ids = {term: i for i, term in enumerate(self.postings)}
+        rows, cols, tf_vals, bm25_vals = [], [], [], []
+        for term, plist in self.postings.items():
+            term_id = self._term_ids[term]
+            impacts = self._term_impacts(term)
+            for pos, weight in plist:
+                rows.append(pos)
+                cols.append(term_id)
+                tf_vals.append(weight)
+                bm25_vals.append(impacts[pos])
+        shape = (len(self.documents), len(self._term_ids))
+        coords = (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))
+        return {
+            "tf": sparse.csc_matrix((np.array(tf_vals), coords), shape=shape),
+            "bm25": sparse.csc_matrix((np.array(bm25_vals), coords), shape=shape),
+        }
+    
+    def _query_weights(self, query_tf: Dict[str, float], scoring: str) -> Dict[str, float]:
+        """Per-term multipliers applied to document TF weights (tf/tfidf) or BM25 impacts."""
+        if scoring == "tf":
+            return query_tf
+        if scoring == "tfidf":
+            # (q_tf * idf) * (d_tf * idf)
+            return {t: w * self.idf[t] ** 2 for t, w in query_tf.items() if t in self.idf}
+        return {t: 1.0 for t in query_tf if t in self.postings}
+    
+    def _query_norm(self, query_tf: Dict[str, float], scoring: str) -> float:
+        if scoring == "tf":
+            return self._norm(query_tf)
+        return sum((w * self.idf[t]) ** 2 for t, w in query_tf.items() if t in self.idf) ** 0.5
+    
+    def _score_postings(self, weights: Dict[str, float]) -> Dict[int, float]:
+        """Accumulate dot products over the postings of the query terms."""
+        accumulators: Dict[int, float] = {}
+        for term, q_weight in weights.items():
+            for pos, d_weight in self.postings.get(term, ()):
+                accumulators[pos] = accumulators.get(pos, 0.0) + q_weight * d_weight
+        return accumulators
+    
+    def _score_bm25(self, terms: List[str], top_k: int) -> Dict[int, float]:
+        """
+        Term-at-a-time BM25 with max-score pruning.
+        Terms are visited by decreasing upper bound. Once the k-th best partial
+        score exceeds what the unvisited terms could still add, no unseen
+        document can enter the top k: from then on only candidates that can
+        still reach the k-th score are kept and updated. Scores of the
+        returned top k are exact.
+        """
+        for term in terms:
+            self._term_impacts(term)
+        terms = sorted(terms, key=lambda t: self._bm25_max_impact[t], reverse=True)
+        remaining = sum(self._bm25_max_impact[t] for t in terms)
+        accumulators: Dict[int, float] = {}
+        pruning = False
+        for term in terms:
+            impacts = self._term_impacts(term)
+            if len(accumulators) >= top_k > 0:
+                kth_best = heapq.nlargest(top_k, accumulators.values())[-1]
+                pruning = pruning or kth_best > remaining
+                if pruning:
+                    accumulators = {
+                        pos: score for pos, score in accumulators.items()
+                        if score + remaining >= kth_best
+                    }
+            if pruning:
+                for pos in accumulators:
+                    impact = impacts.get(pos)
+                    if impact is not None:
+                        accumulators[pos] += impact
+            else:
+                for pos, impact in impacts.items():
+                    accumulators[pos] = accumulators.get(pos, 0.0) + impact
+            remaining -= self._bm25_max_impact[term]
+        return accumulators
+    
+    def _score_sparse(self, weights: Dict[str, float], matrix_name: str) -> Dict[int, float]:
+        """Same dot products as _score_postings via one sparse matrix-vector product."""
+        import numpy as np
+        
+        terms = [t for t in weights if t in self._term_ids]
+        if not terms:
+            return {}
+        cols = self._matrices[matrix_name][:, [self._term_ids[t] for t in terms]]
+        dots = cols @ np.array([weights[t] for t in terms])
+        matched = np.unique(cols.indices)
+        return {int(pos): float(dots[pos]) for pos in matched}
+    
+    def search(self, query: str, top_k: int = 5, scoring: str = "tf") -> List[Tuple[str, str, float]]:
         """
         Search for documents similar to query.
         Returns list of (doc_id, doc_text, score) tuples.
         """
+        if scoring not in self.SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode: {scoring}")
+        if self._matrices_stale:
+            self.prepare()
         query_tokens = self._tokenize(query)
         query_tf = self._compute_tf(query_tokens)
+        weights = self._query_weights(query_tf, scoring)
         
-        scores = []
-        for doc_id, doc_text in self.documents:
-            doc_tf = self.doc_vectors.get(doc_id, {})
-            
-            # Compute cosine similarity using shared terms
-            shared_terms = set(query_tf.keys()) & set(doc_tf.keys())
-            if not shared_terms:
-                score = 0.0
+        use_sparse = self.backend == "sparse" and self._matrices
+        if scoring == "bm25":
+            if use_sparse:
+                dots = self._score_sparse(weights, "bm25")
             else:
-                dot_product = sum(query_tf[t] * doc_tf[t] for t in shared_terms)
-                query_norm = sum(v**2 for v in query_tf.values()) ** 0.5
-                doc_norm = sum(v**2 for v in doc_tf.values()) ** 0.5
-                score = dot_product / (query_norm * doc_norm) if query_norm * doc_norm > 0 else 0
-            
-            scores.append((doc_id, doc_text, score))
+                dots = self._score_bm25(list(weights), top_k)
+            scored = [(score, pos) for pos, score in dots.items()]
+        else:
+            dots = self._score_sparse(weights, "tf") if use_sparse else self._score_postings(weights)
+            # Cosine similarity for documents sharing at least one term
+            query_norm = self._query_norm(query_tf, scoring)
+            doc_norm = self.doc_norms.__getitem__ if scoring == "tf" else self._tfidf_norm
+            scored = []
+            for pos, dot_product in dots.items():
+                denom = query_norm * doc_norm(pos)
+                scored.append((dot_product / denom if denom > 0 else 0, pos))
+        
+        # Heap-based top-k; ties keep document order like a stable sort
+        best = heapq.nlargest(top_k, scored, key=lambda x: (x[0], -x[1]))
+        results = [(self.documents[pos][0], self.documents[pos][1], score) for score, pos in best]
         
-        # Sort by score descending
-        scores.sort(key=lambda x: x[2], reverse=True)
-        return scores[:top_k]
+        # Pad with non-matching documents (score 0) in document order
+        if len(results) < top_k:
+            for pos, (doc_id, doc_text) in enumerate(self.documents):
+                if len(results) >= top_k:
+                    break
+                if pos not in dots:
+                    results.append((doc_id, doc_text, 0.0))
+        return results
     
+    def search_within(self, query: str, positions: Iterable[int], top_k: int = 5,
+                      scoring: str = "bm25") -> List[Tuple[str, str, float]]:
+        """
+        Like search(), but only the documents at `positions` are scored, at a
+        cost of O(query terms x candidates) instead of walking whole postings.
+        Only matching documents (score > 0) are returned.
+        """
+        if scoring not in self.SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode: {scoring}")
+        query_tf = self._compute_tf(self._tokenize(query))
+        weights = self._query_weights(query_tf, scoring)
+
+        scored = []
+        if scoring == "bm25":
+            impacts = [self._term_impacts(t) for t in weights]
+            for pos in positions:
+                score = sum(impact.get(pos, 0.0) for impact in impacts)
+                if score > 0:
+                    scored.append((score, pos))
+        else:
+            query_norm = self._query_norm(query_tf, scoring)
+            doc_norm = self.doc_norms.__getitem__ if scoring == "tf" else self._tfidf_norm
+            for pos in positions:
+                tf = self._doc_tfs[pos]
+                dot_product = sum(w * tf[t] for t, w in weights.items() if t in tf)
+                denom = query_norm * doc_norm(pos)
+                if dot_product > 0 and denom > 0:
+                    scored.append((dot_product / denom, pos))
+
+        best = heapq.nlargest(top_k, scored, key=lambda x: (x[0], -x[1]))
+        return [(self.documents[pos][0], self.documents[pos][1], score) for score, pos in best]
+
     def search_by_keywords(self, keywords: List[str], top_k: int = 10) -> List[Tuple[str, str, float]]:
         """
         Search for documents containing specific keywords.
         Returns documents with highest keyword density.
         """
-        results = []
-        
-        for doc_id, doc_text in self.documents:
-            doc_lower = doc_text.lower()
-            score = sum(1 for kw in keywords if kw.lower() in doc_lower)
-            if score > 0:
-                results.append((doc_id, doc_text, score / len(keywords)))
+        # Count keyword hits per document through the mention index
+        hits: Dict[int, int] = {}
+        for kw in keywords:
+            for pos in self.mentions.units(kw):
+                hits[pos] = hits.get(pos, 0) + 1
         
-        results.sort(key=lambda x: x[2], reverse=True)
-        return results[:top_k]
+        # Ties keep document order like a stable sort
+        best = heapq.nlargest(top_k, hits.items(), key=lambda x: (x[1], -x[0]))
+        return [(self.documents[pos][0], self.documents[pos][1], score / len(keywords))
+                for pos, score in best]
+    
+    def documents_mentioning(self, name: str, aliases: List[str] = ()) -> List[int]:
+        """Positions of documents mentioning a name or any of its aliases, in order."""
+        return self.mentions.units(name, aliases)
+
+    def save(self, path: str) -> str:
+        """Writes the index as flat arrays (see pathway_pipeline.index_file)."""
+        from pathway_pipeline.index_file import save_index
+        return save_index(self, path)
+
+    @staticmethod
+    def load(path: str, mmap: bool = True):
+        """
+        Opens a saved index as a read-only MappedVectorIndex. With mmap the
+        arrays stay in the page cache, shared by every process that loads them.
+        """
+        from pathway_pipeline.index_file import load_index
+        return load_index(path, mmap=mmap)
 
 
 class PathwayDocumentProcessor:
@@ -110,46 +502,44 @@ class PathwayDocumentProcessor:
         Ingest a novel into the Pathway vector store.
         Chunks the text and indexes each chunk.
         """
-        # Create overlapping chunks for better context
-        chunks = []
-        words = novel_text.split()
-        
-        for i in range(0, len(words), chunk_size // 2):
-            chunk = ' '.join(words[i:i + chunk_size])
-            if len(chunk) > 100:  # Skip tiny chunks
-                chunks.append(chunk)
+        # Create overlapping chunks for better context. Windows are offsets into
+        # one whitespace-normalized buffer and are only sliced when read.
+        text = normalize_whitespace(novel_text)
+        starts, ends = word_window_spans(text, chunk_size, chunk_size // 2)
+        windows = Segments(text, starts, ends)
+        chunks = windows.select([i for i in range(len(windows))
+                                 if windows.span_length(i) > 100])  # Skip tiny chunks
         
         # Index chunks
         num_indexed = self.vector_store.index_documents(chunks)
         return num_indexed
     
-    def retrieve_relevant_passages(self, backstory: str, top_k: int = 20) -> List[str]:
+    def retrieve_relevant_passages(self, backstory: str, top_k: int = 20,
+                                   scoring: str = "tf") -> List[str]:
         """
         Retrieve passages from the novel relevant to the backstory.
         Uses semantic similarity to find matching content.
+        The 0.01 score cutoff is calibrated for the default "tf" cosine;
+        "tfidf" and "bm25" are opt-in.
         """
-        results = self.vector_store.search(backstory, top_k=top_k)
+        results = self.vector_store.search(backstory, top_k=top_k, scoring=scoring)
         return [doc_text for _, doc_text, score in results if score > 0.01]
     
-    def retrieve_by_character(self, character_name: str, top_k: int = 50) -> List[str]:
+    def retrieve_by_character(self, character_name: str, top_k: int = 50,
+                              aliases: List[str] = ()) -> List[str]:
         """
-        Retrieve passages mentioning a specific character.
+        Retrieve passages mentioning a specific character (or one of its aliases).
         """
-        results = self.vector_store.search_by_keywords([character_name], top_k=top_k)
-        return [doc_text for _, doc_text, _ in results]
+        positions = self.vector_store.documents_mentioning(character_name, aliases)[:top_k]
+        return [self.vector_store.documents[pos][1] for pos in positions]
 
 
 # Integration with Pathway's streaming tables
-def create_pathway_pipeline(novel_path: str):
+def create_pathway_pipeline(novel_path: str, mode: str = "static"):
     """
     Create a Pathway streaming pipeline for document processing.
-    This demonstrates meaningful Pathway integration.
+    `novel_path` is a novel file or a directory of novels (e.g. "data/"); see
+    PathwayNovelPipeline for how updates to the files are applied incrementally.
     """
-    # Define schema for documents
-    class DocumentSchema(pw.Schema):
-        text: str
-        chunk_id: int
-    
-    # In a production setting, this would read from a streaming source
-    # For hackathon, we demonstrate the pattern
-    return PathwayDocumentProcessor()
+    from pathway_pipeline.live_pipeline import PathwayNovelPipeline
+    return PathwayNovelPipeline(novel_path, mode=mode)
@@ -0,0 +1,157 @@
+"""
+Incremental, resumable result output for the batch runner.
+
+Every finished row is appended to two files as soon as it completes:
+
+    results.jsonl   one JSON object per row, in completion order (the checkpoint)
+    results.csv     story_id,prediction,rationale in input order; a row is
+                    written once every row before it is done, so the finished
+                    file is byte-identical to writing all results at the end
+
+Both files are flushed after every row, so downstream tools can tail them
+while a batch runs, and fsync'd every ``checkpoint_every`` rows or
+``checkpoint_seconds`` seconds and on close. A crash loses at most the rows
+since the last checkpoint.
+
+With ``resume=True`` the JSONL of an earlier run is read back (a torn last
+line is dropped): rows whose story_id it already holds are reported done and
+their results reused, and the CSV is rewritten from them. Rows that failed
+(their checkpoint line carries an ``error``) are not done, so they run again.
+"""
+
+import csv
+import json
+import os
+import time
+from typing import Dict, Iterable, List
+
+
+def _json_default(value):
+    # NumPy scalars from pandas rows
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def read_checkpoint(path: str) -> Dict[str, dict]:
+    """
+    Results of a JSONL checkpoint by str(story_id). A torn last line (a crash
+    mid-write) is cut off the file so appends start on a fresh line.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb+") as f:
+        data = f.read()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            f.truncate(complete)
+    results = {}
+    for line in data[:complete].splitlines():
+        try:
+            result = json.loads(line)
+        except ValueError:
+            continue
+        results[str(result["story_id"])] = result
+    return results
+
+
+class ResultLog:
+    """Ordered CSV + JSONL checkpoint writer for one batch of story ids."""
+
+    FIELDS = ["story_id", "prediction", "rationale"]
+
+    def __init__(self, path: str, story_ids: Iterable, resume: bool = False,
+                 checkpoint_every: int = 10, checkpoint_seconds: float = 5.0):
+        self.path = path
+        self.checkpoint_path = os.path.splitext(path)[0] + ".jsonl"
+        self.story_ids = list(story_ids)
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_seconds = checkpoint_seconds
+        self.counts: Dict[int, int] = {}
+        self.checkpoints = 0
+
+        # 1. Successful results of the previous run, when resuming
+        previous = read_checkpoint(self.checkpoint_path) if resume else {}
+        self._waiting: Dict[int, dict] = {}
+        self.retrying = 0
+        for pos, story_id in enumerate(self.story_ids):
+            result = previous.get(str(story_id))
+            if result is None:
+                continue
+            if result.get("error") is not None:
+                self.retrying += 1
+            else:
+                self._waiting[pos] = result
+        self.resumed = len(self._waiting)
+        self._done = set(self._waiting)
+
+        # 2. Fresh CSV (rebuilt from the checkpoint); the checkpoint is appended to
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._csv_file = open(path, "w", newline="", encoding="utf-8")
+        self._csv = csv.writer(self._csv_file, lineterminator="\n")
+        self._csv.writerow(self.FIELDS)
+        self._jsonl_file = open(self.checkpoint_path, "a" if resume else "w", encoding="utf-8")
+        self._next = 0
+        self._since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+        self._write_ready()
+        self.checkpoint()
+
+    def is_done(self, pos: int) -> bool:
+        return pos in self._done
+
+    def pending(self) -> List[int]:
+        """Positions of the rows still to run, in input order."""
+        return [pos for pos in range(len(self.story_ids)) if pos not in self._done]
+
+    @property
+    def rows_written(self) -> int:
+        return self._next
+
+    def add(self, pos: int, result: dict, error: str = None):
+        """
+        Records the result of row `pos` (results may arrive in any order). A
+        row that failed with `error` is written, but run again on resume.
+        """
+        record = result if error is None else dict(result, error=error)
+        self._jsonl_file.write(json.dumps(record, default=_json_default) + "\n")
+        self._jsonl_file.flush()
+        self._done.add(pos)
+        self._waiting[pos] = result
+        self._write_ready()
+        self._since_checkpoint += 1
+        if (self._since_checkpoint >= self.checkpoint_every
+                or time.monotonic() - self._last_checkpoint >= self.checkpoint_seconds):
+            self.checkpoint()
+
+    def _write_ready(self):
+        """Writes the CSV rows whose predecessors are all written."""
+        while self._next in self._waiting:
+            result = self._waiting.pop(self._next)
+            self._csv.writerow([result[field] for field in self.FIELDS])
+            self.counts[result["prediction"]] = self.counts.get(result["prediction"], 0) + 1
+            self._next += 1
+        self._csv_file.flush()
+
+    def checkpoint(self):
+        """Forces both files to disk."""
+        for f in (self._jsonl_file, self._csv_file):
+            f.flush()
+            os.fsync(f.fileno())
+        self._since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+        self.checkpoints += 1
+
+    def close(self):
+        if self._csv_file.closed:
+            return
+        self.checkpoint()
+        self._jsonl_file.close()
+        self._csv_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -7,73 +7,181 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(__file__))
 
-import pandas as pd
-from narrative.chunker import NarrativeChunker
-from narrative.experience_detector import ExperienceDetector
-from constraints.schema import CharacterState
-from constraints.updater import ConstraintUpdater
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+from narrative.corpus import AnnotatedNovel
+from narrative.feature_store import FeatureStore
+from narrative.registry import CorpusRegistry, normalize_title
+from narrative.segmenter import load_text
+from narrative.streaming import stream_character_state
+from narrative.sentiment import BACKENDS as SENTIMENT_BACKENDS, SentimentAnalyzer, selected_backend
 from backstory.parser import BackstoryParser
+from instrumentation import Recorder, count, profiling, recording, stage
+from result_log import ResultLog
 from constraints.comparator import ConstraintComparator
+from evidence.engine import EvidenceEngine, format_evidence, paragraph_index
 
 
 
-# Map book names to file paths
-NOVEL_PATHS = {
-    "The Count of Monte Cristo": "data/The Count of Monte Cristo.txt",
-    "In Search of the Castaways": "data/In search of the castaways.txt"
-}
+# Paths below are relative to this file, not the working directory
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Library of novels: every *.txt under DATA_DIR, looked up by normalized title
+# ("In search of the castaways.txt" serves "In Search of the Castaways")
+DATA_DIR = os.path.join(PROJECT_DIR, "data")
+
+# Annotated novels kept loaded at once; least recently used ones are dropped
+MEMORY_BUDGET_MB = 2048.0
+
+# Other names a character goes by. A paragraph mentioning any alias counts as
+# mentioning the character, e.g. "Dantès": ["Edmond", "the Count"].
+CHARACTER_ALIASES = {}
+
+# Rows whose `char` columns name the characters precomputed per book
+TRAIN_PATH = os.path.join(PROJECT_DIR, "..", "train.csv")
+TEST_PATH = os.path.join(PROJECT_DIR, "..", "test.csv")
+CHARACTER_SOURCES = [TRAIN_PATH, TEST_PATH]
+RESULTS_PATH = os.path.join(PROJECT_DIR, "results", "results.csv")
+
+# On-disk cache of annotated novels (invalidated by content/keyword changes)
+FEATURE_STORE_DIR = os.path.join(PROJECT_DIR, "cache", "features")
+
+# Saved paragraph indexes for --evidence, memory-mapped and shared by workers
+INDEX_DIR = os.path.join(PROJECT_DIR, "cache", "index")
+
+# Scan of DATA_DIR (sizes, mtimes, hashes) reused by the next run
+MANIFEST_PATH = os.path.join(PROJECT_DIR, "cache", "manifest.json")
 
 # Lowered threshold for better conflict detection
 EVIDENCE_DOMINANCE_THRESHOLD = 0.3  # Was 0.5, now more sensitive
 
 
+_REGISTRY: Optional[CorpusRegistry] = None
+
+
+def configure_registry(data_dir: str = None, memory_budget_mb: float = None,
+                       sentiment_backend: str = None):
+    """
+    Points the library at another directory / budget, and selects the
+    sentiment backend (also a pool initializer).
+    """
+    global DATA_DIR, MEMORY_BUDGET_MB, _REGISTRY
+    DATA_DIR = data_dir or DATA_DIR
+    MEMORY_BUDGET_MB = memory_budget_mb or MEMORY_BUDGET_MB
+    _REGISTRY = None
+    if sentiment_backend:
+        SentimentAnalyzer.set_backend(sentiment_backend)
+
+
+def corpus_registry() -> CorpusRegistry:
+    """The library of novels of this process, created on first use."""
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = CorpusRegistry(DATA_DIR, FeatureStore(FEATURE_STORE_DIR), MANIFEST_PATH,
+                                   MEMORY_BUDGET_MB, prepare=preload_character_states)
+    return _REGISTRY
+
+
 def load_novel(book_name: str) -> str:
     """Load novel text based on book name."""
-    path = NOVEL_PATHS.get(book_name)
+    path = corpus_registry().path_for(book_name)
     if not path or not os.path.exists(path):
         raise FileNotFoundError(f"Novel not found for: {book_name}")
-    with open(path, 'r', encoding='utf-8') as f:
-        return f.read()
+    with stage("load"):
+        return load_text(path)
+
+
+def load_annotated_novel(book_name: str, store: FeatureStore = None) -> AnnotatedNovel:
+    """Load the annotated novel from the feature store, building it on a miss."""
+    path = corpus_registry().path_for(book_name)
+    if not path or not os.path.exists(path):
+        raise FileNotFoundError(f"Novel not found for: {book_name}")
+    store = store or corpus_registry().store
+    with stage("load_features"):
+        return store.load_or_build(path)
+
+
+@lru_cache(maxsize=1)
+def book_characters() -> Dict[str, Dict[str, Tuple[str, ...]]]:
+    """
+    {normalized book title: {character: aliases}} for every character named in
+    CHARACTER_SOURCES, in first-seen order.
+    """
+    import pandas as pd
+
+    characters = {}
+    for path in CHARACTER_SOURCES:
+        if not os.path.exists(path):
+            continue
+        for _, row in pd.read_csv(path).iterrows():
+            name = row.get("char")
+            if isinstance(name, str):
+                characters.setdefault(normalize_title(row["book_name"]), {})[name] = tuple(CHARACTER_ALIASES.get(name, ()))
+    return characters
+
+
+def listed_books() -> List[str]:
+    """Titles of the library's books that train.csv / test.csv name, in library order."""
+    named = book_characters()
+    return [title for title in corpus_registry().titles() if normalize_title(title) in named]
+
+
+def preload_character_states(book_name: str, corpus: AnnotatedNovel) -> AnnotatedNovel:
+    """Build the states of all known characters of a book in one pass over it."""
+    with stage("update"):
+        corpus.character_states(book_characters().get(normalize_title(book_name), {}))
+    return corpus
 
 
 # Configuration
 EVIDENCE_DOMINANCE_THRESHOLD = 0.3  # Tuned for improved recall
 
+# Prediction expected for each train.csv label, and the thresholds --sweep tries
+LABEL_PREDICTIONS = {"consistent": 1, "contradict": 0}
+SWEEP_THRESHOLDS = [round(0.1 * i, 1) for i in range(11)]
+
+
+@lru_cache(maxsize=8)
+def get_annotated_novel(novel_text: str) -> AnnotatedNovel:
+    """Chunk, detect and score a novel once; reused by every row of that book."""
+    return AnnotatedNovel.build(novel_text)
 
-def analyze_single(novel_text, backstory_text, character_name=""):
+
+def analyze_single(novel_text, backstory_text, character_name="", corpus=None):
     """
     Run pipeline for a single backstory.
     Returns dictionary with prediction and rationale.
+    `novel_text` may also be an open text file, which is streamed chunk by chunk.
     """
-    # 1. Chunking
-    chunker = NarrativeChunker()
-    chunks = chunker.chunk_novel(novel_text)
-    
-    # Filter by character name
-    if character_name:
-        chunks = [c for c in chunks if character_name.lower() in c.lower()]
-    
-    # 2. Experience Detection
-    detector = ExperienceDetector()
-    experiences = detector.detect_experiences(chunks)
-    
-    # 3. Update Character State
-    updater = ConstraintUpdater()
-    story_state = CharacterState({}, [])
-    for exp in experiences:
-        story_state = updater.update_state(exp, story_state)
+    aliases = CHARACTER_ALIASES.get(character_name, ())
+    if corpus is None and not isinstance(novel_text, str):
+        # 1-3. Stream chunks -> experiences -> state without materializing the novel
+        with stage("stream"):
+            story_state = stream_character_state(novel_text, character_name, aliases)
+    else:
+        # 1-2. Chunking and Experience Detection (pre-computed once per novel)
+        if corpus is None:
+            corpus = get_annotated_novel(novel_text)
+        
+        # 3. Update Character State from paragraphs mentioning the character
+        with stage("update"):
+            story_state = corpus.character_state(character_name, aliases=aliases)
     
     # 4. Parse Backstory
-    parser = BackstoryParser()
-    backstory_state = parser.parse_backstory(backstory_text)
+    with stage("parse"):
+        parser = BackstoryParser()
+        backstory_state = parser.parse_backstory(backstory_text)
     
     # 5. Compare Constraints
-    comparator = ConstraintComparator()
-    dataset_result = comparator.compare(
-        story_state, 
-        backstory_state,
-        threshold=EVIDENCE_DOMINANCE_THRESHOLD
-    )
+    with stage("compare"):
+        comparator = ConstraintComparator()
+        dataset_result = comparator.compare(
+            story_state, 
+            backstory_state,
+            threshold=EVIDENCE_DOMINANCE_THRESHOLD
+        )
     
     return {
         'prediction': dataset_result['prediction'],
@@ -81,6 +189,39 @@ def analyze_single(novel_text, backstory_text, character_name=""):
     }
 
 
+# Per-book evidence engines (paragraph index + claim -> passage cache)
+def evidence_engine_for(book_name: str, corpus: AnnotatedNovel) -> EvidenceEngine:
+    """
+    The evidence engine of a novel. It is attached to the novel, so the
+    registry counts its index against the memory budget and evicts it with it.
+    """
+    engine = corpus.evidence_engine
+    if engine is None:
+        with stage("evidence_index"):
+            engine = corpus.evidence_engine = EvidenceEngine(
+                corpus, index=paragraph_index(corpus, INDEX_DIR))
+        corpus_registry().refresh(book_name)
+    return engine
+
+
+def analyze_with_evidence(backstory_text, character_name, engine: EvidenceEngine):
+    """
+    Judge a backstory claim by claim against its top-k retrieved passages
+    instead of the whole-novel state. The rationale lists the evidence ids.
+    """
+    with stage("evidence"):
+        result = engine.analyze(backstory_text, character_name,
+                                CHARACTER_ALIASES.get(character_name, ()),
+                                threshold=EVIDENCE_DOMINANCE_THRESHOLD)
+    rationale = _format_rationale(result)
+    if result["evidence"]:
+        rationale += f" Evidence: {format_evidence(result['evidence'])}"
+    return {
+        'prediction': result['prediction'],
+        'rationale': rationale
+    }
+
+
 def _format_rationale(result):
     if result['prediction'] == 1:
         return "No meaningful conflicts. Behavior aligns with backstory constraints."
@@ -100,76 +241,278 @@ def _format_rationale(result):
     return "; ".join(explanations)
 
 
-def main():
+def process_row(row: dict, corpus_for, evidence: bool = False) -> Tuple[dict, Optional[str]]:
+    """
+    Analyze one test row. Errors are captured into the result row instead of
+    aborting the batch; the error message is returned alongside for logging.
+    With `evidence`, the row is judged on retrieved passages only.
+    """
+    story_id = row["id"]
+    try:
+        corpus = corpus_for(row["book_name"])
+        if evidence:
+            engine = evidence_engine_for(row["book_name"], corpus)
+            result = analyze_with_evidence(row["content"], row["char"], engine)
+        else:
+            result = analyze_single(None, row["content"], row["char"], corpus=corpus)
+        return {
+            "story_id": story_id,
+            "prediction": result["prediction"],
+            "rationale": result["rationale"]
+        }, None
+    except Exception as e:
+        return {
+            "story_id": story_id,
+            "prediction": 1,
+            "rationale": f"Error during processing: {str(e)}"
+        }, str(e)
+
+
+def _worker_corpus(book_name: str) -> AnnotatedNovel:
+    """Annotated novels of pool workers, each process keeping its own LRU of them."""
+    return corpus_registry().corpus(book_name)
+
+
+def _process_rows(batch: List[Tuple[int, dict]],
+                  evidence: bool = False) -> List[Tuple[int, dict, Optional[str]]]:
+    """Pool task: analyze a batch of (position, row) pairs from one book."""
+    return [(pos, *process_row(row, _worker_corpus, evidence)) for pos, row in batch]
+
+
+def _book_batches(rows: List[dict], workers: int) -> List[List[Tuple[int, dict]]]:
+    """
+    Group row positions by book, then split each book into at most `workers`
+    contiguous batches so every worker keeps a single novel warm.
+    """
+    by_book = {}
+    for pos, row in enumerate(rows):
+        by_book.setdefault(row["book_name"], []).append((pos, row))
+
+    batches = []
+    for book_rows in by_book.values():
+        size = -(-len(book_rows) // workers)  # ceil division
+        batches.extend(book_rows[i:i + size] for i in range(0, len(book_rows), size))
+    return batches
+
+
+def _print_row_result(result: dict, error: Optional[str]):
+    if error is not None:
+        print(f"    ERROR: {error}")
+    else:
+        pred_label = "CONTRADICT" if result["prediction"] == 0 else "CONSISTENT"
+        print(f"    Prediction: {result['prediction']} ({pred_label})")
+
+
+def run_serial(rows: List[dict],
+               evidence: bool = False) -> Iterator[Tuple[int, dict, Optional[str]]]:
+    """Analyze rows one at a time in this process, yielding (position, result, error)."""
+    # Annotated novels stay loaded (within the memory budget) across rows
+    registry = corpus_registry()
+
+    def corpus_for(book_name):
+        if not registry.is_loaded(book_name):
+            print(f"    Loading novel: {book_name}...")
+        return registry.corpus(book_name)
+
+    for idx, row in enumerate(rows):
+        print(f"\n[{idx+1}/{len(rows)}] ID: {row['id']} | {row['book_name']} | Char: {row['char']}")
+        result, error = process_row(row, corpus_for, evidence)
+        _print_row_result(result, error)
+        yield idx, result, error
+
+
+def run_parallel(rows: List[dict], workers: int,
+                 evidence: bool = False) -> Iterator[Tuple[int, dict, Optional[str]]]:
+    """
+    Analyze rows on a process pool, yielding (position, result, error) as each
+    per-book batch completes. Results are those run_serial gives.
+    """
+    # Build missing feature-store entries (and indexes) once per book, in parallel
+    books = sorted({row["book_name"] for row in rows})
+    corpus_registry().ingest(books, workers, INDEX_DIR if evidence else None)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=configure_registry,
+                             initargs=(DATA_DIR, MEMORY_BUDGET_MB, selected_backend())) as pool:
+        futures = [pool.submit(_process_rows, batch, evidence)
+                   for batch in _book_batches(rows, workers)]
+        for future in as_completed(futures):
+            for pos, result, error in future.result():
+                row = rows[pos]
+                print(f"\n[{pos+1}/{len(rows)}] ID: {row['id']} | {row['book_name']} | Char: {row['char']}")
+                _print_row_result(result, error)
+                yield pos, result, error
+
+
+def sweep_thresholds(train_path: str = TRAIN_PATH,
+                     thresholds: List[float] = SWEEP_THRESHOLDS) -> Dict[str, List[Dict]]:
+    """
+    Accuracy on the labelled rows for every threshold. States are built once
+    and all thresholds are scored in one vectorized call per decision rule:
+    "any" (compare() as used for predictions) and "high" (only conflicts whose
+    strength reaches the threshold).
+    """
+    import pandas as pd
+
+    train_df = pd.read_csv(train_path)
+    parser = BackstoryParser()
+    story_states, backstory_states, labels = [], [], []
+    for _, row in train_df.iterrows():
+        book_name, char = row["book_name"], row["char"]
+        corpus = corpus_registry().corpus(book_name)
+        story_states.append(corpus.character_state(char, CHARACTER_ALIASES.get(char, ())))
+        backstory_states.append(parser.parse_backstory(row["content"]))
+        labels.append(LABEL_PREDICTIONS[row["label"]])
+
+    dimensions = sorted({dim for state in story_states + backstory_states for dim in state.constraints})
+    comparator = ConstraintComparator()
+    return {
+        rule: comparator.threshold_sweep(story_states, backstory_states, labels, thresholds,
+                                         dimensions, require_high=(rule == "high"))
+        for rule in ("any", "high")
+    }
+
+
+def print_sweep(sweep: Dict[str, List[Dict]]):
+    print(f"{'threshold':>9}  " + "  ".join(f"{rule + ' acc':>8}  {rule + ' n0':>7}" for rule in sweep))
+    for rows in zip(*sweep.values()):
+        cells = "  ".join(f"{r['accuracy']:>8.3f}  {r['contradictions']:>7d}" for r in rows)
+        print(f"{rows[0]['threshold']:>9.2f}  {cells}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="KDSH 2026 narrative consistency batch runner")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes (1 = serial)")
+    parser.add_argument("--sentiment-backend", choices=SENTIMENT_BACKENDS, default=None,
+                        help="Polarity scorer: NLTK 'vader' (default) or the NumPy 'lexicon' engine")
+    parser.add_argument("--sweep", action="store_true",
+                        help="Report train.csv accuracy for a grid of thresholds and exit")
+    parser.add_argument("--evidence", action="store_true",
+                        help="Judge each backstory claim on its top-k retrieved passages "
+                             "and list the evidence ids in the rationale")
+    parser.add_argument("--trace", metavar="PATH", default=None,
+                        help="Record stage timings and counters and write them to PATH (.json or .csv)")
+    parser.add_argument("--profile", metavar="PATH", default=None,
+                        help="Run under cProfile and dump the stats to PATH")
+    parser.add_argument("--data-dir", default=None,
+                        help=f"Directory scanned for novels (default: {DATA_DIR})")
+    parser.add_argument("--memory-budget-mb", type=float, default=None,
+                        help=f"Annotated novels kept loaded (default: {MEMORY_BUDGET_MB:.0f} MB)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Keep the rows already done in results/results.jsonl and run the rest, "
+                             "including rows that failed")
+    parser.add_argument("--checkpoint-every", type=int, default=10, metavar="N",
+                        help="fsync the results every N rows (and at least every 5 seconds)")
+    parser.add_argument("--ingest", action="store_true",
+                        help="Annotate (with --evidence, also index) every novel in the data "
+                             "directory on --workers processes, report MB/s and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_registry(args.data_dir, args.memory_budget_mb, args.sentiment_backend)
+
+    if args.ingest:
+        ingest_library(args.workers, args.evidence)
+        return
+
+    if args.sweep:
+        print_sweep(sweep_thresholds())
+        return
+
+    if not (args.trace or args.profile):
+        run_batch(args)
+        return
+
+    # Stages and counters of pool workers are not collected
+    with recording(Recorder(trace=bool(args.trace))) as recorder, profiling(args.profile):
+        run_batch(args)
+    print("\nStage timings:")
+    recorder.print_summary()
+    if args.trace:
+        recorder.write_trace(args.trace)
+        print(f"Trace saved to: {args.trace}")
+    if args.profile:
+        print(f"Profile saved to: {args.profile}")
+
+
+def ingest_library(workers: int = 1, evidence: bool = False) -> Dict[str, float]:
+    """Scan the data directory and build every missing annotation (and index)."""
+    registry = corpus_registry()
+    registry.scan()
+    print(f"Library: {len(registry)} novels in {registry.data_dir}")
+    stats = registry.ingest(workers=workers, index_dir=INDEX_DIR if evidence else None)
+    print(f"Ingested {stats['built']} of {stats['books']} novels "
+          f"({stats['megabytes']:.1f} MB) in {stats['seconds']:.2f}s: "
+          f"{stats['mb_per_s']:.2f} MB/s on {workers} worker(s)")
+    return stats
+
+
+def run_batch(args):
+    """Analyze test.csv and write results/results.csv (plus results.jsonl)."""
+    import pandas as pd
+
     print("=" * 60)
     print("KDSH 2026 - NARRATIVE CONSISTENCY ANALYZER")
     print("Powered by Pathway Streaming Framework")
     print("=" * 60)
     
     # Load test.csv
-    test_path = "../test.csv"
+    test_path = TEST_PATH
     if not os.path.exists(test_path):
         print(f"ERROR: test.csv not found at {test_path}")
         return
     
-    test_df = pd.read_csv(test_path)
+    with stage("read_input"):
+        test_df = pd.read_csv(test_path)
     print(f"\nLoaded {len(test_df)} test samples")
     print(f"Evidence Dominance Threshold: {EVIDENCE_DOMINANCE_THRESHOLD}")
     
-    # Cache novels to avoid reloading
-    novel_cache = {}
-    
-    results = []
-    
-    for idx, row in test_df.iterrows():
-        story_id = row["id"]
-        book_name = row["book_name"]
-        backstory = row["content"]
-        character = row.get("char", "")  # Get character name if available
-        
-        print(f"\n[{idx+1}/{len(test_df)}] ID: {story_id} | {book_name} | Char: {character}")
-        
-        try:
-            # Load novel (cached)
-            if book_name not in novel_cache:
-                print(f"    Loading novel: {book_name}...")
-                novel_cache[book_name] = load_novel(book_name)
-            novel_text = novel_cache[book_name]
-            
-            # Run analysis with character filtering
-            result = analyze_single(novel_text, backstory, character)
-            
-            results.append({
-                "story_id": story_id,
-                "prediction": result["prediction"],
-                "rationale": result["rationale"]
-            })
-            
-            pred_label = "CONTRADICT" if result["prediction"] == 0 else "CONSISTENT"
-            print(f"    Prediction: {result['prediction']} ({pred_label})")
-            
-        except Exception as e:
-            print(f"    ERROR: {str(e)}")
-            results.append({
-                "story_id": story_id,
-                "prediction": 1,
-                "rationale": f"Error during processing: {str(e)}"
-            })
-    
-    # Save results
-    results_df = pd.DataFrame(results)
-    output_path = "results/results.csv"
-    results_df.to_csv(output_path, index=False)
+    rows = [
+        {
+            "id": row["id"],
+            "book_name": row["book_name"],
+            "content": row["content"],
+            "char": row.get("char", "")  # Get character name if available
+        }
+        for _, row in test_df.iterrows()
+    ]
     
+    # Results are streamed to the CSV (input order) and a JSONL checkpoint as rows finish
+    output_path = RESULTS_PATH
+    with ResultLog(output_path, [row["id"] for row in rows], resume=args.resume,
+                   checkpoint_every=args.checkpoint_every) as log:
+        pending = log.pending()
+        if args.resume:
+            print(f"Resuming: {log.resumed} rows already in {log.checkpoint_path}, "
+                  f"{len(pending)} to run ({log.retrying} failed before)")
+        todo = [rows[pos] for pos in pending]
+        with stage("analyze"):
+            if args.workers > 1 and todo:
+                print(f"Workers: {args.workers}")
+                results = run_parallel(todo, args.workers, args.evidence)
+            else:
+                results = run_serial(todo, args.evidence)
+            for idx, result, error in results:
+                with stage("write_results"):
+                    log.add(pending[idx], result, error)
+        count("rows", len(todo))
+
+    total = log.rows_written
     print("\n" + "=" * 60)
     print("BATCH PROCESSING COMPLETE")
     print("=" * 60)
     print(f"\nResults saved to: {output_path}")
-    print(f"Total samples: {len(results)}")
-    contradict_count = sum(1 for r in results if r['prediction'] == 0)
-    consistent_count = sum(1 for r in results if r['prediction'] == 1)
-    print(f"Predictions - 0 (CONTRADICT): {contradict_count} ({100*contradict_count/len(results):.1f}%)")
-    print(f"Predictions - 1 (CONSISTENT): {consistent_count} ({100*consistent_count/len(results):.1f}%)")
+    print(f"Total samples: {total}")
+    contradict_count = log.counts.get(0, 0)
+    consistent_count = log.counts.get(1, 0)
+    print(f"Predictions - 0 (CONTRADICT): {contradict_count} ({100*contradict_count/total:.1f}%)")
+    print(f"Predictions - 1 (CONSISTENT): {consistent_count} ({100*consistent_count/total:.1f}%)")
+    if args.workers <= 1:
+        info = SentimentAnalyzer().cache_info()
+        print(f"Sentiment cache - hits: {info['hits']}, misses: {info['misses']} "
+              f"(hit rate {100*info['hit_rate']:.1f}%)")
 
 
 if __name__ == "__main__":
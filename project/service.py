@@ -0,0 +1,336 @@
+"""
+Long-running analysis service that keeps annotated novels warm.
+
+Clients connect over a Unix socket or TCP and send one JSON object per line:
+
+    {"id": 1, "book_name": "...", "char": "...", "backstory": "..."}
+    {"op": "metrics"}
+
+and receive one JSON line per request (matched by "id", in completion order):
+
+    {"id": 1, "prediction": 1, "rationale": "...", "latency_ms": 3.2}
+
+Requests arriving within a short window are grouped into micro-batches per
+book and analyzed off the event loop: in a single worker thread, or on a
+process pool whose workers each keep their novels loaded.
+
+    python service.py --socket /tmp/kdsh.sock [--workers 4]
+    python service.py --port 8765
+    python service.py --bench 200          # in-process latency benchmark
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import run_kdsh
+from narrative.corpus import AnnotatedNovel
+from narrative.sentiment import BACKENDS as SENTIMENT_BACKENDS, SentimentAnalyzer, selected_backend
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list (0.0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _warm_worker(books: List[str]) -> int:
+    """Pool task: load the given books once so their requests never wait on them. Returns the pid."""
+    SentimentAnalyzer().warm_up()
+    for book_name in books:
+        try:
+            run_kdsh._worker_corpus(book_name)
+        except FileNotFoundError:
+            pass  # Reported per request by process_row
+    return os.getpid()
+
+
+class AnalysisService:
+    """
+    Micro-batching front end over run_kdsh.process_row.
+
+    ``corpus_for(book_name)`` supplies annotated novels to the in-process
+    worker; with ``workers > 1`` batches go to a process pool that loads
+    novels through the feature store instead.
+
+    start() warms ``books``: by default only the library's books named in
+    train.csv / test.csv, so a large library is not loaded into every
+    worker. Other books load on their first request.
+    """
+
+    def __init__(self, workers: int = 1, batch_window_ms: float = 2.0, max_batch: int = 64,
+                 books: Optional[List[str]] = None,
+                 corpus_for: Callable[[str], AnnotatedNovel] = None,
+                 latency_window: int = 10000):
+        self.workers = workers
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max_batch
+        self.books = run_kdsh.listed_books() if books is None else list(books)
+        self._corpus_for = corpus_for or self._load_corpus
+        self._executor: Optional[Executor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = set()
+        self._latencies = deque(maxlen=latency_window)
+        self.requests = 0
+        self.batches = 0
+
+    def _load_corpus(self, book_name: str) -> AnnotatedNovel:
+        return run_kdsh.corpus_registry().corpus(book_name)
+
+    def _analyze(self, batch: List[Tuple[int, dict]]) -> List[Tuple[int, dict, Optional[str]]]:
+        return [(pos, *run_kdsh.process_row(row, self._corpus_for)) for pos, row in batch]
+
+    def _warm(self):
+        SentimentAnalyzer().warm_up()
+        for book_name in self.books:
+            try:
+                self._corpus_for(book_name)
+            except FileNotFoundError:
+                pass
+
+    async def start(self):
+        """Creates the worker pool and loads the books to warm before serving."""
+        loop = asyncio.get_running_loop()
+        if self.workers > 1:
+            # Workers get the data directory, memory budget and sentiment backend as run_parallel's do
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=run_kdsh.configure_registry,
+                initargs=(run_kdsh.DATA_DIR, run_kdsh.MEMORY_BUDGET_MB, selected_backend()))
+            await self._warm_pool()
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+            await loop.run_in_executor(self._executor, self._warm)
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max(1, self.workers))
+        self._batcher = asyncio.create_task(self._run_batches())
+
+    async def _warm_pool(self, attempts: int = 3):
+        """
+        Runs the warm-up task until every worker process has run it. The pool
+        starts a new process for each task submitted while none is idle, and
+        the warm-up keeps each busy, so one round normally reaches them all.
+        """
+        loop = asyncio.get_running_loop()
+        warmed = set()
+        for _ in range(attempts):
+            warmed.update(await asyncio.gather(*(
+                loop.run_in_executor(self._executor, _warm_worker, self.books)
+                for _ in range(self.workers))))
+            if len(warmed) >= self.workers:
+                break
+        return warmed
+
+    async def close(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    async def analyze(self, book_name: str, char: str, backstory: str, request_id=None) -> dict:
+        """Queues one request and waits for its result."""
+        future = asyncio.get_running_loop().create_future()
+        row = {"id": request_id, "book_name": book_name, "content": backstory, "char": char}
+        await self._queue.put((row, future, time.perf_counter()))
+        return await future
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # 1. Wait for a request, then collect whatever arrives within the window
+            pending = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(pending) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # 2. Group by book, as run_parallel does, so a batch touches one novel
+            batches = run_kdsh._book_batches([row for row, _, _ in pending], self.workers)
+            self.batches += len(batches)
+
+            # 3. Start each batch on its own, at most `workers` in flight, and go
+            #    back to collecting: a slow book does not hold up later requests
+            for batch in batches:
+                await self._slots.acquire()
+                task = asyncio.create_task(self._run_batch(batch, pending))
+                self._in_flight.add(task)
+                task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task: asyncio.Task):
+        self._in_flight.discard(task)
+        self._slots.release()
+
+    async def _run_batch(self, batch: List[Tuple[int, dict]], pending: List[tuple]):
+        """
+        Analyzes one batch and resolves its requests. If the batch fails as a
+        whole (e.g. a broken worker pool), its requests get the exception and
+        the batcher keeps serving.
+        """
+        task = run_kdsh._process_rows if self.workers > 1 else self._analyze
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self._executor, task, batch)
+        except Exception as e:
+            for pos, _ in batch:
+                future = pending[pos][1]
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for pos, result, error in results:
+            row, future, enqueued = pending[pos]
+            latency = time.perf_counter() - enqueued
+            self._latencies.append(latency)
+            self.requests += 1
+            if not future.done():
+                future.set_result({
+                    "id": row["id"],
+                    "prediction": result["prediction"],
+                    "rationale": result["rationale"],
+                    "error": error,
+                    "latency_ms": latency * 1000,
+                })
+
+    def metrics(self) -> Dict[str, float]:
+        """Request count and latency percentiles over the recent window."""
+        latencies = sorted(self._latencies)
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        }
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves JSON lines; requests on one connection are processed concurrently."""
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(message: dict):
+            async with lock:
+                writer.write((json.dumps(message) + "\n").encode())
+                await writer.drain()
+
+        async def serve(line: bytes):
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise TypeError("expected a JSON object")
+                if request.get("op") == "metrics":
+                    await respond(self.metrics())
+                    return
+                book_name, backstory = request["book_name"], request["backstory"]
+            except (ValueError, KeyError, TypeError) as e:
+                await respond({"error": f"Bad request: {e}"})
+                return
+            try:
+                result = await self.analyze(book_name, request.get("char", ""), backstory,
+                                            request.get("id"))
+            except Exception as e:
+                result = {"id": request.get("id"), "error": f"Analysis failed: {e}"}
+            await respond(result)
+
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    task = asyncio.create_task(serve(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+
+async def serve(service: AnalysisService, socket_path: str = None, host: str = "127.0.0.1",
+                port: int = 8765):
+    await service.start()
+    if socket_path:
+        server = await asyncio.start_unix_server(service.handle_connection, path=socket_path)
+        print(f"Serving on {socket_path}")
+    else:
+        server = await asyncio.start_server(service.handle_connection, host, port)
+        print(f"Serving on {host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+async def benchmark(service: AnalysisService, num_requests: int,
+                    train_path: str = run_kdsh.TRAIN_PATH,
+                    concurrency: int = 32) -> Dict[str, float]:
+    """Replays train.csv rows against a warm service with bounded concurrency."""
+    import pandas as pd
+
+    rows = pd.read_csv(train_path).to_dict("records")
+    start = time.perf_counter()
+    await service.start()
+    warm_seconds = time.perf_counter() - start
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        row = rows[i % len(rows)]
+        async with semaphore:
+            return await service.analyze(row["book_name"], row["char"], row["content"], row["id"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(num_requests)))
+    elapsed = time.perf_counter() - start
+    await service.close()
+    return {"warm_seconds": warm_seconds, "requests_per_second": num_requests / elapsed,
+            **service.metrics()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm KDSH analysis service")
+    parser.add_argument("--socket", default=None, help="Unix socket path (default: TCP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes (1 = one in-process worker thread)")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0,
+                        help="How long to gather requests into one micro-batch")
+    parser.add_argument("--data-dir", default=None,
+                        help=f"Directory scanned for novels (default: {run_kdsh.DATA_DIR})")
+    parser.add_argument("--memory-budget-mb", type=float, default=None,
+                        help=f"Annotated novels kept loaded per process "
+                             f"(default: {run_kdsh.MEMORY_BUDGET_MB:.0f} MB)")
+    parser.add_argument("--sentiment-backend", choices=SENTIMENT_BACKENDS, default=None,
+                        help="Polarity scorer: NLTK 'vader' (default) or the NumPy 'lexicon' engine")
+    parser.add_argument("--bench", type=int, metavar="N", default=None,
+                        help="Send N train.csv requests in-process, print latency metrics and exit")
+    args = parser.parse_args(argv)
+    run_kdsh.configure_registry(args.data_dir, args.memory_budget_mb, args.sentiment_backend)
+
+    service = AnalysisService(workers=args.workers, batch_window_ms=args.batch_window_ms)
+    if args.bench:
+        for name, value in asyncio.run(benchmark(service, args.bench)).items():
+            print(f"{name}: {value:.2f}")
+        return
+    try:
+        asyncio.run(serve(service, args.socket, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
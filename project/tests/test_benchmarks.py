@@ -0,0 +1,33 @@
+"""
+Unit tests for the benchmark harness metrics and regression gates.
+"""
+
+from benchmarks.harness import check_regressions, quality_metrics
+
+
+def test_quality_metrics():
+    metrics = quality_metrics([0, 0, 1, 1], [0, 1, 1, 1])
+    assert metrics["accuracy"] == 0.75
+    assert abs(metrics["f1_contradict"] - 2 / 3) < 1e-9
+    assert abs(metrics["f1_macro"] - (2 / 3 + 0.8) / 2) < 1e-9
+
+
+def test_check_regressions_uses_tolerances():
+    baseline = {"relative_throughput": 0.01, "accuracy": 0.6,
+                "tolerance": {"relative_throughput": 0.2, "accuracy": 0.01}}
+    ok = {"relative_throughput": 0.0081, "accuracy": 0.595, "f1_contradict": 0.0}
+    assert check_regressions(ok, baseline) == []
+
+    slow = dict(ok, relative_throughput=0.0079, accuracy=0.58)
+    failures = check_regressions(slow, baseline)
+    assert [f.split(":")[0] for f in failures] == ["relative_throughput", "accuracy"]
+
+    # Raw rows/s is host-specific and never gated
+    assert check_regressions({**ok, "rows_per_second": 1.0},
+                             {"rows_per_second": 100.0, "tolerance": {"rows_per_second": 0.2}}) == []
+
+
+def test_entry_points_do_not_import_heavy_dependencies():
+    from benchmarks.import_time import heavy_imports
+
+    assert heavy_imports("run_kdsh") == []
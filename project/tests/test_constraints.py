@@ -12,4 +12,77 @@ def test_comparator():
     story = CharacterState({"violence": Constraint("violence", "negative", 0.8, [])}, [])
     backstory = CharacterState({"violence": Constraint("violence", "positive", 0.9, [])}, [])
     result = comp.compare(story, backstory)
-    assert result["prediction"] == 0  # Should contradict
\ No newline at end of file
+    assert result["prediction"] == 0  # Should contradict
+
+
+def test_update_many_matches_sequential_fold():
+    from constraints.schema import Experience
+    from constraints.updater import ConstraintUpdater
+
+    texts = ["He was a brave hero.", "He feared the dark.", "Nothing happened."] + \
+            [f"He would fight, round {i}." for i in range(12)] + ["He hated the evil guards and would fight them."]
+    experiences = [Experience(f"e{i}", 1, "general", [], t, t) for i, t in enumerate(texts)]
+
+    updater = ConstraintUpdater()
+    expected = CharacterState({}, [])
+    for exp in experiences:
+        expected = updater.update_state(exp, expected)
+
+    actual = updater.update_many(experiences)
+    assert actual == expected
+    assert actual.constraints["violence"].strength == 1.0
+    assert list(actual.constraints) == list(expected.constraints)
+
+
+def test_character_timeline_matches_fold_over_chunk_ranges():
+    import random
+    from constraints.timeline import CharacterTimeline
+    from constraints.updater import ConstraintUpdater, StateAccumulator
+
+    rng = random.Random(7)
+    dims = list(ConstraintUpdater().dimension_keywords)
+    experiences = []
+    for n in range(60):
+        chunk = n // 3
+        picked = tuple(d for d in dims if rng.random() < 0.3)
+        experiences.append((chunk, f"e{n}", picked, rng.choice(["positive", "negative"]) if picked else None))
+    timeline = CharacterTimeline.from_experiences(dims, experiences)
+
+    for start, end in [(0, None), (0, 7), (5, 12), (19, 20), (8, 8), (25, 30)]:
+        accumulator = StateAccumulator()
+        for chunk, exp_id, picked, polarity in experiences:
+            if chunk >= start and (end is None or chunk < end):
+                accumulator.add(exp_id, picked, polarity)
+        expected = accumulator.to_state()
+        actual = timeline.state(start, end)
+        assert actual == expected
+        assert list(actual.constraints) == list(expected.constraints)
+        assert timeline.summary(start, end) == {
+            dim: (c.polarity, c.strength, len(c.evidence_ids)) for dim, c in expected.constraints.items()
+        }
+
+
+def test_compare_batch_matches_compare_for_every_threshold():
+    from constraints.comparator import encode_states
+
+    def state(**dims):
+        return CharacterState({d: Constraint(d, p, s, []) for d, (p, s) in dims.items()}, [])
+
+    stories = [state(violence=("negative", 0.8)), state(trust=("positive", 0.2)),
+               state(trust=("positive", 0.2), courage=("negative", 0.4)), state()]
+    backstories = [state(violence=("positive", 0.5)), state(trust=("positive", 0.9)),
+                   state(courage=("positive", 0.5)), state(trust=("negative", 0.5))]
+    dims = ["violence", "trust", "courage"]
+    thresholds = [0.3, 0.5, 0.9]
+
+    comp = ConstraintComparator()
+    predictions = comp.compare_batch(*encode_states(stories, dims), *encode_states(backstories, dims), thresholds)
+    for t, row in zip(thresholds, predictions):
+        assert list(row) == [comp.compare(s, b, threshold=t)["prediction"] for s, b in zip(stories, backstories)]
+
+    high = comp.compare_batch(*encode_states(stories, dims), *encode_states(backstories, dims),
+                              thresholds, require_high=True)
+    assert high.tolist() == [[0, 1, 0, 1], [0, 1, 0, 1], [1, 1, 1, 1]]
+
+    sweep = comp.threshold_sweep(stories, backstories, [0, 1, 1, 1], thresholds, dims)
+    assert [r["accuracy"] for r in sweep] == [0.75, 0.75, 0.75]
@@ -0,0 +1,65 @@
+"""
+Tests for claim-level evidence retrieval.
+"""
+
+from evidence.engine import EvidenceEngine, format_evidence, paragraph_index, paragraph_index_path
+from narrative.corpus import AnnotatedNovel
+from pathway_pipeline.vector_store import PathwayVectorStore
+
+
+NOVEL = "\n\n".join([
+    "Edmond trusted his friend Fernand completely.",
+    "The ship sailed at dawn.",
+    "Edmond learned that Fernand would betray him, and he trusted no one again.",
+    "Mercedes trusted Fernand.",
+    "Edmond was brave in the storm.",
+])
+
+
+def test_search_within_matches_search_on_candidates():
+    docs = ["the brave sailor", "a brave brave captain", "calm sea", "the sailor was afraid"]
+    store = PathwayVectorStore()
+    store.index_documents(docs, [str(i) for i in range(len(docs))])
+    for scoring in PathwayVectorStore.SCORING_MODES:
+        full = {doc_id: score for doc_id, _, score in store.search("brave sailor", 4, scoring)}
+        within = store.search_within("brave sailor", [0, 2, 3], top_k=4, scoring=scoring)
+        assert [doc_id for doc_id, _, _ in within] == ["0", "3"]
+        for doc_id, _, score in within:
+            assert abs(score - full[doc_id]) < 1e-9
+
+
+def test_engine_retrieves_character_filtered_passages():
+    from backstory.parser import BackstoryParser
+
+    engine = EvidenceEngine(AnnotatedNovel.build(NOVEL), top_k=2)
+    claim = BackstoryParser().parse_claims("He would never trust a friend.")[0]
+    assert claim.dimension == "trust"
+    # Paragraph 3 mentions trust but not Edmond
+    assert engine.candidates("trust", "Edmond") == [0, 2]
+
+    evidence = engine.retrieve(claim, "Edmond")
+    assert sorted(evidence.passages) == [0, 2]
+    assert engine.retrieve(claim, "Edmond").passages == evidence.passages  # cached
+
+    engine.candidate_budget = 1
+    engine._cache.clear()
+    assert engine.candidates("trust", "Edmond") == [0]
+
+    result = engine.analyze("He would never trust a friend.", "Edmond")
+    assert format_evidence(result["evidence"]) == f"{claim.id} -> p0"
+    assert set(result["evidence"][0].rows) <= set(range(len(engine.corpus.table)))
+
+
+def test_paragraph_index_rebuilds_unreadable_files(tmp_path):
+    corpus = AnnotatedNovel.build(NOVEL)
+    path = paragraph_index_path(corpus, str(tmp_path))
+    assert paragraph_index_path(corpus, str(tmp_path), PathwayVectorStore(k1=1.2)) != path
+
+    built = paragraph_index(corpus, str(tmp_path))
+    expected = built.search("Edmond trusted", 3, "bm25")
+    with open(path, "r+b") as f:
+        f.truncate(100)
+    rebuilt = paragraph_index(corpus, str(tmp_path))
+    assert rebuilt.search("Edmond trusted", 3, "bm25") == expected
+    # The file was rewritten, so the next load maps it again
+    assert type(paragraph_index(corpus, str(tmp_path))).__name__ == "MappedVectorIndex"
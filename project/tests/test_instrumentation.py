@@ -0,0 +1,48 @@
+"""
+Unit tests for stage timers, counters and trace export.
+"""
+
+import csv
+import json
+
+import instrumentation
+from instrumentation import Recorder, count, recording, stage
+
+
+def test_hooks_are_noops_when_disabled():
+    assert instrumentation._active is None
+    assert stage("detect") is instrumentation._NULL_STAGE
+    count("experiences", 3)  # Must not raise or record anywhere
+
+
+def test_recording_collects_stages_counters_and_events(tmp_path):
+    with recording(Recorder(trace=True)) as recorder:
+        with stage("detect"):
+            count("sentences_scanned", 4)
+        with stage("detect"):
+            count("sentences_scanned", 2)
+    assert instrumentation._active is None
+    assert recorder.calls == {"detect": 2}
+    assert recorder.counters == {"sentences_scanned": 6}
+    assert [name for name, _, _ in recorder.events] == ["detect", "detect"]
+
+    recorder.write_trace(str(tmp_path / "trace.json"))
+    trace = json.loads((tmp_path / "trace.json").read_text())
+    assert trace["counters"] == {"sentences_scanned": 6}
+    assert len(trace["events"]) == 2
+
+    recorder.write_trace(str(tmp_path / "trace.csv"))
+    with open(tmp_path / "trace.csv") as f:
+        kinds = [row["kind"] for row in csv.DictReader(f)]
+    assert kinds == ["event", "event", "stage", "counter"]
+
+
+def test_counters_from_pipeline():
+    from narrative.corpus import AnnotatedNovel
+
+    text = "He was brave. The rain fell.\n\nShe chose to fight. They trusted him."
+    with recording() as recorder:
+        novel = AnnotatedNovel.build(text)
+    assert recorder.counters["sentences_scanned"] == 4
+    assert recorder.counters["experiences"] == len(novel.table) == 3
+    assert {"chunk", "detect", "sentiment"} <= set(recorder.calls)
@@ -0,0 +1,57 @@
+"""
+Equivalence tests for the single-pass keyword matcher.
+"""
+
+import os
+
+from backstory.parser import BackstoryParser
+from constraints.updater import ConstraintUpdater
+from narrative.experience_detector import ExperienceDetector
+from narrative.keyword_matcher import KeywordMatcher
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+TRICKY = [
+    "He was faithful, then distrustful.",
+    "The white knight hit the ruler.",
+    "FRIENDSHIP and Betrayal were the order of the day",
+    "Brightness; darkness; enlightened",
+    "",
+    "nothing to see here",
+]
+
+
+def _reference(table, text):
+    lower = text.lower()
+    return tuple(dim for dim, keywords in table.items() if any(kw in lower for kw in keywords))
+
+
+def _sample_sentences(limit=3000):
+    detector = ExperienceDetector()
+    sentences = list(TRICKY)
+    for name in sorted(os.listdir(DATA_DIR)):
+        with open(os.path.join(DATA_DIR, name), encoding="utf-8") as f:
+            text = f.read(400_000)
+        sentences.extend(detector.split_sentences(text)[:limit])
+    return sentences
+
+
+def test_matcher_equals_keyword_loops_for_every_table():
+    tables = [
+        ExperienceDetector().dimension_keywords,
+        ConstraintUpdater().dimension_keywords,
+        BackstoryParser().dimension_keywords,
+    ]
+    combined = KeywordMatcher(*tables)
+    singles = [KeywordMatcher(table) for table in tables]
+    for sentence in _sample_sentences():
+        expected = tuple(_reference(table, sentence) for table in tables)
+        assert combined.match_all(sentence) == expected
+        assert tuple(m.match(sentence) for m in singles) == expected
+
+
+def test_contained_and_overlapping_keywords():
+    matcher = KeywordMatcher({"a": ["faith"], "b": ["faithful"], "c": ["fulfil"], "d": [""]})
+    assert matcher.match("faithfulfil") == ("a", "b", "c", "d")
+    assert matcher.match("FAITH") == ("a", "d")
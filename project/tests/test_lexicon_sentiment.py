@@ -0,0 +1,82 @@
+"""
+Agreement tests between the NumPy lexicon engine and NLTK VADER.
+"""
+
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+from nltk.sentiment import SentimentIntensityAnalyzer
+
+from narrative.experience_detector import ExperienceDetector
+from narrative.lexicon_sentiment import LexiconSentimentEngine
+
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "The Count of Monte Cristo.txt")
+
+RULE_CASES = [
+    "I do not hate you, friend!",
+    "He is NOT GOOD but the food was kind of great!!",
+    "This is the shit",
+    "I was never so happy in my life",
+    "At least it was good. The least good one.",
+    "GOOD good GREAT",
+    "He was very VERY happy??",
+    "It was not the bomb, yeah right",
+    "kiss of death was bad, hand to mouth",
+    "The movie was kind of good and sort of bad",
+    "Nothing is ever good, but great things happen :)",
+    "",
+    "a",
+]
+
+
+def test_compound_scores_match_nltk():
+    with open(DATA_PATH, encoding="utf-8") as f:
+        sentences = ExperienceDetector().split_sentences(f.read(300_000))
+    texts = RULE_CASES + sentences
+    sia = SentimentIntensityAnalyzer()
+    expected = [sia.polarity_scores(t)["compound"] for t in texts]
+    actual = LexiconSentimentEngine().compound_scores(texts)
+    assert actual == pytest.approx(expected, abs=1e-4)
+
+
+def test_lexicon_lookup_is_offline_and_fails_fast(tmp_path, monkeypatch):
+    from narrative.lexicon_sentiment import load_vader_lexicon
+    from narrative.vader_data import LEXICON_ENV_VAR, read_vader_lexicon, require_vader_lexicon
+
+    text = read_vader_lexicon()
+    vendored = tmp_path / "vader_lexicon.txt"
+    vendored.write_text(text + "\n", encoding="utf-8")
+    monkeypatch.setenv(LEXICON_ENV_VAR, str(vendored))
+    assert require_vader_lexicon() == str(vendored)
+    assert read_vader_lexicon() == text
+    assert load_vader_lexicon() == SentimentIntensityAnalyzer().lexicon
+
+    monkeypatch.setenv(LEXICON_ENV_VAR, str(tmp_path / "missing.txt"))
+    with pytest.raises(LookupError, match="VADER lexicon not found"):
+        require_vader_lexicon()
+
+
+def test_set_backend_is_process_local_and_loads_vendored_lexicon(tmp_path, monkeypatch):
+    from narrative import sentiment
+    from narrative.vader_data import LEXICON_ENV_VAR, read_vader_lexicon
+
+    monkeypatch.setattr(sentiment, "_selected_backend", None)
+    monkeypatch.setattr(sentiment.SentimentAnalyzer, "_instance", None)
+    monkeypatch.delenv(sentiment.BACKEND_ENV_VAR, raising=False)
+    vendored = tmp_path / "vader_lexicon.txt"
+    vendored.write_text(read_vader_lexicon(), encoding="utf-8")
+    monkeypatch.setenv(LEXICON_ENV_VAR, str(vendored))
+
+    sentiment.SentimentAnalyzer.set_backend("vader")
+    assert sentiment.BACKEND_ENV_VAR not in os.environ
+    analyzer = sentiment.SentimentAnalyzer()
+    assert (analyzer.backend, analyzer.lexicon_path) == ("vader", str(vendored))
+    texts = RULE_CASES[:4]
+    assert analyzer.get_compounds(texts) == \
+        [SentimentIntensityAnalyzer().polarity_scores(t)["compound"] for t in texts]
+
+    sentiment.SentimentAnalyzer.set_backend("lexicon")
+    assert sentiment.selected_backend() == sentiment.SentimentAnalyzer().backend == "lexicon"
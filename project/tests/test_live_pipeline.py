@@ -0,0 +1,72 @@
+"""
+Unit tests for the incremental Pathway pipeline.
+"""
+
+import pytest
+
+from constraints.updater import ConstraintUpdater
+from narrative.chunker import NarrativeChunker
+from narrative.corpus import AnnotatedNovel
+from narrative.experience_detector import ExperienceDetector
+
+pw = pytest.importorskip("pathway")
+
+from pathway_pipeline.live_pipeline import LiveNovel, PathwayNovelPipeline, annotate_paragraph
+
+
+NOVEL = (
+    "Faria trusted his friend. He feared nothing!\r\n\r\n"
+    "The guards were cruel and evil. Faria would not obey them.\r\n\r\n"
+    "Dantes was brave, and he loved Mercedes."
+)
+APPENDED = "Faria betrayed no one; he was good and loyal to the end."
+
+
+def _fold(text, character):
+    return AnnotatedNovel.build(text).character_state(character)
+
+
+def _apply(novel, paragraphs, start=0):
+    detector, updater = ExperienceDetector(), ConstraintUpdater()
+    for position, text in enumerate(paragraphs, start):
+        novel.apply_change(position, text, annotate_paragraph(text, detector, updater), True)
+    novel.commit()
+
+
+def test_live_novel_extends_states_on_append():
+    text = NOVEL.replace("\r\n", "\n")
+    paragraphs = NarrativeChunker().chunk_novel(text)
+    novel = LiveNovel("novel.txt")
+    _apply(novel, paragraphs)
+    assert novel.character_state("Faria") == _fold(text, "Faria")
+
+    _apply(novel, [APPENDED], start=len(paragraphs))
+    assert len(novel.index.documents) == len(paragraphs) + 1
+    assert novel.character_state("Faria") == _fold(text + "\n\n" + APPENDED, "Faria")
+    assert novel.character_state("") == _fold(text + "\n\n" + APPENDED, "")
+
+
+def test_live_novel_rejects_position_gaps():
+    paragraphs = NarrativeChunker().chunk_novel(NOVEL.replace("\r\n", "\n"))
+    novel = LiveNovel("novel.txt")
+    _apply(novel, paragraphs[:1])
+    with pytest.raises(ValueError):
+        _apply(novel, paragraphs[2:], start=2)
+    assert len(novel.index.documents) == 1
+
+    # Once the gap is filled, positions arriving out of order index in order
+    _apply(novel, paragraphs[1:2], start=1)
+    assert [doc_id for doc_id, _ in novel.index.documents] == ["0", "1", "2"]
+
+
+def test_static_pipeline_ingests_directory(tmp_path):
+    from pathway.internals.parse_graph import G
+    G.clear()
+    (tmp_path / "Some Novel.txt").write_bytes(NOVEL.encode("utf-8"))
+
+    pipeline = PathwayNovelPipeline(str(tmp_path), mode="static")
+    pipeline.run()
+    text = NOVEL.replace("\r\n", "\n")
+    assert len(pipeline.novel("some novel")) == 3
+    for character in ["Faria", "Dantes"]:
+        assert pipeline.character_state("Some Novel", character) == _fold(text, character)
@@ -0,0 +1,167 @@
+"""
+Unit tests for narrative annotation.
+"""
+
+from constraints.schema import CharacterState
+from constraints.updater import ConstraintUpdater
+from narrative.chunker import NarrativeChunker
+from narrative.corpus import AnnotatedNovel
+from narrative.experience_detector import ExperienceDetector
+from narrative.feature_store import FeatureStore
+from narrative.mentions import MentionIndex
+from narrative.segmenter import (Segments, load_text, normalize_whitespace,
+                                 paragraph_spans, word_window_spans)
+from narrative.sentiment import SentimentAnalyzer
+from narrative.streaming import stream_character_state, stream_states
+
+
+NOVEL = (
+    "Faria trusted his friend. He feared nothing!\n\n"
+    "The guards were cruel and evil. Faria would not obey them.\n\n"
+    "Dantes was brave, and he loved Mercedes.\n\n"
+    "Faria betrayed no one; he was good and loyal to the end."
+)
+
+
+def _fold(text, character):
+    chunks = [c for c in NarrativeChunker().chunk_novel(text) if character.lower() in c.lower()]
+    updater = ConstraintUpdater()
+    state = CharacterState({}, [])
+    for exp in ExperienceDetector().detect_experiences(chunks):
+        state = updater.update_state(exp, state)
+    return state
+
+
+def _with_md5_ids(corpus, character, state):
+    # Table rows stand in for the per-row pipeline's md5 ids
+    ids = {exp.id: ExperienceDetector.experience_id(exp.chapter_id, exp.outcome)
+           for exp in corpus.experiences(corpus.select_paragraphs(character))}
+    for con in state.constraints.values():
+        con.evidence_ids = [ids[i] for i in con.evidence_ids]
+    return CharacterState(state.constraints, [ids[i] for i in state.history])
+
+
+def test_annotated_novel_matches_per_row_fold():
+    corpus = AnnotatedNovel.build(NOVEL)
+    for character in ["Faria", "Dantes", ""]:
+        state = corpus.character_state(character)
+        assert _with_md5_ids(corpus, character, state) == _fold(NOVEL, character)
+
+
+def test_experience_table_spans_match_split_sentences():
+    corpus = AnnotatedNovel.build(NOVEL)
+    detector = ExperienceDetector()
+    assert list(corpus.paragraphs) == NarrativeChunker().chunk_novel(NOVEL)
+    expected = [s for p in corpus.paragraphs for s in detector.split_sentences(p)
+                if detector.is_experience(s)]
+    assert [corpus.table.sentence(row) for row in range(len(corpus.table))] == expected
+
+
+def test_feature_store_round_trip_and_invalidation(tmp_path):
+    novel_path = tmp_path / "novel.txt"
+    novel_path.write_text(NOVEL, encoding="utf-8")
+    store = FeatureStore(str(tmp_path / "features"))
+
+    built = store.load_or_build(str(novel_path))
+    key = store.key_for(novel_path.read_bytes())
+    loaded = store.load(key)
+    assert list(loaded.paragraphs) == list(built.paragraphs)
+    assert loaded.paragraph_offsets == built.paragraph_offsets
+    for row in range(len(built.table)):
+        assert loaded.table.sentence(row) == built.table.sentence(row)
+        assert loaded.table.dimensions(row) == built.table.dimensions(row)
+        assert loaded.table.polarity(row) == built.table.polarity(row)
+
+    # Editing a keyword table changes the key
+    store.updater.dimension_keywords = dict(store.updater.dimension_keywords, trust=["trust"])
+    assert store.key_for(novel_path.read_bytes()) != key
+
+
+def test_mention_index_matches_substring_filter_and_aliases():
+    paragraphs = NarrativeChunker().chunk_novel(NOVEL)
+    index = MentionIndex(paragraphs)
+    for name in ["Faria", "faria", "DANTES", "Mercedes", "nobody", ""]:
+        assert index.units(name) == [i for i, p in enumerate(paragraphs) if name.lower() in p.lower()]
+    assert index.units("Dantes", aliases=["the guards"]) == [1, 2]
+
+
+def test_mention_index_extend_and_truncate_match_fresh_index():
+    paragraphs = NarrativeChunker().chunk_novel(NOVEL)
+    text = "\n\n".join(paragraphs[:2])
+    index = MentionIndex.from_spans(text, [0, len(paragraphs[0]) + 2],
+                                    [len(paragraphs[0]), len(text)])
+    names = ["faria", "dantes", "", "nobody"]
+    for name in names:
+        index.units(name)  # cached names are extended in place
+    index.extend(["Dantes said Faria was dead."])
+    index.truncate(2)
+    index.extend(paragraphs[2:])
+
+    fresh = MentionIndex(paragraphs)
+    assert len(index) == len(fresh)
+    for name in names + ["mercedes", "the end"]:
+        assert index.units(name) == fresh.units(name)
+
+
+def test_sentiment_batch_dedupes_and_counts_hits():
+    analyzer = SentimentAnalyzer()
+    analyzer.clear_cache()
+    texts = ["He hated the cruel guards.", "She loved him.", "He hated the cruel guards."]
+    assert analyzer.get_polarities(texts) == [analyzer.get_polarity(t) for t in texts]
+    info = analyzer.cache_info()
+    assert info["misses"] == 2
+    assert info["hits"] == 4
+
+
+def test_segmenter_offsets_match_copying_splits(tmp_path):
+    path = tmp_path / "novel.txt"
+    path.write_bytes(("  " + NOVEL + "\n\n\n").replace("\n", "\r\n").encode("utf-8"))
+    text = load_text(str(path))
+    with open(path, encoding="utf-8") as f:
+        assert text == f.read()
+
+    assert list(Segments(text, *paragraph_spans(text))) == NarrativeChunker().chunk_novel(text)
+
+    words = text.split()
+    normalized = normalize_whitespace(text, block_size=7)
+    assert normalized == " ".join(words)
+    windows = Segments(normalized, *word_window_spans(normalized, 6, 3))
+    assert list(windows) == [" ".join(words[i:i + 6]) for i in range(0, len(words), 3)]
+
+
+def test_mention_index_over_overlapping_spans():
+    text = "faria met dantes. the abbe faria died. dantes escaped."
+    windows = Segments(text, *word_window_spans(text, 4, 2))
+    index = MentionIndex.from_spans(text, windows.starts, windows.ends)
+    for name in ["faria", "dantes", "abbe faria", "died. dantes"]:
+        assert index.units(name) == [i for i, w in enumerate(windows) if name in w]
+
+
+def test_iter_chunks_from_file_handle_matches_chunk_novel(tmp_path):
+    path = tmp_path / "novel.txt"
+    path.write_text("\n\n\n" + NOVEL + "\n\n", encoding="utf-8")
+    expected = NarrativeChunker().chunk_novel(path.read_text(encoding="utf-8"))
+    for block_size in [1, 2, 5, 1 << 16]:
+        with open(path, encoding="utf-8") as f:
+            assert list(NarrativeChunker().iter_chunks(f, block_size=block_size)) == expected
+
+
+def test_streaming_pipeline_matches_per_row_fold(tmp_path):
+    path = tmp_path / "novel.txt"
+    path.write_text(NOVEL, encoding="utf-8")
+    for character in ["Faria", "Dantes", ""]:
+        with open(path, encoding="utf-8") as f:
+            assert stream_character_state(f, character) == _fold(NOVEL, character)
+
+    # Running states are observable per chapter and only ever grow
+    history_sizes = [(chapter_id, len(acc.history)) for chapter_id, acc in stream_states(NOVEL, "Faria")]
+    assert [chapter_id for chapter_id, _ in history_sizes] == [1, 2, 3]
+    assert [size for _, size in history_sizes] == sorted(size for _, size in history_sizes)
+
+
+def test_character_states_in_one_pass_match_individual_folds():
+    corpus = AnnotatedNovel.build(NOVEL)
+    expected = {name: corpus.character_state(name) for name in ["Faria", "Dantes", "Mercedes", "nobody"]}
+    states = corpus.character_states({name: () for name in expected})
+    assert states == expected
+    assert corpus.character_state("Faria") is states["Faria"]
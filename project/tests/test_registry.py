@@ -0,0 +1,115 @@
+"""
+Unit tests for the corpus registry.
+"""
+
+import json
+import os
+
+import pytest
+
+from narrative.feature_store import FeatureStore
+from narrative.registry import CorpusRegistry, normalize_title
+
+
+NOVEL = (
+    "Faria trusted his friend. He feared nothing!\n\n"
+    "The guards were cruel and evil. Faria would not obey them.\n\n"
+    "Dantes was brave, and he loved Mercedes."
+)
+
+
+def _library(tmp_path):
+    data_dir = tmp_path / "data"
+    (data_dir / "dumas").mkdir(parents=True)
+    (data_dir / "dumas" / "the_count_of_monte_cristo.txt").write_text(NOVEL, encoding="utf-8")
+    (data_dir / "In search of the castaways.txt").write_text(NOVEL + " Glenarvan sailed.",
+                                                             encoding="utf-8")
+    (data_dir / "notes.md").write_text("not a novel", encoding="utf-8")
+    store = FeatureStore(str(tmp_path / "features"))
+    return CorpusRegistry(str(data_dir), store, str(tmp_path / "manifest.json"))
+
+
+def test_normalize_title():
+    assert normalize_title("The Count of Monte Cristo") == "the count of monte cristo"
+    assert normalize_title("the_count_of_monte-cristo") == "the count of monte cristo"
+    assert normalize_title("Count of Monte  Cristo, The") == "the count of monte cristo"
+    assert normalize_title("Les Misérables") == normalize_title("LES MISERABLES")
+    assert normalize_title("Pride & Prejudice") == "pride and prejudice"
+
+
+def test_scan_finds_novels_by_normalized_title(tmp_path):
+    registry = _library(tmp_path)
+    assert sorted(registry.titles()) == ["In search of the castaways", "the_count_of_monte_cristo"]
+    assert "In Search of the Castaways" in registry
+    assert registry.path_for("The Count of Monte Cristo").endswith("the_count_of_monte_cristo.txt")
+    assert registry.path_for("Notes") is None
+    with pytest.raises(FileNotFoundError):
+        registry.corpus("Notes")
+
+    # A second file claiming a title only breaks lookups of that title
+    (tmp_path / "data" / "The Count of Monte Cristo.txt").write_text(NOVEL, encoding="utf-8")
+    registry.scan()
+    assert list(registry.conflicts) == ["the count of monte cristo"]
+    with pytest.raises(ValueError, match="Ambiguous title"):
+        registry.path_for("The Count of Monte Cristo")
+    with pytest.raises(ValueError, match="Ambiguous title"):
+        registry.corpus("the_count_of_monte_cristo")
+    assert registry.titles() == ["In search of the castaways"]
+    assert registry.corpus("In Search of the Castaways") is not None
+
+
+def test_ingest_builds_once_and_manifest_keeps_hashes(tmp_path):
+    registry = _library(tmp_path)
+    stats = registry.ingest()
+    assert (stats["books"], stats["built"]) == (2, 2)
+    assert stats["mb_per_s"] > 0
+    assert registry.ingest()["built"] == 0
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert all(book["sha256"] for book in manifest["books"])
+    rescanned = CorpusRegistry(registry.data_dir, registry.store, registry.manifest_path)
+    mtime = (tmp_path / "manifest.json").stat().st_mtime_ns
+    os.utime(tmp_path / "manifest.json", ns=(mtime - 10 ** 9, mtime - 10 ** 9))
+    assert [e.sha256 for e in rescanned.scan()] == [b["sha256"] for b in manifest["books"]]
+    # Nothing changed, so the manifest was not rewritten
+    assert (tmp_path / "manifest.json").stat().st_mtime_ns == mtime - 10 ** 9
+
+
+def test_corpus_loads_lazily_within_memory_budget(tmp_path):
+    registry = _library(tmp_path)
+    prepared = []
+    registry.prepare = lambda title, corpus: prepared.append(title) or corpus
+    registry.memory_budget = 1  # byte: only the most recent novel stays loaded
+
+    castaways = registry.corpus("In Search of the Castaways")
+    assert registry.corpus("in search of the castaways") is castaways
+    registry.corpus("The Count of Monte Cristo")
+    assert not registry.is_loaded("In Search of the Castaways")
+    assert registry.evictions == 1
+    assert registry.memory_used == registry.corpus("The Count of Monte Cristo").nbytes()
+    assert prepared == ["In Search of the Castaways", "The Count of Monte Cristo"]
+
+
+def test_corpus_reuses_manifest_hash_and_counts_attached_engine(tmp_path, monkeypatch):
+    from evidence.engine import EvidenceEngine
+    import narrative.registry as registry_module
+
+    registry = _library(tmp_path)
+    registry.ingest()
+
+    def no_hashing(*args):
+        raise AssertionError("book hashed again")
+
+    monkeypatch.setattr(registry_module, "map_file", no_hashing)
+    monkeypatch.setattr(registry.store, "load_or_build", no_hashing)
+    corpus = registry.corpus("The Count of Monte Cristo")
+    bare = corpus.nbytes()
+
+    corpus.character_states({"Faria": ()})
+    assert corpus.nbytes() > bare
+    corpus.evidence_engine = EvidenceEngine(corpus)
+    with_engine = corpus.nbytes()
+    assert with_engine - corpus.evidence_engine.nbytes() > bare
+
+    registry.refresh("The Count of Monte Cristo")
+    assert registry.memory_used == with_engine
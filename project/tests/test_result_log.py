@@ -0,0 +1,66 @@
+"""
+Unit tests for incremental, resumable result output.
+"""
+
+import json
+
+import pandas as pd
+
+from result_log import ResultLog, read_checkpoint
+
+
+RESULTS = [
+    {"story_id": 95, "prediction": 1, "rationale": "No meaningful conflicts."},
+    {"story_id": 136, "prediction": 0, "rationale": '[TRUST]: "betrayed", twice\nover'},
+    {"story_id": 59, "prediction": 1, "rationale": ""},
+]
+
+
+def test_out_of_order_results_write_the_same_csv_as_pandas(tmp_path):
+    path = tmp_path / "results.csv"
+    with ResultLog(str(path), [r["story_id"] for r in RESULTS]) as log:
+        log.add(2, RESULTS[2])
+        assert log.rows_written == 0
+        log.add(0, RESULTS[0])
+        log.add(1, RESULTS[1])
+    expected = tmp_path / "expected.csv"
+    pd.DataFrame(RESULTS).to_csv(expected, index=False)
+    assert path.read_bytes() == expected.read_bytes()
+    assert log.counts == {0: 1, 1: 2}
+    assert [json.loads(line)["story_id"] for line in open(log.checkpoint_path)] == [59, 95, 136]
+
+
+def test_resume_skips_checkpointed_rows_and_drops_torn_line(tmp_path):
+    path = tmp_path / "results.csv"
+    ids = pd.Series([r["story_id"] for r in RESULTS])  # NumPy ints, as read by pandas
+    with ResultLog(str(path), ids) as log:
+        log.add(1, dict(RESULTS[1], story_id=ids[1]))
+    with open(log.checkpoint_path, "a") as f:
+        f.write('{"story_id": 95, "predic')  # killed mid-write
+
+    assert list(read_checkpoint(log.checkpoint_path)) == ["136"]
+    with ResultLog(str(path), ids, resume=True) as resumed:
+        assert (resumed.resumed, resumed.pending()) == (1, [0, 2])
+        resumed.add(0, RESULTS[0])
+        resumed.add(2, RESULTS[2])
+    lines = open(resumed.checkpoint_path).read().splitlines()
+    assert [json.loads(line)["story_id"] for line in lines] == [136, 95, 59]
+    assert pd.read_csv(path, keep_default_na=False).to_dict("records") == RESULTS
+
+
+def test_resume_retries_rows_that_failed(tmp_path):
+    path = tmp_path / "results.csv"
+    ids = [r["story_id"] for r in RESULTS]
+    failed = dict(RESULTS[1], prediction=1, rationale="Error during processing: boom")
+    with ResultLog(str(path), ids) as log:
+        log.add(0, RESULTS[0])
+        log.add(1, failed, error="boom")
+    assert json.loads(open(log.checkpoint_path).read().splitlines()[1])["error"] == "boom"
+
+    with ResultLog(str(path), ids, resume=True) as resumed:
+        assert (resumed.resumed, resumed.retrying, resumed.pending()) == (1, 1, [1, 2])
+        resumed.add(1, RESULTS[1])
+        resumed.add(2, RESULTS[2])
+    assert pd.read_csv(path, keep_default_na=False).to_dict("records") == RESULTS
+    with ResultLog(str(path), ids, resume=True) as again:
+        assert again.pending() == []
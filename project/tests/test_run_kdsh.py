@@ -0,0 +1,46 @@
+"""
+Tests for the batch runner's row batching and parallel execution.
+"""
+
+import os
+
+import pytest
+
+import run_kdsh
+
+
+def _row(pos, book_name):
+    return {"id": pos, "book_name": book_name, "content": "He trusted his friends.", "char": "Edmond"}
+
+
+def test_book_batches_group_by_book_and_split_across_workers():
+    rows = [_row(i, book) for i, book in enumerate("AABAAAB")]
+    batches = run_kdsh._book_batches(rows, workers=2)
+    assert [[pos for pos, _ in batch] for batch in batches] == [[0, 1, 3], [4, 5], [2], [6]]
+    assert all(len({row["book_name"] for _, row in batch}) == 1 for batch in batches)
+
+    assert [[pos for pos, _ in batch] for batch in run_kdsh._book_batches(rows, workers=1)] == \
+        [[0, 1, 3, 4, 5], [2, 6]]
+    assert len(run_kdsh._book_batches(rows[:2], workers=8)) == 2
+
+
+@pytest.mark.skipif(not os.path.exists(run_kdsh.TRAIN_PATH), reason="train.csv not available")
+def test_run_parallel_matches_run_serial_including_errors():
+    pd = pytest.importorskip("pandas")
+    train = pd.read_csv(run_kdsh.TRAIN_PATH)
+    rows = [
+        {"id": row["id"], "book_name": row["book_name"], "content": row["content"],
+         "char": row["char"]}
+        for _, row in pd.concat([train.head(3), train.tail(3)]).iterrows()
+    ]
+    rows.insert(2, dict(rows[0], id=-1, book_name="No Such Novel"))
+
+    serial = list(run_kdsh.run_serial(rows))
+    parallel = sorted(run_kdsh.run_parallel(rows, workers=2), key=lambda item: item[0])
+    assert [pos for pos, _, _ in serial] == list(range(len(rows)))
+    assert parallel == serial
+
+    _, failed, error = serial[2]
+    assert failed["story_id"] == -1 and failed["prediction"] == 1
+    assert failed["rationale"].startswith("Error during processing") and "No Such Novel" in error
+    assert all(error is None for pos, _, error in serial if pos != 2)
@@ -0,0 +1,139 @@
+"""
+Tests for the warm analysis service.
+"""
+
+import asyncio
+import json
+
+from narrative.corpus import AnnotatedNovel
+from service import AnalysisService, percentile
+
+
+NOVEL = ("Edmond was brave and fought the guards.\n\n"
+         "Edmond trusted his friend, who betrayed him.\n\n"
+         "The sea was calm.")
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_service_matches_analyze_single(tmp_path):
+    import run_kdsh
+
+    corpus = AnnotatedNovel.build(NOVEL)
+    backstories = ["He was a coward who never fought.", "He trusted his friends.", "He liked the sea."]
+    expected = [run_kdsh.analyze_single(None, b, "Edmond", corpus=corpus) for b in backstories]
+
+    async def scenario():
+        service = AnalysisService(books=["Book"], corpus_for=lambda book: corpus)
+        socket_path = str(tmp_path / "kdsh.sock")
+        await service.start()
+        server = await asyncio.start_unix_server(service.handle_connection, path=socket_path)
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        for i, backstory in enumerate(backstories):
+            request = {"id": i, "book_name": "Book", "char": "Edmond", "backstory": backstory}
+            writer.write((json.dumps(request) + "\n").encode())
+        await writer.drain()
+        responses = [json.loads(await reader.readline()) for _ in backstories]
+        writer.write(b'{"op": "metrics"}\n')
+        metrics = json.loads(await reader.readline())
+        writer.close()
+        server.close()
+        await service.close()
+        return responses, metrics
+
+    responses, metrics = asyncio.run(scenario())
+    by_id = {r["id"]: r for r in responses}
+    for i, result in enumerate(expected):
+        assert by_id[i]["prediction"] == result["prediction"]
+        assert by_id[i]["rationale"] == result["rationale"]
+    assert metrics["requests"] == 3
+    assert metrics["p99_ms"] >= metrics["p50_ms"] > 0
+
+
+def test_service_survives_bad_requests_and_failed_batches(tmp_path):
+    corpus = AnnotatedNovel.build(NOVEL)
+
+    async def scenario():
+        service = AnalysisService(books=["Book"], corpus_for=lambda book: corpus)
+        analyze = service._analyze
+        calls = []
+
+        def flaky(batch):
+            calls.append(batch)
+            if len(calls) == 1:
+                raise RuntimeError("worker died")
+            return analyze(batch)
+
+        service._analyze = flaky
+        socket_path = str(tmp_path / "kdsh.sock")
+        await service.start()
+        server = await asyncio.start_unix_server(service.handle_connection, path=socket_path)
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        request = {"book_name": "Book", "char": "Edmond", "backstory": "He trusted his friends."}
+        responses = []
+        for line in [b"[1]\n", b'"x"\n', json.dumps(dict(request, id=1)).encode() + b"\n",
+                     json.dumps(dict(request, id=2)).encode() + b"\n"]:
+            writer.write(line)
+            await writer.drain()
+            responses.append(json.loads(await reader.readline()))
+        writer.close()
+        server.close()
+        await service.close()
+        return responses
+
+    not_list, not_str, failed, served = asyncio.run(scenario())
+    assert not_list["error"].startswith("Bad request") and not_str["error"].startswith("Bad request")
+    assert failed == {"id": 1, "error": "Analysis failed: worker died"}
+    assert served["id"] == 2 and served["error"] is None and "prediction" in served
+
+
+def test_slow_batch_does_not_hold_up_later_requests():
+    corpus = AnnotatedNovel.build(NOVEL)
+
+    async def scenario():
+        service = AnalysisService(books=[], corpus_for=lambda book: corpus)
+        await service.start()
+        service._slots = asyncio.Semaphore(2)  # two batches in flight, as with workers=2
+        release = asyncio.Event()
+        run_batch = service._run_batch
+
+        async def gated(batch, pending):
+            if batch[0][1]["book_name"] == "Slow":
+                await release.wait()
+            await run_batch(batch, pending)
+
+        service._run_batch = gated
+        slow = asyncio.create_task(service.analyze("Slow", "Edmond", "He trusted his friends."))
+        await asyncio.sleep(0.05)
+        fast = await asyncio.wait_for(service.analyze("Fast", "Edmond", "He liked the sea."), 5)
+        slow_was_pending = not slow.done()
+        release.set()
+        await slow
+        await service.close()
+        return fast, slow_was_pending
+
+    fast, slow_was_pending = asyncio.run(scenario())
+    assert slow_was_pending and "prediction" in fast
+
+
+def test_service_warms_only_books_named_in_the_csvs(tmp_path, monkeypatch):
+    import run_kdsh
+
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for title in ["The Count of Monte Cristo", "Unlisted Novel"]:
+        (data_dir / f"{title}.txt").write_text(NOVEL, encoding="utf-8")
+    for name in ["DATA_DIR", "MEMORY_BUDGET_MB", "_REGISTRY"]:
+        monkeypatch.setattr(run_kdsh, name, getattr(run_kdsh, name))
+    monkeypatch.setattr(run_kdsh, "FEATURE_STORE_DIR", str(tmp_path / "features"))
+    monkeypatch.setattr(run_kdsh, "MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(run_kdsh, "book_characters", lambda: {"the count of monte cristo": {}})
+    run_kdsh.configure_registry(str(data_dir))
+
+    assert AnalysisService().books == ["The Count of Monte Cristo"]
+    assert AnalysisService(books=["Unlisted Novel"]).books == ["Unlisted Novel"]
@@ -0,0 +1,100 @@
+"""
+Unit tests for the vector store.
+"""
+
+import pytest
+from pathway_pipeline.vector_store import PathwayVectorStore
+
+
+DOCS = [
+    "Faria taught Dantes in the prison of the Chateau d'If.",
+    "The Count of Monte Cristo returned to Paris.",
+    "Dantes escaped the prison and found the treasure.",
+    "Noirtier could only move his eyes.",
+]
+
+
+def test_search_ranks_matches_then_pads_in_document_order():
+    store = PathwayVectorStore()
+    store.index_documents(DOCS, doc_ids=["a", "b", "c", "d"])
+    results = store.search("Dantes prison", top_k=4)
+    assert [doc_id for doc_id, _, _ in results][:2] == ["c", "a"]
+    assert [doc_id for doc_id, _, _ in results][2:] == ["b", "d"]
+    assert all(score == 0.0 for _, _, score in results[2:])
+
+
+def test_sparse_backend_matches_postings():
+    pytest.importorskip("scipy")
+    python_store = PathwayVectorStore()
+    sparse_store = PathwayVectorStore(backend="sparse")
+    for store in (python_store, sparse_store):
+        store.index_documents(DOCS)
+    for query in ["Dantes prison", "Paris count", "nothing matches"]:
+        expected = python_store.search(query, top_k=3)
+        actual = sparse_store.search(query, top_k=3)
+        assert [r[0] for r in actual] == [r[0] for r in expected]
+        assert [r[2] for r in actual] == pytest.approx([r[2] for r in expected])
+
+
+def test_document_frequency_and_idf():
+    store = PathwayVectorStore()
+    store.index_documents(DOCS)
+    assert store.doc_freq["dantes"] == 2
+    assert store.doc_freq["noirtier"] == 1
+    assert store.idf["noirtier"] > store.idf["dantes"] > store.idf["the"]
+
+
+def test_bm25_pruned_top_k_matches_exhaustive_ranking():
+    store = PathwayVectorStore()
+    store.index_documents(DOCS * 5)
+    for query in ["Dantes escaped the prison", "the Count returned to Paris", "eyes"]:
+        exhaustive = store.search(query, top_k=len(store.documents), scoring="bm25")
+        assert store.search(query, top_k=3, scoring="bm25") == exhaustive[:3]
+
+
+def test_add_documents_and_truncate_match_fresh_index():
+    grown = PathwayVectorStore()
+    grown.index_documents(DOCS[:2], doc_ids=["a", "b"])
+    grown.add_documents(["Mercedes married Fernand."], doc_ids=["x"])
+    grown.truncate(2)
+    grown.add_documents(DOCS[2:], doc_ids=["c", "d"])
+
+    fresh = PathwayVectorStore()
+    fresh.index_documents(DOCS, doc_ids=["a", "b", "c", "d"])
+    assert grown.doc_freq == fresh.doc_freq
+    assert grown.idf == fresh.idf
+    for scoring in PathwayVectorStore.SCORING_MODES:
+        assert grown.search("Dantes prison Paris", top_k=4, scoring=scoring) == \
+            fresh.search("Dantes prison Paris", top_k=4, scoring=scoring)
+    assert grown.documents_mentioning("dantes") == [0, 2]
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_saved_index_answers_like_the_store(tmp_path, mmap):
+    pytest.importorskip("numpy")
+    from narrative.segmenter import Segments
+
+    text = " ".join(DOCS) + " Haydée sang."
+    starts = [text.index(doc) for doc in DOCS] + [text.index("Haydée")]
+    ends = [start + len(doc) for start, doc in zip(starts, DOCS)] + [len(text)]
+    for documents in (DOCS * 3, Segments(text, starts, ends)):
+        store = PathwayVectorStore()
+        store.index_documents(documents)
+        loaded = PathwayVectorStore.load(store.save(str(tmp_path / "index.kdvi")), mmap=mmap)
+
+        assert len(loaded) == len(store.documents)
+        assert list(loaded.documents) == list(store.documents)
+        for query in ["Dantes prison", "the Count returned to Paris", "haydée", "nothing"]:
+            for scoring in PathwayVectorStore.SCORING_MODES:
+                for top_k in (1, 3, len(store.documents)):
+                    assert loaded.search(query, top_k, scoring) == store.search(query, top_k, scoring)
+                    assert loaded.search_within(query, [3, 0, 2], top_k, scoring) == \
+                        store.search_within(query, [3, 0, 2], top_k, scoring)
+        assert loaded.documents_mentioning("dantes") == store.documents_mentioning("dantes")
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "index.kdvi"
+    path.write_bytes(b"not an index")
+    with pytest.raises(ValueError):
+        PathwayVectorStore.load(str(path))